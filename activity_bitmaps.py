@@ -0,0 +1,220 @@
+"""
+Activity Bitmaps
+================
+Keeps one bitmap per registered activity (see setup_activities.py) over day ordinals (bit i is the
+day ordinal base + i) plus a bitmap of the days that have a row at all. Python ints
+are the bitmaps, so:
+
+- range counts are a shift, a mask and int.bit_count() (popcount)
+- the current streak is the distance from the anchor day down to the
+  nearest zero bit below it
+- the longest streak is how many times x &= x >> 1 can run before x is 0
+
+Missing days are zero bits, so a day without a row breaks a streak.
+
+Like the spending columns, the bitmaps are shared across requests and
+reloaded when the personal_log change counter moves or the activity
+registry changes; save_personal applies its row incrementally with
+record_save().
+"""
+
+import threading
+from datetime import date, timedelta
+
+from flask import g, has_app_context
+
+from setup_activities import get_activities
+from setup_table_versions import get_table_version
+
+# Name of the bitmap of days that have a personal_log row
+TRACKED = 'tracked'
+
+# julianday() of 0001-01-01 is 1721425.5 and date(1, 1, 1).toordinal() is 1
+JULIAN_TO_ORDINAL = 1721424.5
+
+
+def _ordinal(value):
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _mask(width):
+    return (1 << width) - 1 if width > 0 else 0
+
+
+class ActivityBitmaps:
+    """Per-activity day bitmaps for personal_log"""
+
+    def __init__(self, rows, version, activities):
+        """rows are (day ordinal, activities mask); activities is the registry"""
+        self.version = version
+        self.activities = [(activity['name'], activity['bit']) for activity in activities]
+        self.names = [name for name, _ in self.activities]
+        self._lock = threading.Lock()
+        self.base = min((row[0] for row in rows), default=date.today().toordinal())
+        self.last = max((row[0] for row in rows), default=self.base)
+
+        tracked = 0
+        columns = {name: 0 for name in self.names}
+        for day, mask in rows:
+            bit = 1 << (day - self.base)
+            tracked |= bit
+            for name, flag in self.activities:
+                if (mask >> flag) & 1:
+                    columns[name] |= bit
+        self.bitmaps = {TRACKED: tracked, **columns}
+
+    # Writes
+
+    def set_day(self, day, mask):
+        """Replace one day's row with its activities mask"""
+        day = _ordinal(day)
+        with self._lock:
+            bitmaps = dict(self.bitmaps)
+            if day < self.base:
+                shift = self.base - day
+                bitmaps = {name: bitmap << shift for name, bitmap in bitmaps.items()}
+                self.base = day
+            bit = 1 << (day - self.base)
+            bitmaps[TRACKED] |= bit
+            for name, flag in self.activities:
+                if (mask >> flag) & 1:
+                    bitmaps[name] |= bit
+                else:
+                    bitmaps[name] &= ~bit
+            self.last = max(self.last, day)
+            # Swap the whole dict so a reader never sees half of a day's update
+            self.bitmaps = bitmaps
+
+    # Reads
+
+    def _range(self, name, start=None, end=None):
+        """The bitmap restricted to [start, end], shifted so bit 0 is start"""
+        with self._lock:
+            bitmap, base, last = self.bitmaps[name], self.base, self.last
+        first = max(_ordinal(start), base) if start is not None else base
+        final = min(_ordinal(end), last) if end is not None else last
+        if final < first:
+            return 0, first
+        return (bitmap >> (first - base)) & _mask(final - first + 1), first
+
+    def count(self, name, start=None, end=None):
+        """Days in [start, end] (open-ended if omitted) with the activity set"""
+        bitmap, _ = self._range(name, start, end)
+        return bitmap.bit_count()
+
+    def counts(self, start=None, end=None, names=None):
+        """{name: count} for the activities plus TRACKED"""
+        return {name: self.count(name, start, end) for name in (names or [TRACKED] + self.names)}
+
+    def first_day(self, name, start=None, end=None):
+        """Earliest day in [start, end] with the bit set, or None"""
+        bitmap, first = self._range(name, start, end)
+        if not bitmap:
+            return None
+        return date.fromordinal(first + (bitmap & -bitmap).bit_length() - 1)
+
+    def current_streak(self, name, today):
+        """
+        Consecutive days with the activity ending today - or ending yesterday
+        if today has no row yet, since today may just not be logged yet
+        """
+        with self._lock:
+            bitmap, tracked, base = self.bitmaps[name], self.bitmaps[TRACKED], self.base
+        anchor = _ordinal(today) - base
+        if anchor >= 0 and not (tracked >> anchor) & 1:
+            anchor -= 1
+        if anchor < 0:
+            return 0
+        # Highest zero bit at or below the anchor ends the streak
+        zeros = ~bitmap & _mask(anchor + 1)
+        return anchor + 1 - zeros.bit_length()
+
+    def longest_streak(self, name):
+        """Longest run of consecutive days with the activity over the full history"""
+        with self._lock:
+            bitmap = self.bitmaps[name]
+        length = 0
+        while bitmap:
+            bitmap &= bitmap >> 1
+            length += 1
+        return length
+
+    def weekly_counts(self, start, end=None, names=None):
+        """
+        ISO weeks in [start, end] that have any row, oldest first:
+        [{year, week_num, start_date (first logged day), <activity>: count}]
+        """
+        names = names or self.names
+        first = _ordinal(start)
+        with self._lock:
+            final = _ordinal(end) if end is not None else self.last
+        weeks = []
+        week_start = date.fromordinal(first)
+        week_start -= timedelta(days=week_start.weekday())
+        while week_start.toordinal() <= final:
+            week_end = week_start + timedelta(days=6)
+            lo, hi = max(week_start.toordinal(), first), min(week_end.toordinal(), final)
+            logged = self.first_day(TRACKED, date.fromordinal(lo), date.fromordinal(hi))
+            if logged is not None:
+                year, week_num, _ = week_start.isocalendar()
+                week = {'year': year, 'week_num': week_num, 'start_date': logged}
+                for name in names:
+                    week[name] = self.count(name, date.fromordinal(lo), date.fromordinal(hi))
+                weeks.append(week)
+            week_start = week_end + timedelta(days=1)
+        return weeks
+
+
+_cache = {'bitmaps': None}
+_cache_lock = threading.Lock()
+
+
+def load_bitmaps(cursor):
+    """Return the shared bitmaps, reloading them if personal_log or the registry changed since they were built"""
+    version = get_table_version(cursor, 'personal_log')
+    activities = get_activities(cursor)
+    bitmaps = _cache['bitmaps']
+    if bitmaps is not None and bitmaps.version == version and bitmaps.names == [a['name'] for a in activities]:
+        return bitmaps
+
+    cursor.execute(f'''
+        SELECT CAST(julianday(date) - {JULIAN_TO_ORDINAL} AS INTEGER), activities
+        FROM personal_log
+    ''')
+    bitmaps = ActivityBitmaps([tuple(row) for row in cursor.fetchall()], version, activities)
+    with _cache_lock:
+        _cache['bitmaps'] = bitmaps
+    return bitmaps
+
+
+def get_bitmaps(cursor):
+    """Bitmaps for the current request - the version is only checked once per request"""
+    if not has_app_context():
+        return load_bitmaps(cursor)
+
+    bitmaps = g.get('_activity_bitmaps')
+    if bitmaps is None:
+        bitmaps = load_bitmaps(cursor)
+        g._activity_bitmaps = bitmaps
+    return bitmaps
+
+
+def record_save(cursor, day, mask):
+    """
+    After committing the upsert of one day's row (save_personal or
+    patch_personal), with the day's resulting activities mask
+    """
+    version = get_table_version(cursor, 'personal_log')
+    with _cache_lock:
+        bitmaps = _cache['bitmaps']
+        if bitmaps is None:
+            return
+        # An upsert fires either the insert or the update trigger, so one save is one
+        # bump - a notes-only PATCH too, which re-applies the unchanged mask
+        if version != bitmaps.version + 1:
+            _cache['bitmaps'] = None
+            return
+        bitmaps.set_day(day, mask)
+        bitmaps.version = version
@@ -8,10 +8,43 @@ from functools import wraps
 import subprocess
 import threading
 from ollama import Client
+import db
+from db import get_db_connection
+from categorizer import categorize
+from setup_items import intern_item
+from setup_activities import get_activities, activity_mask, activity_flags
+from setup_spending_stats import get_spending_stats
+import budget_periods
+import spending_engine
+import activity_bitmaps
+import rollups
+import spending_distribution
+from budget_periods import determine_pay_period_type
+from dashboard_data import load_dashboard_data
+import fragment_cache
+import assets
+import image_variants
+from http_cache import conditional_get
+from compression import CompressionMiddleware, precompress_static
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'
 
+# One pooled connection per request, released in teardown
+db.init_app(app)
+
+# {% cache %} blocks in templates, invalidated by the data version counters
+fragment_cache.init_app(app)
+
+# Content-hashed /assets/ URLs for the files under static/, cached as immutable
+assets.init_app(app)
+
+# srcset/picture sources for the resized wallpaper variants
+image_variants.init_app(app)
+
+# gzip/brotli for HTML and JSON responses, per Accept-Encoding
+app.wsgi_app = CompressionMiddleware(app.wsgi_app)
+
 # Toronto timezone
 TORONTO_TZ = pytz.timezone('America/Toronto')
 
@@ -24,13 +57,21 @@ def get_toronto_date():
     """Get current date in Toronto timezone"""
     return datetime.now(TORONTO_TZ).date()
 
+def months_before(day, months):
+    """Same day of the month `months` months earlier, clamped to the end of shorter months"""
+    month_index = day.year * 12 + day.month - 1 - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    next_month = date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, month, min(day.day, (next_month - timedelta(days=1)).day))
+
 @app.route('/favicon_io/<path:filename>')
 def favicon_io(filename):
-    return send_from_directory('favicon_io', filename)
+    return image_variants.send_image('favicon_io', filename)
 
 @app.route('/img/<path:filename>')
 def serve_images(filename):
-    return send_from_directory('img', filename)
+    return image_variants.send_image('img', filename)
 
 @app.template_filter('tojsonfilter')
 def to_json_filter(value):
@@ -52,10 +93,10 @@ def to_json_filter(value):
         # Fallback: convert to string representation
         return json.dumps(str(value))
 
-def get_db_connection():
-    conn = sqlite3.connect('finance_tracker.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+@app.template_test('activity_set')
+def activity_set_test(mask, activity):
+    """{% if entry.activities is activity_set(activity) %} - the activity's bit is set in a personal_log mask"""
+    return bool(activity_flags([activity], mask)[activity['name']])
 
 def convert_row_dates(row, date_fields):
     """Convert date string fields to datetime objects in a sqlite3.Row"""
@@ -75,38 +116,11 @@ def convert_row_dates(row, date_fields):
                     pass  # Keep original value if conversion fails
     return type('obj', (object,), row_dict)
 
-def determine_pay_period_type(start_date, end_date):
-    """
-    Determine if a budget period is first or second half based on the logic:
-    - If most days in budget period fall after the 15th → second period (2)
-    - If most days fall before 15th → first period (1)
-    """
-    if isinstance(start_date, str):
-        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-    if isinstance(end_date, str):
-        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-    total_days = (end_date - start_date).days + 1
-    days_after_15th = 0
-    current = start_date
-
-    while current <= end_date:
-        if current.day > 15:
-            days_after_15th += 1
-        current += timedelta(days=1)
-
-    return 2 if days_after_15th > (total_days / 2) else 1
-
 def get_current_budget_period():
     conn = get_db_connection()
     cursor = conn.cursor()
     today = get_toronto_date()
-    cursor.execute('''
-        SELECT * FROM budget_periods
-        WHERE start_date <= ? AND end_date >= ?
-        ORDER BY start_date DESC LIMIT 1
-    ''', (today, today))
-    period = cursor.fetchone()
+    period = budget_periods.get_index(cursor).containing(today)
 
     if not period:
         start_date = today
@@ -116,10 +130,9 @@ def get_current_budget_period():
             INSERT INTO budget_periods (start_date, end_date, budget_amount, is_current, pay_period_type)
             VALUES (?, ?, 500.00, 1, ?)
         ''', (start_date, end_date, pay_period_type))
-        period_id = cursor.lastrowid
         conn.commit()
-        cursor.execute('SELECT * FROM budget_periods WHERE id = ?', (period_id,))
-        period = cursor.fetchone()
+        budget_periods.invalidate()
+        period = budget_periods.get_index(cursor).containing(today)
 
     conn.close()
     return period
@@ -128,17 +141,23 @@ def get_previous_budget_period():
     """Get the budget period that ended before the current one"""
     conn = get_db_connection()
     cursor = conn.cursor()
-    current_period = get_current_budget_period()
-
-    cursor.execute('''
-        SELECT * FROM budget_periods
-        WHERE end_date < ?
-        ORDER BY end_date DESC LIMIT 1
-    ''', (current_period['start_date'],))
-    period = cursor.fetchone()
+    period = budget_periods.get_index(cursor).previous(get_current_budget_period())
     conn.close()
     return period
 
+def get_spending_total(cursor, start_date, end_date=None):
+    """Total spent from start_date to end_date (inclusive, open-ended if no end) using the daily aggregate"""
+    if end_date is None:
+        cursor.execute('SELECT SUM(total) as total FROM spending_daily WHERE date >= ?', (start_date,))
+    else:
+        cursor.execute('''
+            SELECT SUM(total) as total
+            FROM spending_daily
+            WHERE date BETWEEN ? AND ?
+        ''', (start_date, end_date))
+    result = cursor.fetchone()
+    return float(result['total']) if result['total'] else 0.0
+
 def get_previous_period_spending(period=None):
     """Get total spending for previous budget period"""
     if not period:
@@ -149,15 +168,9 @@ def get_previous_period_spending(period=None):
 
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('''
-        SELECT SUM(price) as total_spent
-        FROM spending_log
-        WHERE date BETWEEN ? AND ?
-    ''', (period['start_date'], period['end_date']))
-
-    result = cursor.fetchone()
+    total_spent = get_spending_total(cursor, period['start_date'], period['end_date'])
     conn.close()
-    return float(result['total_spent']) if result['total_spent'] else 0
+    return total_spent
 
 @app.route('/')
 def dashboard():
@@ -171,91 +184,25 @@ def dashboard():
     # Include today in the count for proper days remaining calculation
     days_left = (end_date - today).days + 1
     
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT SUM(price) as total_spent 
-        FROM spending_log 
-        WHERE date BETWEEN ? AND ?
-    ''', (budget_period['start_date'], budget_period['end_date']))
-    
-    result = cursor.fetchone()
-    total_spent = float(result['total_spent']) if result['total_spent'] else 0.0
+    if fragment_cache.fragments_cached(('dashboard-overview', today)):
+        # The overview is already rendered for this data version - only the
+        # budget figures outside it are needed
+        total_spent = round(get_spending_total(conn.cursor(), budget_period['start_date'], budget_period['end_date']), 2)
+        overview = {}
+    else:
+        data = load_dashboard_data(conn.cursor(), budget_period, today)
+        total_spent = data.total_spent
+        overview = {
+            'activity_stats': data.activity_stats,
+            'activity_percentages': data.activity_percentages,
+            'top_spending_items': [convert_row_dates(row, ['last_purchase']) for row in data.top_spending_items],
+            'recent_purchases': [convert_row_dates(row, ['date']) for row in data.recent_purchases],
+        }
+    conn.close()
     
     budget_amount = float(budget_period['budget_amount'])
     remaining_budget = budget_amount - total_spent
     daily_spend_limit = remaining_budget / max(days_left, 1)
-    
-    thirty_days_ago = today - timedelta(days=30)
-    cursor.execute('''
-        SELECT 
-            SUM(gym) as gym_count,
-            SUM(jiu_jitsu) as jiu_jitsu_count,
-            SUM(skateboarding) as skateboarding_count,
-            SUM(work) as work_count,
-            SUM(coitus) as coitus_count,
-            SUM(sauna) as sauna_count,
-            SUM(supplements) as supplements_count,
-            COUNT(*) as total_days
-        FROM personal_log 
-        WHERE date >= ?
-    ''', (thirty_days_ago,))
-    activity_stats = cursor.fetchone()
-    
-    cursor.execute('''
-        SELECT 
-            SUM(gym) as total_gym,
-            SUM(jiu_jitsu) as total_jiu_jitsu,
-            SUM(skateboarding) as total_skateboarding,
-            SUM(work) as total_work,
-            SUM(coitus) as total_coitus,
-            SUM(sauna) as total_sauna,
-            SUM(supplements) as total_supplements,
-            COUNT(*) as total_all_days
-        FROM personal_log
-    ''')
-    all_time_stats = cursor.fetchone()
-    
-    total_days = all_time_stats['total_all_days'] if all_time_stats['total_all_days'] else 1
-    activity_percentages = {
-        'gym_percentage': round((all_time_stats['total_gym'] / total_days) * 100, 1) if all_time_stats['total_gym'] else 0,
-        'jiu_jitsu_percentage': round((all_time_stats['total_jiu_jitsu'] / total_days) * 100, 1) if all_time_stats['total_jiu_jitsu'] else 0,
-        'skateboarding_percentage': round((all_time_stats['total_skateboarding'] / total_days) * 100, 1) if all_time_stats['total_skateboarding'] else 0,
-        'work_percentage': round((all_time_stats['total_work'] / total_days) * 100, 1) if all_time_stats['total_work'] else 0,
-        'coitus_percentage': round((all_time_stats['total_coitus'] / total_days) * 100, 1) if all_time_stats['total_coitus'] else 0,
-        'sauna_percentage': round((all_time_stats['total_sauna'] / total_days) * 100, 1) if all_time_stats['total_sauna'] else 0,
-        'supplements_percentage': round((all_time_stats['total_supplements'] / total_days) * 100, 1) if all_time_stats['total_supplements'] else 0,
-        'total_tracked_days': total_days
-    }
-    
-    # Top spending items instead of categories
-    cursor.execute('''
-        SELECT
-            item,
-            SUM(price) as total,
-            COUNT(*) as frequency,
-            MAX(date) as last_purchase
-        FROM spending_log
-        WHERE date >= ?
-        GROUP BY item
-        ORDER BY total DESC
-        LIMIT 10
-    ''', (thirty_days_ago,))
-    top_spending_items = cursor.fetchall()
-    
-    # Get last 10 individual purchases
-    cursor.execute('''
-        SELECT item, price, date
-        FROM spending_log
-        ORDER BY date DESC, id DESC
-        LIMIT 10
-    ''')
-    recent_purchases_raw = cursor.fetchall()
-    recent_purchases = [convert_row_dates(row, ['date']) for row in recent_purchases_raw]
-
-    # Convert top_spending_items dates as well
-    top_spending_items_converted = [convert_row_dates(row, ['last_purchase']) for row in top_spending_items]
-
-    conn.close()
 
     return render_template('dashboard.html',
                          budget_period=budget_period,
@@ -263,11 +210,8 @@ def dashboard():
                          remaining_budget=remaining_budget,
                          days_left=days_left,
                          daily_spend_limit=daily_spend_limit,
-                         activity_stats=activity_stats,
-                         activity_percentages=activity_percentages,
-                         top_spending_items=top_spending_items_converted,
-                         recent_purchases=recent_purchases,
-                         today=today)
+                         today=today,
+                         **overview)
 
 @app.route('/personal')
 def personal():
@@ -292,12 +236,14 @@ def personal():
         LIMIT 10
     ''')
     recent_entries = cursor.fetchall()
+    activities = get_activities(cursor)
     
     conn.close()
     
     return render_template('personal.html', 
                          today_data=selected_data, 
                          recent_entries=recent_entries,
+                         activities=activities,
                          today=selected_date)
 
 @app.route('/personal/save', methods=['POST'])
@@ -305,27 +251,27 @@ def save_personal():
     date_str = request.form.get('date')
     date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
 
-    gym = 1 if request.form.get('gym') == 'on' else 0
-    jiu_jitsu = 1 if request.form.get('jiu_jitsu') == 'on' else 0
-    skateboarding = 1 if request.form.get('skateboarding') == 'on' else 0
-    work = 1 if request.form.get('work') == 'on' else 0
-    coitus = 1 if request.form.get('coitus') == 'on' else 0
-    sauna = 1 if request.form.get('sauna') == 'on' else 0
-    supplements = 1 if request.form.get('supplements') == 'on' else 0
-    smoking = 1 if request.form.get('smoking') == 'on' else 0
-    drinking = 1 if request.form.get('drinking') == 'on' else 0
     notes = request.form.get('notes', '')
 
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # One checkbox per registered activity, named after it
+    checked = [name for name, value in request.form.items() if value == 'on']
+    activities = activity_mask(get_activities(cursor), checked)
+
+    # Upsert in place - REPLACE would delete and reinsert the row, changing its id and created_at
     cursor.execute('''
-        INSERT OR REPLACE INTO personal_log
-        (date, gym, jiu_jitsu, skateboarding, work, coitus, sauna, supplements, smoking, drinking, notes, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-    ''', (date_obj, gym, jiu_jitsu, skateboarding, work, coitus, sauna, supplements, smoking, drinking, notes))
+        INSERT INTO personal_log (date, activities, notes, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(date) DO UPDATE SET
+            activities = excluded.activities,
+            notes = excluded.notes,
+            updated_at = excluded.updated_at
+    ''', (date_obj, activities, notes))
 
     conn.commit()
+    activity_bitmaps.record_save(cursor, date_obj, activities)
     conn.close()
 
     # Return JSON response for AJAX requests
@@ -336,109 +282,188 @@ def save_personal():
     flash('Personal data saved successfully!', 'success')
     return redirect(url_for('personal', date=date_str))
 
-@app.route('/calendar')
-def calendar():
-    from datetime import datetime, timedelta
-    
-    # Get date range from query parameters
-    start_date_param = request.args.get('start_date')
-    end_date_param = request.args.get('end_date')
-    
-    # Default to showing ALL historical data
-    today = get_toronto_date()
-    if start_date_param and end_date_param:
-        try:
-            start_date = datetime.strptime(start_date_param, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date_param, '%Y-%m-%d').date()
-        except ValueError:
-            # Default to all time data if invalid parameters
-            start_date = datetime(2020, 1, 1).date()  # Very early date to capture all data
-            end_date = today
-    else:
-        # Default to all time data - show everything
-        start_date = datetime(2020, 1, 1).date()  # Very early date to capture all data
-        end_date = today
-    
+@app.route('/api/personal/<date_str>', methods=['PATCH'])
+def patch_personal(date_str):
+    """
+    Autosave only the fields that changed for one day:
+    {"activities": {"gym": true, "sauna": false}, "notes": "..."} - either key
+    may be left out, and activities not mentioned keep their stored value
+    """
+    try:
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Date must be YYYY-MM-DD'}), 400
+
+    data = request.get_json(silent=True)
+    if (not isinstance(data, dict) or not ({'activities', 'notes'} & data.keys())
+            or not isinstance(data.get('activities', {}), dict)
+            or not isinstance(data.get('notes', ''), str)):
+        return jsonify({'error': 'Pass activities ({name: true/false}) and/or notes (text)'}), 400
+
     conn = get_db_connection()
     cursor = conn.cursor()
+
+    registry = get_activities(cursor)
+    changes = data.get('activities', {})
+    unknown = set(changes) - {activity['name'] for activity in registry}
+    if unknown:
+        conn.close()
+        return jsonify({'error': f"Unknown activities: {', '.join(sorted(unknown))}"}), 400
+    set_bits = activity_mask(registry, [name for name, done in changes.items() if done])
+    clear_bits = activity_mask(registry, [name for name, done in changes.items() if not done])
+
+    # Only the columns sent are touched on an existing row
+    assignments = []
+    if 'activities' in data:
+        assignments.append('activities = (activities & ~:clear) | :set')
+    if 'notes' in data:
+        assignments.append('notes = excluded.notes')
+    cursor.execute(f'''
+        INSERT INTO personal_log (date, activities, notes, updated_at)
+        VALUES (:date, :set, :notes, CURRENT_TIMESTAMP)
+        ON CONFLICT(date) DO UPDATE SET
+            {', '.join(assignments)},
+            updated_at = excluded.updated_at
+        RETURNING activities
+    ''', {'date': date_obj, 'set': set_bits, 'clear': clear_bits, 'notes': data.get('notes')})
+    activities = cursor.fetchone()['activities']
+
+    conn.commit()
+    activity_bitmaps.record_save(cursor, date_obj, activities)
+    conn.close()
+
+    return jsonify({'success': True, 'date': date_str, 'activities': activity_flags(registry, activities)})
+
+# Longest window /api/calendar serves in one response
+CALENDAR_MAX_DAYS = 93
+
+def calendar_days(cursor, start_date, end_date):
+    """
+    Compact calendar data for [start_date, end_date]: parallel arrays of day
+    offsets from start with each day's activities mask (bit i is the
+    activity named activities[i], None for an unused bit), and parallel
+    arrays of day offsets with each day's spending total. Items and notes
+    come from /api/calendar/day/<date> when a day is opened.
+    """
+    start = start_date.strftime('%Y-%m-%d')
+    end = end_date.strftime('%Y-%m-%d')
+    registry = get_activities(cursor)
+    names = [None] * (max((activity['bit'] for activity in registry), default=-1) + 1)
+    for activity in registry:
+        names[activity['bit']] = activity['name']
     
-    # Get personal activities data
     cursor.execute('''
-        SELECT * FROM personal_log 
-        WHERE date BETWEEN ? AND ?
+        SELECT CAST(julianday(date) - julianday(:start) AS INTEGER), activities
+        FROM personal_log
+        WHERE date BETWEEN :start AND :end
         ORDER BY date
-    ''', (start_date, end_date))
-    personal_rows = cursor.fetchall()
-    personal_data = {}
-    for row in personal_rows:
-        # Handle both string and datetime objects
-        if isinstance(row['date'], str):
-            date_key = row['date']
-        else:
-            date_key = row['date'].strftime('%Y-%m-%d')
-        personal_data[date_key] = dict(row)
+    ''', {'start': start, 'end': end})
+    personal = cursor.fetchall()
     
-    # Get spending data
+    # spending_daily already holds one total per day
     cursor.execute('''
-        SELECT date, item, price FROM spending_log 
-        WHERE date BETWEEN ? AND ?
-        ORDER BY date, id
-    ''', (start_date, end_date))
-    spending_raw = cursor.fetchall()
-    
-    # Group spending by date
-    spending_data = {}
-    for row in spending_raw:
-        # Handle both string and datetime objects
-        if isinstance(row['date'], str):
-            date_str = row['date']
-        else:
-            date_str = row['date'].strftime('%Y-%m-%d')
-        if date_str not in spending_data:
-            spending_data[date_str] = []
-        spending_data[date_str].append({
-            'description': row['item'],
-            'amount': float(row['price'])
-        })
-    
-    # Combine data for calendar
-    calendar_data = {}
-    all_dates = set(personal_data.keys()) | set(spending_data.keys())
+        SELECT CAST(julianday(date) - julianday(:start) AS INTEGER), total
+        FROM spending_daily
+        WHERE date BETWEEN :start AND :end
+        ORDER BY date
+    ''', {'start': start, 'end': end})
+    spending = cursor.fetchall()
+    
+    return {
+        'start': start,
+        'end': end,
+        'activities': names,
+        'personal_days': [row[0] for row in personal],
+        'personal_masks': [row[1] for row in personal],
+        'spending_days': [row[0] for row in spending],
+        'spending_totals': [round(row[1], 2) for row in spending]
+    }
+
+def month_bounds(month_str):
+    """First and last day of a 'YYYY-MM' month (ValueError if malformed)"""
+    first = datetime.strptime(month_str, '%Y-%m').date()
+    next_month = date(first.year + (first.month == 12), first.month % 12 + 1, 1)
+    return first, next_month - timedelta(days=1)
+
+@app.route('/calendar')
+def calendar():
+    """Calendar page - only the initially visible month is embedded, the rest comes from /api/calendar"""
+    today = get_toronto_date()
     
-    for date_str in all_dates:
-        calendar_data[date_str] = {
-            'has_personal': date_str in personal_data,
-            'has_spending': date_str in spending_data,
-            'personal': personal_data.get(date_str),
-            'spending': spending_data.get(date_str, [])
-        }
-        
-        # Add activity indicators
-        if date_str in personal_data:
-            activities = []
-            personal = personal_data[date_str]
-            if personal.get('gym'): activities.append('gym')
-            if personal.get('jiu_jitsu'): activities.append('jiu-jitsu')
-            if personal.get('skateboarding'): activities.append('skateboarding')
-            if personal.get('work'): activities.append('work')
-            if personal.get('coitus'): activities.append('coitus')
-            if personal.get('sauna'): activities.append('sauna')
-            if personal.get('supplements'): activities.append('supplements')
-            if personal.get('smoking'): activities.append('smoking')
-            if personal.get('drinking'): activities.append('drinking')
-            calendar_data[date_str]['activities'] = activities
-        
-        # Add spending total
-        if date_str in spending_data:
-            total = sum(item['amount'] for item in spending_data[date_str])
-            calendar_data[date_str]['spending_total'] = f"{total:.2f}"
+    # ?month=YYYY-MM picks the month shown first (?start_date= from older links works too)
+    month_param = request.args.get('month') or (request.args.get('start_date') or '')[:7]
+    try:
+        start_date, end_date = month_bounds(month_param)
+    except ValueError:
+        start_date, end_date = month_bounds(today.strftime('%Y-%m'))
     
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    calendar_data = calendar_days(cursor, start_date, end_date)
+    activities = get_activities(cursor)
     conn.close()
     
     return render_template('calendar.html',
                          calendar_data=calendar_data,
-                         start_date=start_date.strftime('%Y-%m-%d'),
-                         end_date=end_date.strftime('%Y-%m-%d'))
+                         activities=activities,
+                         month=start_date.strftime('%Y-%m'))
+
+@app.route('/api/calendar')
+@conditional_get('personal_log', 'spending_log', 'activity_types')
+def api_calendar():
+    """Calendar entries for ?month=YYYY-MM, or ?start=YYYY-MM-DD&end=YYYY-MM-DD (at most CALENDAR_MAX_DAYS days)"""
+    try:
+        if request.args.get('month'):
+            start_date, end_date = month_bounds(request.args['month'])
+        else:
+            start_date = datetime.strptime(request.args.get('start', ''), '%Y-%m-%d').date()
+            end_date = datetime.strptime(request.args.get('end', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Pass month=YYYY-MM or start/end as YYYY-MM-DD'}), 400
+    if start_date > end_date:
+        return jsonify({'error': 'start must not be after end'}), 400
+    if (end_date - start_date).days + 1 > CALENDAR_MAX_DAYS:
+        return jsonify({'error': f'Windows are limited to {CALENDAR_MAX_DAYS} days'}), 400
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    data = calendar_days(cursor, start_date, end_date)
+    conn.close()
+    
+    return jsonify(data)
+
+@app.route('/api/calendar/day/<date_str>')
+@conditional_get('personal_log', 'spending_log', 'activity_types')
+def api_calendar_day(date_str):
+    """Activities, notes and spending items for one calendar day"""
+    try:
+        day = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Date must be YYYY-MM-DD'}), 400
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT activities, notes
+        FROM personal_log
+        WHERE date = ?
+    ''', (day,))
+    personal = cursor.fetchone()
+    if personal:
+        personal = {**activity_flags(get_activities(cursor), personal['activities']), 'notes': personal['notes']}
+    cursor.execute('''
+        SELECT item, price FROM spending_log
+        WHERE date = ?
+        ORDER BY id
+    ''', (day,))
+    spending = [{'description': row['item'], 'amount': float(row['price'])} for row in cursor.fetchall()]
+    conn.close()
+    
+    return jsonify({
+        'date': day.strftime('%Y-%m-%d'),
+        'personal': personal,
+        'spending': spending
+    })
 
 @app.route('/spending')
 def spending():
@@ -463,19 +488,8 @@ def spending():
     period_spending_raw = cursor.fetchall()
     period_spending = [convert_row_dates(row, ['date', 'created_at']) for row in period_spending_raw]
 
-    cursor.execute('''
-        SELECT SUM(price) as total
-        FROM spending_log
-        WHERE date = ?
-    ''', (toronto_today,))
-    today_total = cursor.fetchone()['total'] or 0
-
-    cursor.execute('''
-        SELECT SUM(price) as total
-        FROM spending_log
-        WHERE date BETWEEN ? AND ?
-    ''', (budget_period['start_date'], budget_period['end_date']))
-    period_total = cursor.fetchone()['total'] or 0
+    today_total = get_spending_total(cursor, toronto_today, toronto_today)
+    period_total = get_spending_total(cursor, budget_period['start_date'], budget_period['end_date'])
 
     conn.close()
 
@@ -519,15 +533,20 @@ def add_spending():
 
     # Insert all items
     total_amount = 0
+    inserted = []
     for item, price_str in zip(items, prices):
         price = float(price_str)
         total_amount += price
+        category = categorize(item)
+        item_id, item_name = intern_item(cursor, item)
         cursor.execute('''
-            INSERT INTO spending_log (date, item, price)
-            VALUES (?, ?, ?)
-        ''', (date_obj, item, price))
+            INSERT INTO spending_log (date, item, price, category, item_id)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (date_obj, item, price, category, item_id))
+        inserted.append((cursor.lastrowid, date_obj, item_name, price, category))
 
     conn.commit()
+    spending_engine.record_insert(cursor, inserted)
     conn.close()
 
     # Create appropriate flash message
@@ -544,7 +563,10 @@ def delete_spending(entry_id):
     cursor = conn.cursor()
 
     cursor.execute('DELETE FROM spending_log WHERE id = ?', (entry_id,))
+    deleted = cursor.rowcount
     conn.commit()
+    if deleted:
+        spending_engine.record_delete(cursor, entry_id)
     conn.close()
 
     flash('Spending entry deleted', 'success')
@@ -584,19 +606,24 @@ def edit_spending(entry_id):
             return redirect(url_for('spending'))
 
         date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+        category = categorize(item)
+        item_id, item_name = intern_item(cursor, item)
 
         cursor.execute('''
             UPDATE spending_log
-            SET date = ?, item = ?, price = ?, updated_at = CURRENT_TIMESTAMP
+            SET date = ?, item = ?, price = ?, category = ?, item_id = ?, updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
-        ''', (date_obj, item, price, entry_id))
+        ''', (date_obj, item, price, category, item_id, entry_id))
+        updated = cursor.rowcount
 
-        if cursor.rowcount == 0:
+        if updated == 0:
             flash('Spending entry not found', 'error')
         else:
             flash(f'Updated {item} to ${price:.2f}', 'success')
 
         conn.commit()
+        if updated:
+            spending_engine.record_update(cursor, entry_id, date_obj, item_name, price, category)
         conn.close()
         return redirect(url_for('spending'))
 
@@ -604,104 +631,49 @@ def edit_spending(entry_id):
 @app.route('/analytics')
 def analytics():
     """Advanced analytics page"""
+    today = get_toronto_date()
+
+    # Every figure on the page lives in its cached fragments
+    if fragment_cache.fragments_cached(('analytics-breakdown', today), ('analytics-insights', today),
+                                       ('analytics-weekly-data', today)):
+        return render_template('analytics.html', today=today)
+
     conn = get_db_connection()
     cursor = conn.cursor()
     
     # Get spending by time periods
-    today = get_toronto_date()
     seven_days_ago = today - timedelta(days=7)
     thirty_days_ago = today - timedelta(days=30)
     ninety_days_ago = today - timedelta(days=90)
     
-    # Weekly spending
-    cursor.execute('''
-        SELECT SUM(price) as total FROM spending_log 
-        WHERE date >= ?
-    ''', (seven_days_ago,))
-    weekly_total = cursor.fetchone()['total'] or 0
-    
-    # Monthly spending
-    cursor.execute('''
-        SELECT SUM(price) as total FROM spending_log 
-        WHERE date >= ?
-    ''', (thirty_days_ago,))
-    monthly_total = cursor.fetchone()['total'] or 0
+    spending = spending_engine.get_columns(cursor)
+
+    # Weekly, monthly and quarterly spending
+    weekly_total = spending.total(seven_days_ago)
+    monthly_total = spending.total(thirty_days_ago)
+    quarterly_total = spending.total(ninety_days_ago)
     
-    # Quarterly spending
-    cursor.execute('''
-        SELECT SUM(price) as total FROM spending_log 
-        WHERE date >= ?
-    ''', (ninety_days_ago,))
-    quarterly_total = cursor.fetchone()['total'] or 0
+    # Spending by category (assigned when the row was written)
+    detailed_categories = spending.category_totals(thirty_days_ago)
     
-    # Enhanced detailed spending by category using CTE for better categorization
-    cursor.execute('''
-        WITH categorized AS (
-            SELECT 
-                item,
-                CASE 
-                    WHEN LOWER(item) LIKE '%tim%' OR LOWER(item) LIKE '%tims%' THEN 'TIMS'
-                    WHEN LOWER(item) LIKE '%coffee%' AND LOWER(item) NOT LIKE '%tim%' THEN 'Coffee (Other)'
-                    WHEN LOWER(item) LIKE '%gas%' OR LOWER(item) LIKE '%fuel%' OR LOWER(item) LIKE '%petro%' THEN 'Gas'
-                    WHEN LOWER(item) LIKE '%dispo%' OR LOWER(item) LIKE '%cannabis%' THEN 'Dispo'
-                    WHEN LOWER(item) LIKE '%lcbo%' OR LOWER(item) LIKE '%alcohol%' OR LOWER(item) LIKE '%beer%' OR LOWER(item) LIKE '%wine%' THEN 'LCBO'
-                    WHEN LOWER(item) LIKE '%mcdonald%' OR LOWER(item) LIKE '%mcds%' THEN 'McDonalds'
-                    WHEN LOWER(item) LIKE '%domino%' THEN 'Dominos'
-                    WHEN LOWER(item) LIKE '%wendys%' THEN 'Wendys'
-                    WHEN LOWER(item) LIKE '%osmow%' OR LOWER(item) LIKE '%shawarma%' THEN 'Osmows/Shawarma'
-                    WHEN LOWER(item) LIKE '%arbys%' THEN 'Arbys'
-                    WHEN LOWER(item) LIKE '%food%' OR LOWER(item) LIKE '%restaurant%' OR LOWER(item) LIKE '%pizza%' OR LOWER(item) LIKE '%taco%' OR LOWER(item) LIKE '%burger%' THEN 'Food (Other)'
-                    WHEN LOWER(item) LIKE '%gym%' OR LOWER(item) LIKE '%fit%' OR LOWER(item) LIKE '%workout%' THEN 'Fitness'
-                    WHEN LOWER(item) LIKE '%gift%' THEN 'Gifts'
-                    WHEN LOWER(item) LIKE '%wash%' OR LOWER(item) LIKE '%car%' THEN 'Car Care'
-                    ELSE 'Other'
-                END as category,
-                price
-            FROM spending_log 
-            WHERE date >= ?
-        )
-        SELECT category, SUM(price) as total, COUNT(*) as count
-        FROM categorized
-        GROUP BY category
-        ORDER BY total DESC
-    ''', (thirty_days_ago.strftime('%Y-%m-%d'),))
-    detailed_categories = cursor.fetchall()
-    
-    # Top spending items from spending_log
-    cursor.execute('''
-        SELECT item as item_name, SUM(price) as total, COUNT(*) as frequency
-        FROM spending_log 
-        WHERE date >= ?
-        GROUP BY item
-        ORDER BY total DESC
-        LIMIT 10
-    ''', (thirty_days_ago,))
-    top_items = cursor.fetchall()
+    # Top spending items
+    top_items = [{'item_name': row['item'], 'total': row['total'], 'frequency': row['frequency']}
+                 for row in spending.item_totals(thirty_days_ago, limit=10)]
     
     # Spending trends by week
-    cursor.execute('''
-        SELECT 
-            strftime('%Y-%W', date) as week,
-            SUM(price) as total
-        FROM spending_log 
-        WHERE date >= ?
-        GROUP BY strftime('%Y-%W', date)
-        ORDER BY week
-    ''', (ninety_days_ago,))
-    weekly_trends = cursor.fetchall()
+    weekly_trends = spending.weekly_totals(ninety_days_ago)
     
     # Personal Activities Analytics
     # Get total days tracked and activity stats
-    cursor.execute('''
-        SELECT
-            COUNT(*) as total_days_tracked,
-            SUM(gym) as total_gym_days,
-            SUM(jiu_jitsu) as total_jj_days,
-            SUM(skateboarding) as total_skate_days,
-            SUM(supplements) as total_supplement_days
-        FROM personal_log
-    ''')
-    habits_stats = cursor.fetchone()
+    activities = activity_bitmaps.get_bitmaps(cursor)
+    all_time = activities.counts()
+    habits_stats = {
+        'total_days_tracked': all_time['tracked'],
+        'total_gym_days': all_time['gym'],
+        'total_jj_days': all_time['jiu_jitsu'],
+        'total_skate_days': all_time['skateboarding'],
+        'total_supplement_days': all_time['supplements'],
+    }
 
     # Calculate percentages
     total_tracked = habits_stats['total_days_tracked'] if habits_stats['total_days_tracked'] > 0 else 1
@@ -711,30 +683,22 @@ def analytics():
     supplement_percentage = (habits_stats['total_supplement_days'] / total_tracked) * 100 if habits_stats['total_supplement_days'] else 0
 
     # Get spending on LCBO (alcohol) and Dispo (cannabis)
-    cursor.execute('''
-        SELECT
-            SUM(CASE WHEN LOWER(item) LIKE '%lcbo%' OR LOWER(item) LIKE '%alcohol%'
-                     OR LOWER(item) LIKE '%beer%' OR LOWER(item) LIKE '%wine%'
-                     OR LOWER(item) LIKE '%liquor%' THEN price ELSE 0 END) as lcbo_spending,
-            SUM(CASE WHEN LOWER(item) LIKE '%dispo%' OR LOWER(item) LIKE '%cannabis%'
-                     OR LOWER(item) LIKE '%weed%' OR LOWER(item) LIKE '%dispensary%' THEN price ELSE 0 END) as dispo_spending
-        FROM spending_log
-        WHERE date >= ?
-    ''', (thirty_days_ago,))
-    substance_spending = cursor.fetchone()
+    substance_totals = {row['category']: row['total']
+                        for row in spending.category_totals(thirty_days_ago, categories=('LCBO', 'Dispo'))}
+    substance_spending = {
+        'lcbo_spending': substance_totals.get('LCBO', 0),
+        'dispo_spending': substance_totals.get('Dispo', 0),
+    }
 
     # Get recent 30 days activity patterns
-    cursor.execute('''
-        SELECT
-            SUM(gym) as gym_days_30,
-            SUM(jiu_jitsu) as jj_days_30,
-            SUM(skateboarding) as skate_days_30,
-            SUM(supplements) as supplement_days_30,
-            COUNT(*) as tracked_days_30
-        FROM personal_log
-        WHERE date >= ?
-    ''', (thirty_days_ago,))
-    recent_habits = cursor.fetchone()
+    recent = activities.counts(thirty_days_ago)
+    recent_habits = {
+        'gym_days_30': recent['gym'],
+        'jj_days_30': recent['jiu_jitsu'],
+        'skate_days_30': recent['skateboarding'],
+        'supplement_days_30': recent['supplements'],
+        'tracked_days_30': recent['tracked'],
+    }
 
     # Calculate recent percentages
     recent_tracked = recent_habits['tracked_days_30'] if recent_habits['tracked_days_30'] > 0 else 1
@@ -776,7 +740,8 @@ def analytics():
                          detailed_categories=detailed_categories,
                          top_items=top_items,
                          weekly_trends=weekly_trends,
-                         habits_analytics=habits_analytics)
+                         habits_analytics=habits_analytics,
+                         today=today)
 
 # NEW ROUTES FOR PORTFOLIO
 @app.route('/portfolio')
@@ -1116,51 +1081,84 @@ def transact_etf():
         flash(f'Error processing transaction: {str(e)}', 'error')
         return redirect(url_for('portfolio'))
 
+# Longest window /api/analytics serves per grain (a few hundred buckets at most)
+ANALYTICS_MAX_DAYS = {'day': 366, 'week': 3 * 366, 'month': 10 * 366}
+
+def windowed_analytics_data(cursor, start, end, grain):
+    """Spending, category, top item and activity series for any window, from the rollups"""
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'grain': grain,
+        'spending': rollups.spending_series(cursor, start, end, grain),
+        'categories': rollups.category_series(cursor, start, end, grain),
+        'top_items': rollups.item_totals(cursor, start, end),
+        'activities': rollups.activity_series(cursor, start, end, grain)
+    }
+
 @app.route('/api/analytics')
+@conditional_get('spending_log', 'personal_log', 'budget_periods', 'activity_types')
 def api_analytics():
-    """API endpoint for analytics data - FIXED to show actual last 30 days"""
+    """API endpoint for analytics data - FIXED to show actual last 30 days
+    
+    With ?start=YYYY-MM-DD&end=YYYY-MM-DD&grain=day|week|month (any of them,
+    defaulting to the last 30 days by day) it returns rollup series for that
+    window instead, for windows of at most ANALYTICS_MAX_DAYS[grain] days.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     
     today = get_toronto_date()
+    
+    if any(arg in request.args for arg in ('start', 'end', 'grain')):
+        grain = request.args.get('grain', 'day')
+        try:
+            start = datetime.strptime(request.args.get('start') or (today - timedelta(days=29)).isoformat(), '%Y-%m-%d').date()
+            end = datetime.strptime(request.args.get('end') or today.isoformat(), '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'start and end must be YYYY-MM-DD'}), 400
+        if grain not in rollups.GRAINS:
+            return jsonify({'error': 'grain must be day, week or month'}), 400
+        if start > end:
+            return jsonify({'error': 'start must not be after end'}), 400
+        if (end - start).days + 1 > ANALYTICS_MAX_DAYS[grain]:
+            return jsonify({'error': f'Windows are limited to {ANALYTICS_MAX_DAYS[grain]} days for grain={grain}'}), 400
+        
+        try:
+            data = windowed_analytics_data(cursor, start, end, grain)
+        except (ValueError, OverflowError):
+            # The buckets of a window at the end of year 9999 run past the last representable date
+            return jsonify({'error': 'Window is outside the supported date range'}), 400
+        finally:
+            conn.close()
+        return jsonify(data)
+    
     thirty_days_ago = today - timedelta(days=29)
     
-    # Daily spending over last 30 days
-    cursor.execute('''
-        SELECT date, SUM(price) as total
-        FROM spending_log 
-        WHERE date >= ? AND date <= ?
-        GROUP BY date
-        ORDER BY date
-    ''', (thirty_days_ago, today))
-    daily_spending = [dict(row) for row in cursor.fetchall()]
-    
-    # Fill in missing days with 0 spending
-    complete_spending = []
-    current_date = thirty_days_ago
-    spending_dict = {row['date'].strftime('%Y-%m-%d') if isinstance(row['date'], date) else str(row['date']): row['total'] for row in daily_spending}
-    
-    while current_date <= today:
-        date_str = current_date.strftime('%Y-%m-%d')
-        complete_spending.append({
-            'date': date_str,
-            'total': spending_dict.get(date_str, 0)
-        })
-        current_date += timedelta(days=1)
+    # Daily spending over last 30 days, days without spending come out as 0
+    daily_totals = spending_engine.get_columns(cursor).daily_totals(thirty_days_ago, today)
+    complete_spending = [
+        {
+            'date': (thirty_days_ago + timedelta(days=offset)).strftime('%Y-%m-%d'),
+            'total': round(float(total), 2)
+        }
+        for offset, total in enumerate(daily_totals)
+    ]
     
     # Activity frequency over last 30 days
     cursor.execute('''
-        SELECT date, gym, jiu_jitsu, skateboarding, work, coitus, sauna, supplements
+        SELECT date, activities
         FROM personal_log 
         WHERE date >= ? AND date <= ?
         ORDER BY date
     ''', (thirty_days_ago, today))
     activities = cursor.fetchall()
+    registry = get_activities(cursor)
     
-    # Convert date objects to strings
+    # Convert date objects to strings and masks to one flag per activity
     daily_activities = []
     for row in activities:
-        activity_dict = dict(row)
+        activity_dict = {'date': row['date'], **activity_flags(registry, row['activities'])}
         activity_dict['date'] = activity_dict['date'].strftime('%Y-%m-%d') if activity_dict['date'] and hasattr(activity_dict['date'], 'strftime') else str(activity_dict['date']) if activity_dict['date'] else ''
         daily_activities.append(activity_dict)
     
@@ -1179,121 +1177,40 @@ def api_analytics():
         }
     })
 
-@app.route('/api/analytics/detailed')
-def api_detailed_analytics():
-    """API endpoint for detailed analytics charts"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def detailed_analytics_data(cursor, today):
+    """Category trends and daily averages for the analytics charts"""
+    six_months_ago = months_before(today, 6)
     
-    # Enhanced category spending over time using CTE for better categorization
-    cursor.execute('''
-        WITH categorized AS (
-            SELECT 
-                item,
-                CASE 
-                    WHEN LOWER(item) LIKE '%tim%' OR LOWER(item) LIKE '%tims%' THEN 'TIMS'
-                    WHEN LOWER(item) LIKE '%coffee%' AND LOWER(item) NOT LIKE '%tim%' THEN 'Coffee (Other)'
-                    WHEN LOWER(item) LIKE '%gas%' OR LOWER(item) LIKE '%fuel%' OR LOWER(item) LIKE '%petro%' THEN 'Gas'
-                    WHEN LOWER(item) LIKE '%dispo%' OR LOWER(item) LIKE '%cannabis%' THEN 'Dispo'
-                    WHEN LOWER(item) LIKE '%lcbo%' OR LOWER(item) LIKE '%alcohol%' OR LOWER(item) LIKE '%beer%' OR LOWER(item) LIKE '%wine%' THEN 'LCBO'
-                    WHEN LOWER(item) LIKE '%mcdonald%' OR LOWER(item) LIKE '%mcds%' THEN 'McDonalds'
-                    WHEN LOWER(item) LIKE '%domino%' THEN 'Dominos'
-                    WHEN LOWER(item) LIKE '%wendys%' THEN 'Wendys'
-                    WHEN LOWER(item) LIKE '%osmow%' OR LOWER(item) LIKE '%shawarma%' THEN 'Osmows'
-                    WHEN LOWER(item) LIKE '%arbys%' THEN 'Arbys'
-                    WHEN LOWER(item) LIKE '%food%' OR LOWER(item) LIKE '%restaurant%' OR LOWER(item) LIKE '%pizza%' OR LOWER(item) LIKE '%taco%' OR LOWER(item) LIKE '%burger%' THEN 'Food (Other)'
-                    WHEN LOWER(item) LIKE '%gym%' OR LOWER(item) LIKE '%fit%' OR LOWER(item) LIKE '%workout%' THEN 'Fitness'
-                    WHEN LOWER(item) LIKE '%gift%' THEN 'Gifts'
-                    WHEN LOWER(item) LIKE '%wash%' OR LOWER(item) LIKE '%car%' THEN 'Car Care'
-                    ELSE 'Other'
-                END as category,
-                strftime('%Y-%m', date) as month,
-                price
-            FROM spending_log 
-            WHERE date >= date('now', '-6 months')
-        )
-        SELECT category, month, SUM(price) as total
-        FROM categorized
-        GROUP BY category, month
-        ORDER BY month, category
-    ''')
-    category_trends = [dict(row) for row in cursor.fetchall()]
+    # Category spending over time
+    category_trends = spending_engine.get_columns(cursor).monthly_category_totals(six_months_ago)
     
-    # Overall daily average calculation - total spent divided by total days tracked
-    cursor.execute('''
-        SELECT 
-            COUNT(DISTINCT date) as total_days,
-            SUM(price) as total_spent,
-            ROUND(SUM(price) * 1.0 / COUNT(DISTINCT date), 2) as overall_daily_avg
-        FROM spending_log
-    ''')
-    overall_stats = cursor.fetchone()
+    # Overall daily average - total spent divided by the days with spending,
+    # plus the same per month since the month six months ago for trend
+    # visualization - both from the trigger-maintained spending_stats rows
+    overall_stats, monthly_daily_averages = get_spending_stats(cursor, six_months_ago.strftime('%Y-%m'))
     
-    # Also get daily averages for the last few months for trend visualization
-    cursor.execute('''
-        SELECT 
-            strftime('%Y-%m', date) as month,
-            COUNT(DISTINCT date) as days_in_month,
-            SUM(price) as monthly_total,
-            ROUND(SUM(price) * 1.0 / COUNT(DISTINCT date), 2) as avg_daily_for_month
-        FROM spending_log
-        WHERE date >= date('now', '-6 months')
-        GROUP BY strftime('%Y-%m', date)
-        ORDER BY month
-    ''')
-    monthly_daily_averages = [dict(row) for row in cursor.fetchall()]
-    
-    conn.close()
-    
-    return jsonify({
+    return {
         'category_trends': category_trends,
         'monthly_daily_averages': monthly_daily_averages,
-        'overall_stats': dict(overall_stats)
-    })
+        'overall_stats': overall_stats
+    }
 
-@app.route('/api/analytics/other_category')
-def api_analytics_other_category():
-    """API endpoint for Other category breakdown"""
+@app.route('/api/analytics/detailed')
+@conditional_get('spending_log')
+def api_detailed_analytics():
+    """API endpoint for detailed analytics charts"""
     conn = get_db_connection()
     cursor = conn.cursor()
-
-    thirty_days_ago = (datetime.now() - timedelta(days=30)).date()
-
-    # Get items that fall into "Other" category
-    cursor.execute('''
-        SELECT
-            item,
-            SUM(price) as total,
-            COUNT(*) as frequency
-        FROM spending_log
-        WHERE date >= ?
-        AND NOT (
-            LOWER(item) LIKE '%tim%' OR LOWER(item) LIKE '%tims%' OR
-            LOWER(item) LIKE '%coffee%' OR
-            LOWER(item) LIKE '%gas%' OR LOWER(item) LIKE '%fuel%' OR LOWER(item) LIKE '%petro%' OR
-            LOWER(item) LIKE '%dispo%' OR LOWER(item) LIKE '%cannabis%' OR
-            LOWER(item) LIKE '%lcbo%' OR LOWER(item) LIKE '%alcohol%' OR LOWER(item) LIKE '%beer%' OR LOWER(item) LIKE '%wine%' OR
-            LOWER(item) LIKE '%mcdonald%' OR LOWER(item) LIKE '%mcds%' OR
-            LOWER(item) LIKE '%domino%' OR
-            LOWER(item) LIKE '%food%' OR LOWER(item) LIKE '%restaurant%' OR LOWER(item) LIKE '%wendys%' OR
-            LOWER(item) LIKE '%pizza%' OR LOWER(item) LIKE '%taco%' OR LOWER(item) LIKE '%burger%' OR
-            LOWER(item) LIKE '%arbys%' OR LOWER(item) LIKE '%osmow%' OR LOWER(item) LIKE '%shawarma%' OR
-            LOWER(item) LIKE '%gym%' OR LOWER(item) LIKE '%fit%' OR LOWER(item) LIKE '%workout%' OR
-            LOWER(item) LIKE '%gift%' OR
-            LOWER(item) LIKE '%wash%' OR LOWER(item) LIKE '%car%'
-        )
-        GROUP BY item
-        ORDER BY total DESC
-    ''', (thirty_days_ago,))
-
-    other_items = cursor.fetchall()
-
-    # Calculate total
-    total_amount = sum(float(item['total']) for item in other_items)
-
+    data = detailed_analytics_data(cursor, get_toronto_date())
     conn.close()
+    return jsonify(data)
 
-    return jsonify({
+def other_category_data(cursor, today):
+    """Items that fall into the "Other" category over the last 30 days"""
+    thirty_days_ago = today - timedelta(days=30)
+    other_items = spending_engine.get_columns(cursor).item_totals(thirty_days_ago, category='Other')
+
+    return {
         'items': [
             {
                 'item': item['item'],
@@ -1302,110 +1219,82 @@ def api_analytics_other_category():
             }
             for item in other_items
         ],
-        'total': total_amount,
+        'total': round(sum(item['total'] for item in other_items), 2),
         'count': len(other_items)
-    })
+    }
 
-@app.route('/api/analytics/activities')
-def api_activity_analytics():
-    """API endpoint for detailed activity analytics"""
+@app.route('/api/analytics/other_category')
+@conditional_get('spending_log')
+def api_analytics_other_category():
+    """API endpoint for Other category breakdown"""
     conn = get_db_connection()
     cursor = conn.cursor()
+    data = other_category_data(cursor, get_toronto_date())
+    conn.close()
+    return jsonify(data)
+
+@app.route('/api/analytics/distribution')
+@conditional_get('spending_log')
+def api_analytics_distribution():
+    """
+    Ticket size distribution (count, mean, median, p90, p99, histogram) overall,
+    per category and per month, merged from the monthly spending sketches.
+    ?start=YYYY-MM&end=YYYY-MM (default: the last 12 months), ?category=Food,Gas, ?bins=20
+    """
+    today = get_toronto_date()
+    start = request.args.get('start') or months_before(today, 11).strftime('%Y-%m')
+    end = request.args.get('end') or today.strftime('%Y-%m')
+    try:
+        for month in (start, end):
+            datetime.strptime(month, '%Y-%m')
+        bins = int(request.args.get('bins', 20))
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM and bins a number'}), 400
+    if start > end:
+        return jsonify({'error': 'start must not be after end'}), 400
+    if not 1 <= bins <= 100:
+        return jsonify({'error': 'bins must be between 1 and 100'}), 400
+    categories = [category.strip() for category in request.args.get('category', '').split(',') if category.strip()]
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    data = spending_distribution.distribution(cursor, start, end, categories, bins)
+    conn.close()
+    return jsonify(data)
+
+def activity_analytics_data(cursor, today):
+    """Activity stats, weekly patterns, streaks and insights from the activity bitmaps"""
+    activities = activity_bitmaps.get_bitmaps(cursor)
     
     # Overall activity statistics
-    cursor.execute('''
-        SELECT 
-            COUNT(*) as total_days,
-            SUM(gym) as gym_days,
-            SUM(jiu_jitsu) as jj_days,
-            SUM(skateboarding) as skate_days,
-            SUM(work) as work_days,
-            SUM(sauna) as sauna_days,
-            SUM(supplements) as supp_days,
-            SUM(coitus) as coitus_days,
-            SUM(smoking) as smoking_days,
-            SUM(drinking) as drinking_days
-        FROM personal_log
-    ''')
-    stats = cursor.fetchone()
+    counts = activities.counts()
     
     # Calculate percentages
-    total_days = stats['total_days'] if stats['total_days'] > 0 else 1
+    total_days = counts['tracked'] if counts['tracked'] > 0 else 1
     activity_stats = {
-        'total_days': stats['total_days'],
-        'gym_days': stats['gym_days'],
-        'jj_days': stats['jj_days'],
-        'skate_days': stats['skate_days'],
-        'work_days': stats['work_days'],
-        'sauna_days': stats['sauna_days'],
-        'supp_days': stats['supp_days'],
-        'coitus_days': stats['coitus_days'],
-        'smoking_days': stats['smoking_days'],
-        'drinking_days': stats['drinking_days'],
-        'gym_percentage': (stats['gym_days'] / total_days) * 100,
-        'jj_percentage': (stats['jj_days'] / total_days) * 100,
-        'work_percentage': (stats['work_days'] / total_days) * 100,
-        'smoking_percentage': (stats['smoking_days'] / total_days) * 100,
-        'drinking_percentage': (stats['drinking_days'] / total_days) * 100,
+        'total_days': counts['tracked'],
+        'gym_days': counts['gym'],
+        'jj_days': counts['jiu_jitsu'],
+        'skate_days': counts['skateboarding'],
+        'work_days': counts['work'],
+        'sauna_days': counts['sauna'],
+        'supp_days': counts['supplements'],
+        'coitus_days': counts['coitus'],
+        'smoking_days': counts['smoking'],
+        'drinking_days': counts['drinking'],
+        'gym_percentage': (counts['gym'] / total_days) * 100,
+        'jj_percentage': (counts['jiu_jitsu'] / total_days) * 100,
+        'work_percentage': (counts['work'] / total_days) * 100,
+        'smoking_percentage': (counts['smoking'] / total_days) * 100,
+        'drinking_percentage': (counts['drinking'] / total_days) * 100,
     }
     
     # Weekly activity patterns - now including coitus and supplements
-    today = get_toronto_date()
     twelve_weeks_ago = today - timedelta(weeks=12)
     
-    cursor.execute('''
-        SELECT 
-            date,
-            gym,
-            jiu_jitsu,
-            work,
-            skateboarding,
-            coitus,
-            supplements
-        FROM personal_log 
-        WHERE date >= ?
-        ORDER BY date
-    ''', (twelve_weeks_ago,))
-    
-    daily_results = cursor.fetchall()
-    
-    # Group by week manually to ensure proper data structure
-    weekly_data = {}
-    
-    for row in daily_results:
-        row_date = row['date']
-        if isinstance(row_date, str):
-            row_date = datetime.strptime(row_date, '%Y-%m-%d').date()
-        
-        # Calculate week number (ISO week)
-        year, week_num, _ = row_date.isocalendar()
-        week_key = f"{year}-W{week_num:02d}"
-        
-        if week_key not in weekly_data:
-            weekly_data[week_key] = {
-                'week_key': week_key,
-                'week_num': week_num,
-                'year': year,
-                'gym': 0,
-                'jiu_jitsu': 0,
-                'work': 0,
-                'skateboarding': 0,
-                'coitus': 0,
-                'supplements': 0,
-                'start_date': row_date
-            }
-        
-        # Sum up activities for the week
-        weekly_data[week_key]['gym'] += row['gym'] or 0
-        weekly_data[week_key]['jiu_jitsu'] += row['jiu_jitsu'] or 0
-        weekly_data[week_key]['work'] += row['work'] or 0
-        weekly_data[week_key]['skateboarding'] += row['skateboarding'] or 0
-        weekly_data[week_key]['coitus'] += row['coitus'] or 0
-        weekly_data[week_key]['supplements'] += row['supplements'] or 0
-    
-    # Convert to list and sort by date
-    weekly_patterns = list(weekly_data.values())
-    weekly_patterns.sort(key=lambda x: x['start_date'])
+    # Weeks that have any logged day, oldest first
+    weekly_patterns = activities.weekly_counts(
+        twelve_weeks_ago, names=['gym', 'jiu_jitsu', 'work', 'skateboarding', 'coitus', 'supplements'])
     
     # Format for chart display and limit to last 12 weeks
     weekly_patterns = weekly_patterns[-12:]
@@ -1428,42 +1317,18 @@ def api_activity_analytics():
             'supplements': week_data['supplements']
         })
     
-    # Calculate current streaks
-    cursor.execute('''
-        SELECT date, gym, jiu_jitsu, work
-        FROM personal_log 
-        ORDER BY date DESC 
-        LIMIT 30
-    ''')
-    recent_data = cursor.fetchall()
-    
-    # Calculate streaks
-    gym_streak = 0
-    jj_streak = 0
-    work_streak = 0
-    
-    for day in recent_data:
-        if day['gym']:
-            gym_streak += 1
-        else:
-            break
-    
-    for day in recent_data:
-        if day['jiu_jitsu']:
-            jj_streak += 1
-        else:
-            break
-            
-    for day in recent_data:
-        if day['work']:
-            work_streak += 1
-        else:
-            break
+    # Streaks over the full history - a day without a row breaks the streak
+    gym_streak = activities.current_streak('gym', today)
+    jj_streak = activities.current_streak('jiu_jitsu', today)
+    work_streak = activities.current_streak('work', today)
     
     streaks = {
         'gym_current': gym_streak,
         'jj_current': jj_streak,
-        'work_current': work_streak
+        'work_current': work_streak,
+        'gym_longest': activities.longest_streak('gym'),
+        'jj_longest': activities.longest_streak('jiu_jitsu'),
+        'work_longest': activities.longest_streak('work')
     }
     
     # Generate insights
@@ -1482,16 +1347,55 @@ def api_activity_analytics():
     if not insights:
         insights.append("Keep building those healthy habits!")
     
-    conn.close()
-    
-    return jsonify({
+    return {
         'activity_stats': activity_stats,
         'weekly_patterns': formatted_patterns,
         'streaks': streaks,
         'insights': insights
-    })
+    }
+
+@app.route('/api/analytics/activities')
+@conditional_get('personal_log', 'activity_types')
+def api_activity_analytics():
+    """API endpoint for detailed activity analytics"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    data = activity_analytics_data(cursor, get_toronto_date())
+    conn.close()
+    return jsonify(data)
+
+# Sections of /api/analytics/bundle: name -> builder(cursor, today)
+ANALYTICS_BUNDLE_FIELDS = {
+    'detailed': detailed_analytics_data,
+    'other_category': other_category_data,
+    'activities': activity_analytics_data,
+}
+
+@app.route('/api/analytics/bundle')
+@conditional_get('spending_log', 'personal_log', 'activity_types')
+def api_analytics_bundle():
+    """Every analytics page chart in one response - ?fields=detailed,activities selects a subset"""
+    requested = request.args.get('fields')
+    fields = [field.strip() for field in requested.split(',') if field.strip()] if requested else list(ANALYTICS_BUNDLE_FIELDS)
+    unknown = [field for field in fields if field not in ANALYTICS_BUNDLE_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}",
+                        'available': list(ANALYTICS_BUNDLE_FIELDS)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    today = get_toronto_date()
+
+    # The spending columns and activity bitmaps are memoized for the request,
+    # so each is loaded (or revalidated) once and shared by every section
+    bundle = {field: ANALYTICS_BUNDLE_FIELDS[field](cursor, today) for field in fields}
+
+    conn.close()
+    return jsonify(bundle)
+
 
 @app.route('/api/portfolio')
+@conditional_get('portfolio_log', 'etf_holdings')
 def api_portfolio():
     """API endpoint for portfolio performance data"""
     conn = get_db_connection()
@@ -1514,9 +1418,10 @@ def api_portfolio():
                 ELSE 0 
             END as profit_loss_percentage
         FROM portfolio_log 
-        WHERE date >= date('now', '-6 months') AND total_portfolio_value > 0
+        WHERE date >= ? AND total_portfolio_value > 0
         ORDER BY date
-    ''', (total_invested, total_invested, total_invested if total_invested > 0 else 1))
+    ''', (total_invested, total_invested, total_invested if total_invested > 0 else 1,
+          months_before(get_toronto_date(), 6)))
     portfolio_performance = [dict(row) for row in cursor.fetchall()]
     
     conn.close()
@@ -1614,6 +1519,7 @@ def update_budget():
     
     conn.commit()
     conn.close()
+    budget_periods.invalidate()
     
     flash(f'Budget updated to ${new_budget_float:.2f} for current period', 'success')
     return redirect(url_for('dashboard'))
@@ -1709,6 +1615,7 @@ def auto_update_portfolio():
     }), 501
 
 @app.route('/api/previous_spending')
+@conditional_get('spending_log', 'budget_periods')
 def api_previous_spending():
     """API endpoint for previous budget period spending data"""
     previous_period = get_previous_budget_period()
@@ -1846,14 +1753,7 @@ def savings():
     spending_period_choice = request.args.get('spending_period', 'current')
 
     # Get spending for CURRENT BUDGET PERIOD
-    cursor.execute('''
-        SELECT SUM(price) as total_spent
-        FROM spending_log
-        WHERE date >= ? AND date <= ?
-    ''', (period_start, period_end))
-
-    spending_result = cursor.fetchone()
-    current_spending = float(spending_result['total_spent']) if spending_result['total_spent'] else 0.0
+    current_spending = get_spending_total(cursor, period_start, period_end)
 
     # Get previous period data
     previous_period = get_previous_budget_period()
@@ -2087,14 +1987,7 @@ def calculate_savings():
                 spending_period_label = "Previous Period (none available)"
         else:
             # Get current period spending
-            cursor.execute('''
-                SELECT SUM(price) as total_spent
-                FROM spending_log
-                WHERE date >= ? AND date <= ?
-            ''', (period_start, period_end))
-
-            spending_result = cursor.fetchone()
-            selected_spending = float(spending_result['total_spent']) if spending_result['total_spent'] else 0.0
+            selected_spending = get_spending_total(cursor, period_start, period_end)
             spending_period_label = f"Current Period ({period_start} to {period_end})"
         
         # Get fixed expenses from database for the selected period
@@ -2239,6 +2132,7 @@ def override_pay_period():
 
         conn.commit()
         conn.close()
+        budget_periods.invalidate()
 
         period_text = "1st half" if new_period_type == 1 else "2nd half"
         flash(f'Pay period manually set to {period_text}', 'success')
@@ -2805,7 +2699,7 @@ def fetch_financial_context():
                 detailed_transactions = []
 
                 for row in spending_data:
-                    cat = row['category'] or 'Uncategorized'
+                    cat = row['category'] or categorize(row['item'])
                     spending_by_category[cat] = spending_by_category.get(cat, 0) + float(row['price'])
                     date_str = str(row['date'])
                     detailed_transactions.append(f"{date_str}: {row['item']} - ${float(row['price']):.2f} ({cat})")
@@ -2835,54 +2729,31 @@ DETAILED TRANSACTION LOG (Complete History - Most Recent First):
         # 2. Personal Activities (ALL historical data for complete analysis)
         try:
             cursor.execute('''
-                SELECT date, gym, jiu_jitsu, skateboarding, work, coitus,
-                       sauna, supplements, notes
+                SELECT date, activities, notes
                 FROM personal_log
                 ORDER BY date DESC
             ''')
             personal_data = cursor.fetchall()
 
             if personal_data:
-                activity_counts = {
-                    'gym': 0, 'jiu_jitsu': 0, 'skateboarding': 0, 'work': 0,
-                    'coitus': 0, 'sauna': 0, 'supplements': 0
-                }
+                registry = get_activities(cursor)
+                activity_counts = {activity['name']: 0 for activity in registry}
 
                 # Build detailed activity log with dates
                 activity_details = []
-                jj_dates = []
-                gym_dates = []
-                skateboarding_dates = []
+                activity_dates = {'gym': [], 'jiu_jitsu': [], 'skateboarding': []}
 
                 for row in personal_data:
                     # Convert date to string for display
                     date_str = str(row['date'])
                     day_activities = []
 
-                    if row['gym']:
-                        activity_counts['gym'] += 1
-                        day_activities.append('Gym')
-                        gym_dates.append(date_str)
-                    if row['jiu_jitsu']:
-                        activity_counts['jiu_jitsu'] += 1
-                        day_activities.append('Jiu Jitsu')
-                        jj_dates.append(date_str)
-                    if row['skateboarding']:
-                        activity_counts['skateboarding'] += 1
-                        day_activities.append('Skateboarding')
-                        skateboarding_dates.append(date_str)
-                    if row['work']:
-                        activity_counts['work'] += 1
-                        day_activities.append('Work')
-                    if row['sauna']:
-                        activity_counts['sauna'] += 1
-                        day_activities.append('Sauna')
-                    if row['supplements']:
-                        activity_counts['supplements'] += 1
-                        day_activities.append('Supplements')
-                    if row['coitus']:
-                        activity_counts['coitus'] += 1
-                        day_activities.append('Coitus')
+                    for activity in registry:
+                        if (row['activities'] >> activity['bit']) & 1:
+                            activity_counts[activity['name']] += 1
+                            day_activities.append(activity['label'])
+                            if activity['name'] in activity_dates:
+                                activity_dates[activity['name']].append(date_str)
 
                     if day_activities or row['notes']:
                         activity_line = f"{date_str}: {', '.join(day_activities)}"
@@ -2902,25 +2773,19 @@ PERSONAL ACTIVITIES DATABASE (Complete History):
 DATE RANGE: {earliest_date} to {latest_date} ({total_days} days of records)
 
 LIFETIME TOTALS:
-- Gym Sessions: {activity_counts['gym']} times
-- Jiu Jitsu Sessions: {activity_counts['jiu_jitsu']} times
-- Skateboarding Sessions: {activity_counts['skateboarding']} times
-- Work Days: {activity_counts['work']} days
-- Coitus: {activity_counts['coitus']} times
-- Sauna Sessions: {activity_counts['sauna']} times
-- Supplements Taken: {activity_counts['supplements']} days
+{chr(10).join(f"- {activity['label']}: {activity_counts[activity['name']]} days" for activity in registry)}
 
 DETAILED ACTIVITY LOG (Complete History - Most Recent First):
 {chr(10).join(activity_details)}
 
 ALL JIU JITSU DATES (Complete List - for analyzing patterns):
-{', '.join(jj_dates) if jj_dates else 'No jiu jitsu sessions recorded'}
+{', '.join(activity_dates['jiu_jitsu']) if activity_dates['jiu_jitsu'] else 'No jiu jitsu sessions recorded'}
 
 ALL GYM DATES (Complete List - for analyzing patterns):
-{', '.join(gym_dates) if gym_dates else 'No gym sessions recorded'}
+{', '.join(activity_dates['gym']) if activity_dates['gym'] else 'No gym sessions recorded'}
 
 ALL SKATEBOARDING DATES (Complete List):
-{', '.join(skateboarding_dates) if skateboarding_dates else 'No skateboarding sessions recorded'}
+{', '.join(activity_dates['skateboarding']) if activity_dates['skateboarding'] else 'No skateboarding sessions recorded'}
 """)
             else:
                 context_parts.append("\nPERSONAL ACTIVITIES: No activity records found\n")
@@ -3061,5 +2926,14 @@ SAVINGS CONFIGURATION:
         return f"CRITICAL ERROR fetching data: {str(e)}. Check server logs for details."
 
 if __name__ == '__main__':
+    # Report the SQLite settings connections will run with
+    db.check_settings()
+    # Bring indexes and derived tables up to date before serving
+    migration_conn = db.connect()
+    db.apply_schema_migrations(migration_conn)
+    migration_conn.close()
+    # Resized wallpapers and palette icons, then .br/.gz variants of /img and /favicon_io files
+    image_variants.generate_variants()
+    precompress_static()
     # Add pytz to requirements
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Fingerprinted Static Assets
+===========================
+Serves everything under static/ (the shared CSS/JS bundles and the pinned
+vendor copies of Bootstrap, Font Awesome and Chart.js) at content-hashed
+URLs:
+
+    <link href="{{ asset_url('css/app.css') }}" rel="stylesheet">
+    -> /assets/css/app.3f9a1c2b7d4e.css
+
+Since a file's URL changes whenever its contents do, responses carry
+Cache-Control: immutable with a one year max-age and browsers never ask
+again - after the first visit only the page HTML is downloaded. url()
+references inside CSS (Font Awesome's webfonts) are rewritten to the hashed
+names too, so a changed font also changes the stylesheet's hash.
+
+The manifest is built once at startup, with each compressible asset's
+brotli/gzip variant made up front. In debug mode it is rebuilt whenever a
+file under static/ changes.
+"""
+
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+
+from flask import Response, abort, current_app, request
+
+from compression import COMPRESSIBLE_TYPES, choose_encoding, compressed_variants
+
+ASSET_DIR = 'static'
+URL_PREFIX = '/assets/'
+
+# Length of the content hash put in file names
+HASH_LENGTH = 12
+
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+class Asset:
+    """One fingerprinted file: its hashed URL, body and pre-compressed variants"""
+
+    def __init__(self, path, body):
+        self.path = path
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+        stem, ext = posixpath.splitext(path)
+        self.hashed_path = f'{stem}.{self.digest}{ext}'
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.variants = compressed_variants(body) if self.mimetype in COMPRESSIBLE_TYPES else {}
+
+    @property
+    def url(self):
+        return URL_PREFIX + self.hashed_path
+
+
+def _rewrite_css_urls(css, path, assets):
+    """Point the relative url()s of the stylesheet at path to their hashed names"""
+    def replace(match):
+        quote, target = match.groups()
+        if target.startswith(('data:', '#', '/')) or '://' in target:
+            return match.group(0)
+        bare = re.split(r'[?#]', target, maxsplit=1)[0]
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(path), bare))
+        asset = assets.get(resolved)
+        if asset is None:
+            return match.group(0)
+        suffix = target[len(bare):]
+        return f'url({quote}{asset.url}{suffix}{quote})'
+    return CSS_URL.sub(replace, css)
+
+
+def build_manifest(root):
+    """{path relative to root: Asset} for every file under root"""
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            files[os.path.relpath(full_path, root).replace(os.sep, '/')] = full_path
+
+    assets = {}
+    # Stylesheets last, so the files they reference already have their hashes
+    for path in sorted(files, key=lambda p: (p.endswith('.css'), p)):
+        with open(files[path], 'rb') as f:
+            body = f.read()
+        if path.endswith('.css'):
+            body = _rewrite_css_urls(body.decode('utf-8'), path, assets).encode('utf-8')
+        assets[path] = Asset(path, body)
+    return assets
+
+
+def _latest_mtime(root):
+    return max((os.path.getmtime(os.path.join(dirpath, filename))
+                for dirpath, _, filenames in os.walk(root) for filename in filenames), default=0)
+
+
+class AssetManifest:
+    """The current manifest, plus a lookup by hashed path"""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        self.built_at = _latest_mtime(self.root)
+        self.assets = build_manifest(self.root)
+        self.by_hashed_path = {asset.hashed_path: asset for asset in self.assets.values()}
+
+    def _refresh(self):
+        if current_app.debug and _latest_mtime(self.root) != self.built_at:
+            with self._lock:
+                if _latest_mtime(self.root) != self.built_at:
+                    self._load()
+
+    def url(self, path):
+        self._refresh()
+        return self.assets[path].url
+
+    def find(self, hashed_path):
+        self._refresh()
+        return self.by_hashed_path.get(hashed_path)
+
+
+def serve_asset(hashed_path):
+    """Response for a hashed asset path, with its best pre-compressed variant"""
+    asset = current_app.extensions['assets'].find(hashed_path)
+    if asset is None:
+        abort(404)
+
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'), list(asset.variants)) if asset.variants else None
+    response = Response(asset.variants[encoding] if encoding else asset.body, mimetype=asset.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if asset.variants:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    response.set_etag(f'{asset.digest}-{encoding}' if encoding else asset.digest)
+    return response.make_conditional(request)
+
+
+def init_app(app):
+    manifest = AssetManifest(os.path.join(app.root_path, ASSET_DIR))
+    app.extensions['assets'] = manifest
+    app.add_url_rule(URL_PREFIX + '<path:hashed_path>', 'assets', serve_asset)
+    app.jinja_env.globals['asset_url'] = manifest.url
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Spending Category Backfill
+==========================
+Fills spending_log.category for rows written before categories were
+assigned at write time. Each distinct item is categorized once and
+written back with a single executemany.
+
+Usage:
+    python backfill_categories.py          # only rows with no category
+    python backfill_categories.py --all    # re-run the rules on every row
+"""
+
+import sqlite3
+import sys
+
+from categorizer import categorize
+
+DB_PATH = 'finance_tracker.db'
+
+
+def backfill_categories(conn, recategorize=False):
+    """Assign categories to spending rows, returns the number of rows updated"""
+    cursor = conn.cursor()
+    where = '' if recategorize else 'WHERE category IS NULL'
+    cursor.execute(f'SELECT DISTINCT item FROM spending_log {where}')
+    items = [row[0] for row in cursor.fetchall()]
+    if not items:
+        return 0
+
+    cursor.executemany(f'''
+        UPDATE spending_log
+        SET category = ?
+        WHERE item = ? {'AND category IS NULL' if not recategorize else ''}
+    ''', [(categorize(item), item) for item in items])
+    updated = cursor.rowcount
+    conn.commit()
+    return updated
+
+
+if __name__ == '__main__':
+    recategorize = '--all' in sys.argv
+    conn = sqlite3.connect(DB_PATH)
+    updated = backfill_categories(conn, recategorize)
+
+    print(f"✅ Categorized {updated} spending records")
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT category, COUNT(*) as count, SUM(price) as total
+        FROM spending_log
+        GROUP BY category
+        ORDER BY total DESC
+    ''')
+    for category, count, total in cursor.fetchall():
+        print(f"   {category}: {count} items, ${total:.2f}")
+    conn.close()
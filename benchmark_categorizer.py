@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Categorizer Benchmark
+=====================
+Compares per-item classification cost of the compiled matcher in
+categorizer.py against the CASE/LOWER(item) LIKE chain the analytics
+queries used to evaluate on every request, and checks both agree.
+
+Items come from finance_tracker.db (opened read-only) padded out with
+synthetic merchant names.
+
+Usage: python benchmark_categorizer.py [--rows 100000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+import categorizer
+from categorizer import CATEGORY_RULES, OTHER, categorize
+
+DB_PATH = 'finance_tracker.db'
+
+
+def like_case_sql(rules):
+    """The old CASE WHEN LOWER(item) LIKE '%...%' chain, built from the same rule table"""
+    branches = []
+    for category, keywords in rules:
+        condition = ' OR '.join(f"LOWER(item) LIKE '%{keyword}%'" for keyword in keywords)
+        branches.append(f"WHEN {condition} THEN '{category}'")
+    return f"CASE {' '.join(branches)} ELSE '{OTHER}' END"
+
+
+def load_items(rows):
+    items = []
+    if os.path.exists(DB_PATH):
+        conn = sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True)
+        items = [row[0] for row in conn.execute('SELECT item FROM spending_log')]
+        conn.close()
+
+    synthetic = ['Tim Hortons', 'Esso Gas', 'LCBO wine', 'Osmows', 'Dollarama', 'Fit4less',
+                 'Car Wash', 'Pizza Pizza', 'Amazon', 'Groceries', 'Coffee Culture', 'Dispo']
+    while len(items) < rows:
+        items.append(f"{random.choice(synthetic)} {random.randint(1, 500)}")
+    return items[:rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-item categorization cost: compiled matcher vs LIKE chain')
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    items = load_items(args.rows)
+    print("📊 Categorizer Benchmark")
+    print("=" * 50)
+    print(f"   {len(items)} items, {len(set(items))} distinct")
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE spending_log (id INTEGER PRIMARY KEY, item TEXT)')
+    conn.executemany('INSERT INTO spending_log (item) VALUES (?)', [(item,) for item in items])
+
+    began = time.perf_counter()
+    sql_categories = [row[0] for row in conn.execute(
+        f'SELECT {like_case_sql(CATEGORY_RULES)} FROM spending_log ORDER BY id')]
+    like_seconds = time.perf_counter() - began
+
+    uncached = categorizer._categorize_normalized.__wrapped__
+    began = time.perf_counter()
+    for item in items:
+        uncached(categorizer.normalize_item(item))
+    uncached_seconds = time.perf_counter() - began
+
+    categorizer._categorize_normalized.cache_clear()
+    began = time.perf_counter()
+    py_categories = [categorize(item) for item in items]
+    cached_seconds = time.perf_counter() - began
+
+    mismatches = [(item, a, b) for item, a, b in zip(items, sql_categories, py_categories) if a != b]
+
+    for label, seconds in (('SQLite LIKE chain', like_seconds),
+                           ('compiled regex (no cache)', uncached_seconds),
+                           ('compiled regex + LRU cache', cached_seconds)):
+        print(f"   {label}: {seconds * 1e6 / len(items):.2f}µs per item ({seconds * 1000:.1f}ms total)")
+
+    if mismatches:
+        print(f"\n❌ {len(mismatches)} items categorized differently:")
+        for item, a, b in mismatches[:20]:
+            print(f"   {item!r}: LIKE={a} regex={b}")
+    else:
+        print("\n✅ Compiled matcher agrees with the LIKE chain on every item")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Dashboard Render Benchmark
+==========================
+Builds a multi-year synthetic database (schema copied from
+finance_tracker.db, which is opened read-only) and measures, per dashboard
+render, how many SQL statements run and how long they take:
+- the old six-statement dashboard query set
+- dashboard_data.load_dashboard_data()
+- a full GET / through the Flask test client
+
+Usage: python benchmark_dashboard.py [--years 6] [--per-day 8] [--renders 200]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+import db
+from dashboard_data import load_dashboard_data
+
+SOURCE_DB = 'finance_tracker.db'
+ITEMS = ['TIMS', 'Gas', 'LCBO', 'McDonalds', 'Groceries', 'Dominos', 'Car Wash',
+         'Coffee', 'Osmows', 'Gym membership', 'Gift', 'Arbys', 'Pizza', 'Dispo']
+
+
+def copy_schema(path):
+    source = sqlite3.connect(f'file:{SOURCE_DB}?mode=ro', uri=True)
+    statements = [row[0] for row in source.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND sql IS NOT NULL "
+        "AND name NOT LIKE 'sqlite_%' AND name NOT IN ('spending_daily', 'table_versions')")]
+    source.close()
+
+    conn = sqlite3.connect(path)
+    for statement in statements:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+
+def build_database(path, years, per_day):
+    conn = copy_schema(path)
+    end = date.today()
+    start = end - timedelta(days=365 * years)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    spending = []
+    for day in days:
+        for _ in range(random.randint(0, per_day * 2)):
+            spending.append((day.isoformat(), random.choice(ITEMS), round(random.uniform(2, 80), 2)))
+    conn.executemany('INSERT INTO spending_log (date, item, price) VALUES (?, ?, ?)', spending)
+
+    # The source schema may be from before or after the activities mask (see setup_activities.py)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(personal_log)')]
+    if 'activities' in columns:
+        conn.executemany('INSERT INTO personal_log (date, activities) VALUES (?, ?)',
+                         [(day.isoformat(), random.getrandbits(7)) for day in days])
+    else:
+        conn.executemany('''
+            INSERT INTO personal_log (date, gym, jiu_jitsu, skateboarding, work, coitus, sauna, supplements)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(day.isoformat(), *[random.randint(0, 1) for _ in range(7)]) for day in days])
+
+    periods = []
+    period_start = start
+    while period_start <= end + timedelta(days=14):
+        period_end = period_start + timedelta(days=13)
+        periods.append((period_start.isoformat(), period_end.isoformat(), 1000))
+        period_start = period_end + timedelta(days=1)
+    conn.executemany('INSERT INTO budget_periods (start_date, end_date, budget_amount) VALUES (?, ?, ?)', periods)
+    conn.commit()
+    conn.close()
+
+    conn = db.connect(path)
+    db.apply_schema_migrations(conn)
+    conn.close()
+    return len(spending), len(days)
+
+
+def legacy_dashboard_queries(cursor, budget_period, today):
+    """The statements the dashboard route ran before dashboard_data.py"""
+    thirty_days_ago = today - timedelta(days=30)
+    cursor.execute('SELECT SUM(total) FROM spending_daily WHERE date BETWEEN ? AND ?',
+                   (budget_period['start_date'], budget_period['end_date']))
+    cursor.fetchone()
+    cursor.execute('''
+        SELECT SUM(gym), SUM(jiu_jitsu), SUM(skateboarding), SUM(work), SUM(coitus),
+               SUM(sauna), SUM(supplements), COUNT(*)
+        FROM personal_log WHERE date >= ?
+    ''', (thirty_days_ago,))
+    cursor.fetchone()
+    cursor.execute('''
+        SELECT SUM(gym), SUM(jiu_jitsu), SUM(skateboarding), SUM(work), SUM(coitus),
+               SUM(sauna), SUM(supplements), COUNT(*)
+        FROM personal_log
+    ''')
+    cursor.fetchone()
+    cursor.execute('''
+        SELECT item, SUM(price) as total, COUNT(*) as frequency, MAX(date) as last_purchase
+        FROM spending_log WHERE date >= ?
+        GROUP BY item ORDER BY total DESC LIMIT 10
+    ''', (thirty_days_ago,))
+    cursor.fetchall()
+    cursor.execute('SELECT item, price, date FROM spending_log ORDER BY date DESC, id DESC LIMIT 10')
+    cursor.fetchall()
+
+
+def measure(label, render, statements, renders):
+    timings = []
+    counts = []
+    for _ in range(renders):
+        before = statements[0]
+        began = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - began) * 1000)
+        counts.append(statements[0] - before)
+    print(f"\n{label}:")
+    print(f"   statements/render: {statistics.mean(counts):.1f}")
+    print(f"   wall time p50: {statistics.median(timings):.2f}ms  "
+          f"mean: {statistics.mean(timings):.2f}ms  max: {max(timings):.2f}ms")
+
+
+def count_statements(conn, statements):
+    def trace(sql):
+        # Only count what the code issued, not the BEGIN/COMMIT sqlite3 adds
+        if not sql.lstrip().upper().startswith(('BEGIN', 'COMMIT', 'ROLLBACK', 'PRAGMA')):
+            statements[0] += 1
+    conn.set_trace_callback(trace)
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Statements and wall time per dashboard render')
+    parser.add_argument('--years', type=int, default=6)
+    parser.add_argument('--per-day', type=int, default=8)
+    parser.add_argument('--renders', type=int, default=200)
+    args = parser.parse_args()
+
+    print("📊 Dashboard Render Benchmark")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        rows, days = build_database(path, args.years, args.per_day)
+        print(f"Synthetic data: {rows} spending rows, {days} personal_log days")
+
+        statements = [0]
+        conn = count_statements(db.connect(path), statements)
+        cursor = conn.cursor()
+        today = date.today()
+        cursor.execute('SELECT * FROM budget_periods WHERE ? BETWEEN start_date AND end_date', (today.isoformat(),))
+        budget_period = cursor.fetchone()
+
+        measure('Old dashboard queries', lambda: legacy_dashboard_queries(cursor, budget_period, today),
+                statements, args.renders)
+        measure('load_dashboard_data()', lambda: load_dashboard_data(cursor, budget_period, today),
+                statements, args.renders)
+        conn.close()
+
+        # Full page render through the app, against the synthetic database
+        from app import app
+        db.pool.clear()
+        db.pool.db_path = path
+        connect = db.pool._connect
+        db.pool._connect = lambda: count_statements(connect(), statements)
+        client = app.test_client()
+        measure('GET / (full render)', lambda: client.get('/'), statements, args.renders)
+        db.pool.clear()
+
+
+if __name__ == '__main__':
+    main()
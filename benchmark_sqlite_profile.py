@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+SQLite Profile Benchmark
+========================
+Measures dashboard-style reader latency while a writer keeps committing
+spending rows, once with stock SQLite settings and once with the
+performance pragma profile from db.py.
+
+Runs against a synthetic database in a temp directory - finance_tracker.db
+is never touched.
+
+Usage: python benchmark_sqlite_profile.py [--rows 50000] [--seconds 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import db
+
+
+def build_database(path, rows):
+    conn = db.connect(path, profile='default')
+    conn.execute('''
+        CREATE TABLE spending_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE NOT NULL,
+            item TEXT NOT NULL,
+            price DECIMAL(10,2) NOT NULL,
+            category TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    start = date(2020, 1, 1)
+    items = ['TIMS', 'Gas', 'LCBO', 'McDonalds', 'Groceries', 'Dominos', 'Car Wash']
+    conn.executemany('INSERT INTO spending_log (date, item, price) VALUES (?, ?, ?)', [
+        ((start + timedelta(days=i % 2000)).isoformat(), random.choice(items), round(random.uniform(2, 80), 2))
+        for i in range(rows)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def run(path, profile, seconds):
+    stop = threading.Event()
+    writes = [0]
+
+    def writer():
+        conn = db.connect(path, profile=profile)
+        while not stop.is_set():
+            # Hold the write transaction open for a bit like a multi-item add would
+            conn.execute('INSERT INTO spending_log (date, item, price) VALUES (?, ?, ?)',
+                         (date.today().isoformat(), 'TIMS', 2.25))
+            time.sleep(0.002)
+            conn.commit()
+            writes[0] += 1
+        conn.close()
+
+    latencies = []
+    errors = 0
+    reader = db.connect(path, profile=profile)
+    thread = threading.Thread(target=writer)
+    thread.start()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        began = time.perf_counter()
+        try:
+            reader.execute('SELECT SUM(price) FROM spending_log WHERE date BETWEEN ? AND ?',
+                           ('2023-01-01', '2023-01-14')).fetchone()
+        except Exception:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - began) * 1000)
+    stop.set()
+    thread.join()
+    reader.close()
+
+    latencies.sort()
+    return {
+        'reads': len(latencies),
+        'writes': writes[0],
+        'errors': errors,
+        'p50': statistics.median(latencies) if latencies else 0,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] if latencies else 0,
+        'max': latencies[-1] if latencies else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reader latency during writes, with and without the pragma profile')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    print("📊 SQLite Profile Benchmark")
+    print("=" * 50)
+    for profile in ('default', 'performance'):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            build_database(path, args.rows)
+            result = run(path, profile, args.seconds)
+        print(f"\n{profile}:")
+        print(f"   reads: {result['reads']}  writes: {result['writes']}  errors: {result['errors']}")
+        print(f"   read latency p50: {result['p50']:.2f}ms  p99: {result['p99']:.2f}ms  max: {result['max']:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Budget Period Lookups
+=====================
+Keeps budget_periods in memory as a sorted interval index so "current",
+"previous" and "period containing date X" are bisect lookups instead of
+range queries.
+
+The index is shared across requests and rebuilt only when the
+budget_periods change counter (see setup_table_versions.py) moves. Within a
+request the counter is read once and the index is memoized on flask.g.
+
+Also home to the pay period (1st/2nd half) classification.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+
+from flask import g, has_app_context
+
+from setup_table_versions import get_table_version
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def _days_after_15th_through(day):
+    """
+    Days with day-of-month > 15 from a fixed epoch up to and including day.
+    Every full month before day's month contributes (days_in_month - 15), and
+    the sum of days_in_month over those months is just the ordinal of the
+    first of day's month - so no per-day or per-month loop is needed.
+    """
+    first_of_month = day.replace(day=1)
+    month_index = day.year * 12 + day.month - 1
+    return first_of_month.toordinal() - 15 * month_index + max(0, day.day - 15)
+
+
+def determine_pay_period_type(start_date, end_date):
+    """
+    Determine if a budget period is first or second half based on the logic:
+    - If most days in budget period fall after the 15th → second period (2)
+    - If most days fall before 15th → first period (1)
+    """
+    if isinstance(start_date, str):
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+    total_days = (end_date - start_date).days + 1
+    days_after_15th = max(0, _days_after_15th_through(end_date)
+                          - _days_after_15th_through(start_date)
+                          + (1 if start_date.day > 15 else 0))
+
+    return 2 if days_after_15th > (total_days / 2) else 1
+
+
+class BudgetPeriodIndex:
+    """Sorted interval index over budget_periods rows"""
+
+    def __init__(self, rows, version):
+        self.version = version
+
+        # Ordered by start date for "containing" lookups
+        self.by_start = sorted(rows, key=lambda row: (row['start_date'], row['id']))
+        self.starts = [row['start_date'] for row in self.by_start]
+        # Running max of end_date lets the backward walk stop as soon as no
+        # earlier period can still reach the date
+        self.max_end = []
+        running = ''
+        for row in self.by_start:
+            running = max(running, row['end_date'])
+            self.max_end.append(running)
+
+        # Ordered by end date for "previous" lookups
+        self.by_end = sorted(rows, key=lambda row: (row['end_date'], row['id']))
+        self.ends = [row['end_date'] for row in self.by_end]
+
+    def containing(self, day):
+        """Period covering day (latest start wins if periods overlap), or None"""
+        day = _iso(day)
+        i = bisect_right(self.starts, day) - 1
+        while i >= 0 and self.max_end[i] >= day:
+            if self.by_start[i]['end_date'] >= day:
+                return self.by_start[i]
+            i -= 1
+        return None
+
+    def ending_before(self, day):
+        """Latest period that ended strictly before day, or None"""
+        i = bisect_left(self.ends, _iso(day))
+        return self.by_end[i - 1] if i > 0 else None
+
+    def previous(self, period):
+        """Period that ended before the given one started"""
+        return self.ending_before(period['start_date']) if period else None
+
+
+_cache = {'index': None}
+_cache_lock = threading.Lock()
+
+
+def load_index(cursor):
+    """Return the shared index, rebuilding it if budget_periods changed since it was built"""
+    version = get_table_version(cursor, 'budget_periods')
+    index = _cache['index']
+    if index is not None and index.version == version:
+        return index
+
+    cursor.execute('SELECT * FROM budget_periods')
+    index = BudgetPeriodIndex(cursor.fetchall(), version)
+    with _cache_lock:
+        _cache['index'] = index
+    return index
+
+
+def get_index(cursor):
+    """Index for the current request - the version is only checked once per request"""
+    if not has_app_context():
+        return load_index(cursor)
+
+    index = g.get('_budget_period_index')
+    if index is None:
+        index = load_index(cursor)
+        g._budget_period_index = index
+    return index
+
+
+def invalidate():
+    """Forget the request's memoized index after budget_periods was written"""
+    if has_app_context():
+        g.pop('_budget_period_index', None)
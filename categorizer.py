@@ -0,0 +1,78 @@
+"""
+Spending Categorization
+=======================
+Maps a free-text spending item to a category. Categories are assigned once
+when a row is written (add/edit spending, Excel migrations, backfill) and
+stored in spending_log.category, so analytics can GROUP BY the column.
+
+The rule table is compiled into one alternation regex. Alternatives are
+ordered by rule priority and wrapped in a lookahead, so a single pass finds
+the highest-priority keyword starting at every position; the lowest rule
+index over the whole string is the first rule that matches - the same
+answer the old ordered CASE/LIKE chain gave. Results are cached per
+normalized item string since the same merchants come up over and over.
+"""
+
+import re
+from functools import lru_cache
+
+OTHER = 'Other'
+
+# Checked in order, first keyword hit wins. 'Coffee (Other)' used to exclude
+# items containing 'tim' - TIMS is checked first so that falls out of the order.
+CATEGORY_RULES = [
+    ('TIMS', ['tim', 'tims']),
+    ('Coffee (Other)', ['coffee']),
+    ('Gas', ['gas', 'fuel', 'petro']),
+    ('Dispo', ['dispo', 'cannabis', 'weed', 'dispensary']),
+    ('LCBO', ['lcbo', 'alcohol', 'beer', 'wine', 'liquor']),
+    ('McDonalds', ['mcdonald', 'mcds']),
+    ('Dominos', ['domino']),
+    ('Wendys', ['wendys']),
+    ('Osmows/Shawarma', ['osmow', 'shawarma']),
+    ('Arbys', ['arbys']),
+    ('Food (Other)', ['food', 'restaurant', 'pizza', 'taco', 'burger']),
+    ('Fitness', ['gym', 'fit', 'workout']),
+    ('Gifts', ['gift']),
+    ('Car Care', ['wash', 'car']),
+]
+
+CATEGORIES = [category for category, _ in CATEGORY_RULES] + [OTHER]
+
+
+def _compile_rules(rules):
+    """Build the matcher regex and a keyword -> rule index lookup"""
+    priority = {}
+    for index, (_, keywords) in enumerate(rules):
+        for keyword in keywords:
+            priority.setdefault(keyword, index)
+
+    # Longer keywords first within the same rule so 'tims' isn't cut short by 'tim'
+    ordered = sorted(priority, key=lambda keyword: (priority[keyword], -len(keyword)))
+    pattern = re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in ordered) + '))')
+    return pattern, priority
+
+
+_PATTERN, _PRIORITY = _compile_rules(CATEGORY_RULES)
+
+
+def normalize_item(item):
+    """Lowercase and collapse whitespace - the cache key for categorize()"""
+    return ' '.join((item or '').lower().split())
+
+
+@lru_cache(maxsize=8192)
+def _categorize_normalized(text):
+    best = None
+    for match in _PATTERN.finditer(text):
+        index = _PRIORITY[match.group(1)]
+        if best is None or index < best:
+            best = index
+            if best == 0:
+                break
+    return CATEGORY_RULES[best][0] if best is not None else OTHER
+
+
+def categorize(item):
+    """Return the category for a spending item"""
+    return _categorize_normalized(normalize_item(item))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Check
+===========================
+Runs EXPLAIN QUERY PLAN on every SQL statement in app.py (and the query
+modules it uses) and fails if a hot table is read with a full table scan.
+
+The plans are taken against an in-memory copy of finance_tracker.db with
+the schema migrations applied, so the planner sees real table statistics.
+The database file itself is opened read-only and never modified.
+
+Usage: python check_query_plans.py [--verbose]
+Exit code is 1 if any statement regresses to a full scan.
+"""
+
+import ast
+import re
+import sqlite3
+import sys
+
+import db
+
+SOURCES = ['app.py', 'dashboard_data.py']
+
+# Tables that grow with daily use - a full scan of these is a regression
+HOT_TABLES = {
+    'spending_log', 'personal_log', 'portfolio_log', 'stock_market_values',
+    'ai_messages', 'ai_conversations', 'budget_periods',
+}
+
+# Statements that read the whole history on purpose: (function, table) -> reason
+ALLOWED_FULL_SCANS = {
+    ('fetch_financial_context', 'spending_log'): 'AI context includes the full history',
+    ('fetch_financial_context', 'personal_log'): 'AI context includes the full history',
+}
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+INDEX_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)? USING (?:COVERING )?INDEX ')
+
+
+def extract_statements(path):
+    """Yield (function, line, sql) for every literal SQL string passed to execute()"""
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+
+    def visit(node, function):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                yield from visit(child, child.name)
+                continue
+            if (isinstance(child, ast.Call)
+                    and isinstance(child.func, ast.Attribute)
+                    and child.func.attr in ('execute', 'executemany')
+                    and child.args
+                    and isinstance(child.args[0], ast.Constant)
+                    and isinstance(child.args[0].value, str)):
+                yield function, child.lineno, child.args[0].value
+            yield from visit(child, function)
+
+    yield from visit(tree, '<module>')
+
+
+def build_plan_database():
+    """In-memory copy of the live database with all migrations applied"""
+    source = sqlite3.connect(f'file:{db.DB_PATH}?mode=ro', uri=True)
+    conn = sqlite3.connect(':memory:')
+    source.backup(conn)
+    source.close()
+    db.apply_schema_migrations(conn)
+    conn.execute('ANALYZE')
+    return conn
+
+
+def full_scans(conn, sql):
+    """Return the hot tables this statement reads with a full table scan"""
+    names = re.findall(r'(?<!:):(\w+)', sql)
+    params = dict.fromkeys(names) if names else [None] * sql.count('?')
+    plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    # Walking a whole index only to re-sort it is as bad as scanning the table
+    sorts_everything = any('TEMP B-TREE FOR' in row[3] and 'ORDER BY' in row[3] for row in plan)
+
+    scans = []
+    for row in plan:
+        match = FULL_SCAN.match(row[3]) or (sorts_everything and INDEX_SCAN.match(row[3]))
+        if match and match.group(1) in HOT_TABLES:
+            scans.append(match.group(1))
+    return scans, plan
+
+
+def main():
+    verbose = '--verbose' in sys.argv
+    conn = build_plan_database()
+
+    print(f"🔍 Checking query plans in {', '.join(SOURCES)}")
+    print("=" * 50)
+
+    checked = 0
+    failures = []
+    statements = [(path, function, line, sql) for path in SOURCES
+                  for function, line, sql in extract_statements(path)]
+    for path, function, line, sql in statements:
+        statement = sql.strip()
+        if not statement or statement.split()[0].upper() in ('PRAGMA', 'CREATE', 'DROP', 'ALTER'):
+            continue
+        try:
+            scans, plan = full_scans(conn, statement)
+        except sqlite3.Error as e:
+            failures.append((path, function, line, f'could not plan: {e}'))
+            continue
+        checked += 1
+
+        for table in scans:
+            if (function, table) in ALLOWED_FULL_SCANS:
+                continue
+            failures.append((path, function, line, f'full scan of {table}'))
+
+        if verbose:
+            print(f"\n{function} ({path}:{line})")
+            for row in plan:
+                print(f"   {row[3]}")
+
+    print(f"\n📊 Checked {checked} statements")
+    if failures:
+        print(f"\n❌ {len(failures)} hot queries without an index:")
+        for path, function, line, problem in failures:
+            print(f"   {path}:{line} {function}: {problem}")
+        return 1
+
+    print("✅ No hot query falls back to a full table scan")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Response Compression
+====================
+CompressionMiddleware wraps the WSGI app and compresses HTML, JSON, CSS and
+JS responses with brotli or gzip, whichever the client prefers in
+Accept-Encoding (brotli wins ties). Responses under MIN_SIZE bytes,
+streamed files and responses that already carry a Content-Encoding are
+passed through untouched.
+
+Static files under /img and /favicon_io are compressed once instead of per
+request: precompress_static() writes .br/.gz siblings (run at startup and
+by `python compression.py` in the Docker build), and send_precompressed()
+serves the best variant the client accepts.
+
+brotli is optional - without it everything falls back to gzip.
+"""
+
+import gzip
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies aren't worth the CPU or the extra headers
+MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/json', 'application/javascript', 'application/manifest+json', 'image/svg+xml',
+}
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+STATIC_DIRS = ['img', 'favicon_io']
+
+# Variants must save at least this much to be kept (JPEG/PNG mostly don't)
+MIN_SAVING = 0.1
+
+# encoding -> file suffix of its pre-compressed variant, in order of preference
+VARIANT_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def _compress(body, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(body, quality=level or BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=level or GZIP_LEVEL, mtime=0)
+
+
+def supported_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def choose_encoding(accept_encoding, available=None):
+    """Best encoding from available that the Accept-Encoding header allows, or None"""
+    accepted = parse_accept_header(accept_encoding or '')
+    best, best_quality = None, 0
+    for encoding in available or supported_encodings():
+        quality = accepted[encoding] or (accepted['*'] if encoding not in accepted else 0)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """Compress eligible responses of the wrapped WSGI app"""
+
+    def __init__(self, app, min_size=MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    def __call__(self, environ, start_response):
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured.update(status=status, headers=headers, exc_info=exc_info)
+            return lambda data: captured.setdefault('written', []).append(data)
+
+        app_iter = self.app(environ, capture)
+        headers = Headers(captured['headers'])
+        if not self._compressible(captured['status'], headers) or captured.get('written'):
+            start_response(captured['status'], captured['headers'], captured['exc_info'])
+            return self._prepend(captured.get('written'), app_iter)
+
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        if len(body) >= self.min_size:
+            body = _compress(body, encoding)
+            headers['Content-Encoding'] = encoding
+            headers['Content-Length'] = str(len(body))
+            # The body differs per encoding, so only weak comparison still holds
+            etag = headers.get('ETag')
+            if etag and not etag.startswith('W/'):
+                headers['ETag'] = f'W/{etag}'
+        headers.add('Vary', 'Accept-Encoding')
+        start_response(captured['status'], headers.to_wsgi_list(), captured['exc_info'])
+        return [body]
+
+    @staticmethod
+    def _compressible(status, headers):
+        if not status.startswith('200') or 'Content-Encoding' in headers:
+            return False
+        # send_file responses stream from disk - leave them alone
+        if 'Content-Disposition' in headers or headers.get('Accept-Ranges') == 'bytes':
+            return False
+        mimetype = headers.get('Content-Type', '').split(';')[0].strip()
+        return mimetype in COMPRESSIBLE_TYPES
+
+    @staticmethod
+    def _prepend(written, app_iter):
+        if not written:
+            return app_iter
+
+        def chained():
+            yield from written
+            yield from app_iter
+        return chained()
+
+
+def compressed_variants(data):
+    """{encoding: body} for each supported encoding that saves at least MIN_SAVING"""
+    if len(data) < MIN_SIZE:
+        return {}
+    variants = {}
+    for encoding in supported_encodings():
+        compressed = _compress(data, encoding, level=11 if encoding == 'br' else 9)
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            variants[encoding] = compressed
+    return variants
+
+
+def precompress_static(directories=STATIC_DIRS, root=None):
+    """Write .br/.gz variants next to each static file that compresses well; returns the files written"""
+    root = root or os.path.dirname(os.path.abspath(__file__))
+    written = []
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+            for filename in filenames:
+                if filename.endswith(tuple(VARIANT_SUFFIXES.values())):
+                    continue
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                for encoding in supported_encodings():
+                    variant = path + VARIANT_SUFFIXES[encoding]
+                    if os.path.exists(variant) and os.path.getmtime(variant) >= os.path.getmtime(path):
+                        continue
+                    compressed = _compress(data, encoding, level=11 if encoding == 'br' else 9)
+                    if len(data) < MIN_SIZE or len(compressed) > len(data) * (1 - MIN_SAVING):
+                        # Drop a stale variant of a file that no longer compresses well
+                        if os.path.exists(variant):
+                            os.remove(variant)
+                        continue
+                    with open(variant, 'wb') as f:
+                        f.write(compressed)
+                    written.append(variant)
+    return written
+
+
+def send_precompressed(directory, filename, max_age=None):
+    """send_from_directory, serving a fresh .br/.gz variant of the file when the client accepts it"""
+    path = safe_join(os.path.join(current_app.root_path, directory), filename)
+    available = [
+        encoding for encoding, suffix in VARIANT_SUFFIXES.items()
+        if os.path.isfile(path + suffix) and os.path.getmtime(path + suffix) >= os.path.getmtime(path)
+    ] if path and os.path.isfile(path) else []
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'), available) if available else None
+
+    if encoding is None:
+        response = send_from_directory(directory, filename, max_age=max_age)
+    else:
+        response = send_from_directory(directory, filename + VARIANT_SUFFIXES[encoding], max_age=max_age)
+        response.headers['Content-Encoding'] = encoding
+        # Keep the original file's type, not the variant's
+        response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if available:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+if __name__ == '__main__':
+    written = precompress_static()
+    for variant in written:
+        print(f"✅ Wrote {os.path.relpath(variant)}")
+    if not written:
+        print("⚠️  Pre-compressed variants are up to date")
+    if brotli is None:
+        print("⚠️  brotli is not installed - only gzip variants were written")
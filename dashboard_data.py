@@ -0,0 +1,108 @@
+"""
+Dashboard Data Service
+======================
+Gathers everything the dashboard shows in as few statements as possible:
+- 30-day and all-time activity stats from the activity bitmaps (no rows fetched)
+- one windowed pass over spending_log for the top items of the last 30 days
+  and the current budget period total
+- the last 10 purchases (index-ordered, stops after 10 rows)
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import activity_bitmaps
+
+# Display name for spending rows that have no interned item yet
+UNKNOWN_ITEM = 'Unknown item'
+
+
+@dataclass
+class DashboardData:
+    total_spent: float
+    activity_stats: dict
+    activity_percentages: dict
+    top_spending_items: list = field(default_factory=list)
+    recent_purchases: list = field(default_factory=list)
+
+
+def _activity_stats(cursor, since):
+    """30-day counts (<activity>_count, total_days) and all-time totals (total_<activity>) from the activity bitmaps"""
+    activities = activity_bitmaps.get_bitmaps(cursor)
+    recent = activities.counts(since)
+    all_time = activities.counts()
+    stats = {'total_days': recent['tracked'], 'total_all_days': all_time['tracked']}
+    for col in activities.names:
+        stats[f'{col}_count'] = recent[col]
+        stats[f'total_{col}'] = all_time[col]
+    return stats
+
+
+def _activity_percentages(stats, names):
+    total_days = stats['total_all_days'] if stats['total_all_days'] else 1
+    percentages = {}
+    for col in names:
+        total = stats[f'total_{col}']
+        percentages[f'{col}_percentage'] = round((total / total_days) * 100, 1) if total else 0
+    percentages['total_tracked_days'] = total_days
+    return percentages
+
+
+def _top_items_and_period_total(cursor, since, period_start, period_end, limit=10):
+    """
+    Top items since `since` plus the period total, from one pass over the
+    union of both date windows, grouped by interned item id. The period total
+    is a window aggregate over the grouped rows, so it rides along on every
+    returned row. Rows not yet interned (item_id NULL) form one group, kept
+    by the LEFT JOIN under UNKNOWN_ITEM so the period total never drops out.
+    """
+    cursor.execute('''
+        SELECT COALESCE(items.name, :unknown) as item, total, frequency, last_purchase, period_total
+        FROM (
+            SELECT
+                item_id,
+                SUM(CASE WHEN date >= :since THEN price END) as total,
+                COUNT(CASE WHEN date >= :since THEN 1 END) as frequency,
+                MAX(CASE WHEN date >= :since THEN date END) as last_purchase,
+                SUM(SUM(CASE WHEN date BETWEEN :period_start AND :period_end THEN price END)) OVER () as period_total
+            FROM spending_log
+            WHERE date >= MIN(:since, :period_start)
+            -- unary + keeps the planner on the date range instead of walking the item_id index
+            GROUP BY +item_id
+            ORDER BY total DESC
+            LIMIT :limit
+        ) top
+        LEFT JOIN items ON items.id = top.item_id
+        ORDER BY total DESC
+    ''', {'since': since, 'period_start': period_start, 'period_end': period_end, 'limit': limit,
+          'unknown': UNKNOWN_ITEM})
+    rows = cursor.fetchall()
+
+    period_total = round(float(rows[0]['period_total']), 2) if rows and rows[0]['period_total'] else 0.0
+    top_items = [row for row in rows if row['total'] is not None]
+    return top_items, period_total
+
+
+def load_dashboard_data(cursor, budget_period, today):
+    """Compute the dashboard's spending and activity figures for the given period"""
+    since = (today - timedelta(days=30)).isoformat()
+
+    activity_stats = _activity_stats(cursor, since)
+    top_items, total_spent = _top_items_and_period_total(
+        cursor, since, str(budget_period['start_date']), str(budget_period['end_date']))
+
+    cursor.execute('''
+        SELECT item, price, date
+        FROM spending_log
+        ORDER BY date DESC, id DESC
+        LIMIT 10
+    ''')
+    recent_purchases = cursor.fetchall()
+
+    return DashboardData(
+        total_spent=total_spent,
+        activity_stats=activity_stats,
+        activity_percentages=_activity_percentages(activity_stats, activity_bitmaps.get_bitmaps(cursor).names),
+        top_spending_items=top_items,
+        recent_purchases=recent_purchases,
+    )
@@ -0,0 +1,199 @@
+"""
+Database connection management
+==============================
+Hands out one SQLite connection per request (stored on flask.g) and keeps a
+bounded pool of warm connections so each request doesn't pay connect/open cost.
+Outside of a request (scripts, background threads) a plain connection is returned.
+
+Every new connection gets the pragma profile selected by SQLITE_PROFILE
+(default "performance"; set SQLITE_PROFILE=default for stock SQLite settings).
+"""
+
+import os
+import sqlite3
+import threading
+from flask import g, has_app_context
+
+DB_PATH = 'finance_tracker.db'
+
+# Maximum number of idle connections kept warm between requests
+POOL_SIZE = 8
+
+# Number of compiled statements each connection keeps in its cache
+CACHED_STATEMENTS = 256
+
+# Pragmas applied whenever a connection is created.
+# WAL lets dashboard readers keep going while autosave/spending writes commit.
+PRAGMA_PROFILES = {
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -16000,  # negative = KiB, so ~16MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'default': {},
+}
+
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'performance')
+
+
+def apply_pragma_profile(conn, profile=None):
+    """Apply a pragma profile (by name) to a freshly opened connection"""
+    pragmas = PRAGMA_PROFILES.get(profile or SQLITE_PROFILE, {})
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+def effective_settings(conn):
+    """Read back the settings SQLite is actually using on this connection"""
+    settings = {}
+    for name in ('journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store', 'busy_timeout'):
+        settings[name] = conn.execute(f'PRAGMA {name}').fetchone()[0]
+    return settings
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() is deferred while it is bound to a request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.request_bound = False
+
+    def close(self):
+        # Routes still call conn.close() when they are done - while the connection
+        # belongs to a request that is a no-op, the teardown hook releases it.
+        if self.request_bound:
+            return
+        super().close()
+
+    def really_close(self):
+        self.request_bound = False
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded pool of idle connections shared by the worker threads"""
+
+    def __init__(self, db_path=DB_PATH, max_size=POOL_SIZE):
+        self.db_path = db_path
+        self.max_size = max_size
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # A connection is only ever used by one thread at a time (checked out for
+        # the length of a request), so it is safe to hand it to a different thread
+        # on the next checkout.
+        conn = sqlite3.connect(self.db_path,
+                               factory=PooledConnection,
+                               cached_statements=CACHED_STATEMENTS,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return apply_pragma_profile(conn)
+
+    def acquire(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        conn.request_bound = True
+        return conn
+
+    def release(self, conn):
+        conn.request_bound = False
+        try:
+            # Anything left uncommitted by the request is discarded, same as a close()
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.really_close()
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+        conn.really_close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.really_close()
+
+
+pool = ConnectionPool()
+
+
+def connect(db_path=DB_PATH, profile=None):
+    """Open a standalone connection (caller owns it and must close it)"""
+    conn = sqlite3.connect(db_path, cached_statements=CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row
+    return apply_pragma_profile(conn, profile)
+
+
+def get_db_connection():
+    """Return the connection for the current request, checking one out of the pool if needed"""
+    if not has_app_context():
+        return connect(pool.db_path)
+
+    conn = g.get('_db_conn')
+    if conn is None:
+        conn = pool.acquire()
+        g._db_conn = conn
+    return conn
+
+
+def release_db_connection(exception=None):
+    """Teardown hook - return the request's connection to the pool"""
+    conn = g.pop('_db_conn', None)
+    if conn is not None:
+        pool.release(conn)
+
+
+def apply_schema_migrations(conn):
+    """Run the idempotent performance migrations against an open connection"""
+    from setup_activities import create_activity_registry
+    from setup_indexes import create_performance_indexes
+    from setup_spending_daily import create_spending_daily
+    from setup_spending_stats import create_spending_stats
+    from backfill_categories import backfill_categories
+    from setup_table_versions import create_table_versions
+    from setup_items import create_items
+    from setup_rollups import create_rollups
+    from setup_spending_sketches import create_spending_sketches
+
+    create_activity_registry(conn)
+    create_performance_indexes(conn)
+    create_spending_daily(conn)
+    create_spending_stats(conn)
+    backfill_categories(conn)
+    create_table_versions(conn)
+    create_items(conn)
+    create_rollups(conn)
+    create_spending_sketches(conn)
+
+
+def check_settings(db_path=DB_PATH):
+    """Startup check - print the pragma settings a new connection ends up with"""
+    conn = connect(db_path)
+    try:
+        settings = effective_settings(conn)
+    finally:
+        conn.close()
+
+    print(f"SQLite profile '{SQLITE_PROFILE}' on {db_path} (SQLite {sqlite3.sqlite_version}):")
+    for name, value in settings.items():
+        print(f"   {name}: {value}")
+
+    expected = PRAGMA_PROFILES.get(SQLITE_PROFILE, {}).get('journal_mode')
+    if expected and str(settings['journal_mode']).upper() != expected.upper():
+        print(f"⚠️  journal_mode is {settings['journal_mode']}, expected {expected}")
+    return settings
+
+
+def init_app(app):
+    app.teardown_appcontext(release_db_connection)
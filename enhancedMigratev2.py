@@ -15,6 +15,9 @@ import pandas as pd
 from datetime import datetime, timedelta
 import re
 
+from categorizer import categorize
+from setup_activities import activity_mask, create_activity_registry, load_activities
+
 # ------------------------------
 # Dependency Installer
 # ------------------------------
@@ -60,22 +63,8 @@ def setup_database():
     conn = sqlite3.connect('finance_tracker.db')
     cursor = conn.cursor()
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS personal_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date DATE UNIQUE NOT NULL,
-            gym BOOLEAN DEFAULT 0,
-            jiu_jitsu BOOLEAN DEFAULT 0,
-            skateboarding BOOLEAN DEFAULT 0,
-            work BOOLEAN DEFAULT 0,
-            coitus BOOLEAN DEFAULT 0,
-            sauna BOOLEAN DEFAULT 0,
-            supplements BOOLEAN DEFAULT 0,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    # activity_types and personal_log with its activities mask (see setup_activities.py)
+    create_activity_registry(conn)
     
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS spending_log (
@@ -133,6 +122,17 @@ def setup_database():
 # ------------------------------
 # Personal Data Migration
 # ------------------------------
+# Registered activity name -> its column in the 'Life' sheet
+SHEET_ACTIVITIES = {
+    'gym': 'Gym',
+    'jiu_jitsu': 'Jiu Jitsu',
+    'skateboarding': 'Skateboard',
+    'work': 'Work',
+    'coitus': 'Coitus',
+    'sauna': 'Sauna',
+    'supplements': 'Supplements',
+}
+
 def migrate_personal_data():
     print("\n📊 Migrating personal data...")
     try:
@@ -140,6 +140,7 @@ def migrate_personal_data():
         conn = sqlite3.connect('finance_tracker.db')
         cursor = conn.cursor()
         cursor.execute('DELETE FROM personal_log')
+        registry = load_activities(cursor)
         
         def to_bool(value):
             if pd.isna(value):
@@ -151,21 +152,16 @@ def migrate_personal_data():
             if pd.isna(row.get('Date')):
                 continue
             date_obj = pd.to_datetime(row['Date']).date()
-            gym = to_bool(row.get('Gym'))
-            jiu_jitsu = to_bool(row.get('Jiu Jitsu'))
-            skateboarding = to_bool(row.get('Skateboard'))
-            work = to_bool(row.get('Work'))
-            coitus = to_bool(row.get('Coitus'))
-            sauna = to_bool(row.get('Sauna'))
-            supplements = to_bool(row.get('Supplements'))
+            activities = activity_mask(registry, [
+                name for name, column in SHEET_ACTIVITIES.items() if to_bool(row.get(column))
+            ])
             notes = str(row.get('What ', '')) if not pd.isna(row.get('What ')) else ''
             notes = notes.strip() if notes != 'nan' else ''
             
             cursor.execute('''
-                INSERT OR REPLACE INTO personal_log 
-                (date, gym, jiu_jitsu, skateboarding, work, coitus, sauna, supplements, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (date_obj, gym, jiu_jitsu, skateboarding, work, coitus, sauna, supplements, notes))
+                INSERT OR REPLACE INTO personal_log (date, activities, notes)
+                VALUES (?, ?, ?)
+            ''', (date_obj, activities, notes))
             migrated_count += 1
         
         conn.commit()
@@ -324,9 +320,10 @@ def migrate_spending_data():
             
             for transaction in transactions:
                 cursor.execute('''
-                    INSERT INTO spending_log (date, item, price)
-                    VALUES (?, ?, ?)
-                ''', (transaction['date'], transaction['item'], transaction['amount']))
+                    INSERT INTO spending_log (date, item, price, category)
+                    VALUES (?, ?, ?, ?)
+                ''', (transaction['date'], transaction['item'], transaction['amount'],
+                      categorize(transaction['item'])))
                 total_migrated += 1
                 print(f"     {transaction['date']}: {transaction['item']} - ${transaction['amount']:.2f}")
         
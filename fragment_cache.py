@@ -0,0 +1,151 @@
+"""
+Template Fragment Cache
+=======================
+Jinja extension that caches rendered template fragments:
+
+    {% cache 'dashboard-overview', today %}
+        ... expensive markup ...
+    {% endcache %}
+
+A fragment is keyed on its name, the extra key values given in the tag and
+the data version - the combined change counters of spending_log,
+personal_log, budget_periods and activity_types (see
+setup_table_versions.py). Any write to
+those tables moves the version, so stale fragments are never served; they
+simply stop being asked for and fall out of the LRU.
+
+The data version is read once per request and memoized on flask.g. A
+route can call fragments_cached() before running its queries and skip the
+work only a cached fragment needs; the fragments it finds are pinned on
+flask.g so the render uses them even if the LRU evicts them meanwhile.
+"""
+
+import threading
+from collections import OrderedDict
+
+from flask import g, has_app_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from db import get_db_connection
+
+# Tables whose contents the cached fragments are rendered from
+DATA_TABLES = ('spending_log', 'personal_log', 'budget_periods', 'activity_types')
+
+# Maximum number of rendered fragments kept in memory
+FRAGMENT_CACHE_SIZE = 256
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments"""
+
+    def __init__(self, max_size=FRAGMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = FragmentCache()
+
+
+def get_data_version(cursor):
+    """Combined change counters of DATA_TABLES, as a tuple in DATA_TABLES order"""
+    cursor.execute('''
+        SELECT name, version FROM table_versions
+        WHERE name IN ('spending_log', 'personal_log', 'budget_periods', 'activity_types')
+    ''')
+    versions = dict(cursor.fetchall())
+    return tuple(versions.get(table, 0) for table in DATA_TABLES)
+
+
+def current_data_version():
+    """Data version for the current request - only queried once per request"""
+    if not has_app_context():
+        return get_data_version(get_db_connection().cursor())
+
+    version = g.get('_data_version')
+    if version is None:
+        version = get_data_version(get_db_connection().cursor())
+        g._data_version = version
+    return version
+
+
+def fragment_key(key_parts):
+    """Cache key of {% cache *key_parts %} for the current data version"""
+    return (current_data_version(), *(str(part) for part in key_parts))
+
+
+def fragments_cached(*fragments):
+    """
+    True when every fragment (a tuple of the {% cache %} tag's key values)
+    is cached for the current data version - the route can then skip the
+    queries that only feed those fragments. Found fragments are pinned for
+    the rest of the request.
+    """
+    found = {}
+    for key_parts in fragments:
+        key = fragment_key(key_parts)
+        fragment = cache.get(key)
+        if fragment is None:
+            return False
+        found[key] = fragment
+    g._pinned_fragments = {**g.get('_pinned_fragments', {}), **found}
+    return True
+
+
+class FragmentCacheExtension(Extension):
+    """Adds {% cache name[, key...] %}...{% endcache %}"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key_parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key_parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        call = self.call_method('_render_fragment', [nodes.List(key_parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(self, key_parts, caller):
+        key = fragment_key(key_parts)
+        pinned = g.get('_pinned_fragments', {}) if has_app_context() else {}
+        if key in pinned:
+            return pinned[key]
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.set(key, fragment)
+        return fragment
+
+
+def init_app(app):
+    app.jinja_env.add_extension(FragmentCacheExtension)
@@ -0,0 +1,75 @@
+"""
+Conditional GET
+===============
+ETag / Last-Modified for the JSON API, derived from the table change
+counters (see setup_table_versions.py) instead of the response body:
+
+    @app.route('/api/analytics')
+    @conditional_get('spending_log', 'personal_log', 'budget_periods')
+    def api_analytics():
+        ...
+
+The validator is built from the endpoint, the query string, the versions of
+the listed tables and the current Toronto date (most endpoints report
+"the last N days"). When the client's If-None-Match / If-Modified-Since
+still matches, a 304 goes back after one small table_versions lookup and the
+view never runs.
+"""
+
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+import pytz
+from flask import current_app, make_response, request
+
+from db import get_db_connection
+from setup_table_versions import get_table_versions
+
+TORONTO_TZ = pytz.timezone('America/Toronto')
+
+
+def _last_modified(versions, now):
+    """Latest write to any of the tables, but never before the start of today"""
+    start_of_day = TORONTO_TZ.localize(datetime.combine(now.date(), time())).astimezone(pytz.utc)
+    latest = start_of_day
+    for _, updated_at in versions.values():
+        if updated_at:
+            written = pytz.utc.localize(datetime.strptime(updated_at, '%Y-%m-%d %H:%M:%S'))
+            latest = max(latest, written)
+    return latest
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match wins when both are sent (RFC 9110 13.2.2) and uses weak
+    # comparison - compressed responses carry the ETag as W/"..."
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional_get(*tables):
+    """Answer GETs with 304 while the listed tables and the date are unchanged"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_table_versions(get_db_connection().cursor(), tables)
+            now = datetime.now(TORONTO_TZ)
+            key = '|'.join([request.endpoint, request.query_string.decode(), now.date().isoformat()]
+                           + [f'{table}:{versions[table][0]}' for table in tables])
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            last_modified = _last_modified(versions, now)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            # Always revalidate - the validators are cheap to check
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,236 @@
+"""
+Responsive Image Variants
+=========================
+generate_variants() resizes every wallpaper under /img to several widths
+and re-encodes each width as AVIF, WebP and JPEG:
+
+    img/variants/greekWallpaper-960.1c9e4a7b.avif
+
+The hash in the name is taken from the source file and the encoder
+settings, so variant URLs never change meaning and are served with
+Cache-Control: immutable. Templates list them through srcset
+(image_sources()), and the wallpaper switcher picks a width for the
+viewport from image_variants() (see static/js/app.js).
+
+The favicon_io PNG icons are re-encoded as 256-colour palette PNGs in
+favicon_io/variants/ and served in place of the originals when smaller.
+
+Run at startup and by `python image_variants.py` in the Docker build; only
+missing or stale variants are written. Pillow is optional - without it the
+originals are served as before.
+"""
+
+import hashlib
+import os
+import re
+import threading
+
+from flask import current_app
+from werkzeug.security import safe_join
+
+from compression import MIN_SAVING, send_precompressed
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+VARIANT_DIR = 'variants'
+
+WALLPAPER_DIR = 'img'
+ICON_DIR = 'favicon_io'
+
+# Wallpapers are shown full screen, thumbnails at ~240px in the switcher
+WIDTHS = [480, 960, 1440, 1920, 2560]
+
+# Format -> (MIME type, Pillow save options), in order of preference
+FORMATS = {
+    'avif': ('image/avif', {'format': 'AVIF', 'quality': 50, 'speed': 6}),
+    'webp': ('image/webp', {'format': 'WEBP', 'quality': 75, 'method': 6}),
+    'jpg': ('image/jpeg', {'format': 'JPEG', 'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+ICON_COLORS = 256
+
+# Fixed-name files (originals, icons) may change, so browsers revalidate them weekly
+MAX_AGE = 7 * 24 * 3600
+VARIANT_MAX_AGE = 365 * 24 * 3600
+
+VARIANT_NAME = re.compile(r'^(?P<stem>.+)-(?P<width>\d+)\.(?P<digest>[0-9a-f]{8})\.(?P<ext>\w+)$')
+
+
+def _root(root=None):
+    return root or os.path.dirname(os.path.abspath(__file__))
+
+
+def available_formats():
+    """Variant formats this Pillow build can encode"""
+    return [ext for ext in FORMATS if features.check(ext)] if Image is not None else []
+
+
+def _digest(path):
+    """Hash of the source file and the encoder settings it is rendered with"""
+    sha = hashlib.sha256(repr((WIDTHS, FORMATS)).encode())
+    with open(path, 'rb') as f:
+        sha.update(f.read())
+    return sha.hexdigest()[:8]
+
+
+def _sources(directory):
+    return sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.is_file() and not entry.name.endswith(('.br', '.gz'))
+    )
+
+
+def generate_wallpaper_variants(root=None):
+    """Write missing resized variants of the wallpapers and drop stale ones; returns the files written"""
+    directory = os.path.join(_root(root), WALLPAPER_DIR)
+    variant_dir = os.path.join(directory, VARIANT_DIR)
+    os.makedirs(variant_dir, exist_ok=True)
+    formats = available_formats()
+
+    expected, written = set(), []
+    for filename in _sources(directory):
+        stem = os.path.splitext(filename)[0]
+        digest = _digest(os.path.join(directory, filename))
+        with Image.open(os.path.join(directory, filename)) as image:
+            image = image.convert('RGB')
+            for width in sorted({w for w in WIDTHS if w < image.width} | {min(image.width, WIDTHS[-1])}):
+                resized = None
+                for ext in formats:
+                    name = f'{stem}-{width}.{digest}.{ext}'
+                    expected.add(name)
+                    if os.path.exists(os.path.join(variant_dir, name)):
+                        continue
+                    if resized is None:
+                        height = round(image.height * width / image.width)
+                        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+                    resized.save(os.path.join(variant_dir, name), **FORMATS[ext][1])
+                    written.append(os.path.join(variant_dir, name))
+
+    for name in os.listdir(variant_dir):
+        if name not in expected:
+            os.remove(os.path.join(variant_dir, name))
+    return written
+
+
+def generate_icon_variants(root=None):
+    """Write palette-PNG versions of the PNG icons that save at least MIN_SAVING; returns the files written"""
+    directory = os.path.join(_root(root), ICON_DIR)
+    variant_dir = os.path.join(directory, VARIANT_DIR)
+    os.makedirs(variant_dir, exist_ok=True)
+
+    written = []
+    for filename in _sources(directory):
+        path, variant = os.path.join(directory, filename), os.path.join(variant_dir, filename)
+        if not filename.endswith('.png'):
+            continue
+        if os.path.exists(variant) and os.path.getmtime(variant) >= os.path.getmtime(path):
+            continue
+        with Image.open(path) as icon:
+            icon.convert('RGBA').quantize(ICON_COLORS, method=Image.Quantize.FASTOCTREE).save(
+                variant, format='PNG', optimize=True)
+        if os.path.getsize(variant) > os.path.getsize(path) * (1 - MIN_SAVING):
+            os.remove(variant)
+            continue
+        written.append(variant)
+    return written
+
+
+def generate_variants(root=None):
+    """Wallpaper and icon variants; returns the files written (none without Pillow)"""
+    if Image is None:
+        return []
+    return generate_wallpaper_variants(root) + generate_icon_variants(root)
+
+
+_variants_lock = threading.Lock()
+_variants_cache = {}
+
+
+def _load_variants(variant_dir):
+    """{source filename: {'v': digest, 'a': aspect ratio, 'w': [widths], 'f': [formats]}}"""
+    if Image is None or not os.path.isdir(variant_dir):
+        return {}
+    sources = {os.path.splitext(name)[0]: name for name in _sources(os.path.dirname(variant_dir))}
+    found = {}
+    for name in sorted(os.listdir(variant_dir)):
+        match = VARIANT_NAME.match(name)
+        if not match or match['stem'] not in sources or match['ext'] not in FORMATS:
+            continue
+        entry = found.setdefault(sources[match['stem']], {'v': match['digest'], 'w': set(), 'f': set()})
+        if match['digest'] == entry['v']:
+            entry['w'].add(int(match['width']))
+            entry['f'].add(match['ext'])
+
+    variants = {}
+    for filename, entry in found.items():
+        with Image.open(os.path.join(os.path.dirname(variant_dir), filename)) as image:
+            aspect = round(image.width / image.height, 4)
+        variants[filename] = {
+            'v': entry['v'],
+            'a': aspect,
+            'w': sorted(entry['w']),
+            'f': [ext for ext in FORMATS if ext in entry['f']],
+        }
+    return variants
+
+
+def image_variants():
+    """Variants of each wallpaper, re-read whenever the variants directory changes"""
+    variant_dir = os.path.join(current_app.root_path, WALLPAPER_DIR, VARIANT_DIR)
+    mtime = os.path.getmtime(variant_dir) if os.path.isdir(variant_dir) else None
+    with _variants_lock:
+        if _variants_cache.get('mtime') != mtime or 'variants' not in _variants_cache:
+            _variants_cache.update(mtime=mtime, variants=_load_variants(variant_dir))
+        return _variants_cache['variants']
+
+
+def variant_url(filename, width, ext, digest):
+    return f'/{WALLPAPER_DIR}/{VARIANT_DIR}/{os.path.splitext(filename)[0]}-{width}.{digest}.{ext}'
+
+
+def image_sources(filename):
+    """[(MIME type, srcset)] for a wallpaper, best format first; empty when it has no variants"""
+    entry = image_variants().get(filename)
+    if entry is None:
+        return []
+    return [
+        (FORMATS[ext][0], ', '.join(f"{variant_url(filename, width, ext, entry['v'])} {width}w"
+                                    for width in entry['w']))
+        for ext in entry['f']
+    ]
+
+
+def send_image(directory, filename):
+    """
+    Serve a file of directory: variants as immutable, icons from their
+    smaller palette variant when there is a fresh one, and everything else
+    through send_precompressed() with a week's max-age
+    """
+    if filename.startswith(VARIANT_DIR + '/'):
+        response = send_precompressed(directory, filename, max_age=VARIANT_MAX_AGE)
+        response.cache_control.immutable = True
+        return response
+
+    path = safe_join(os.path.join(current_app.root_path, directory), filename)
+    variant = safe_join(os.path.join(current_app.root_path, directory, VARIANT_DIR), filename)
+    if (directory == ICON_DIR and path and variant and os.path.isfile(path) and os.path.isfile(variant)
+            and os.path.getmtime(variant) >= os.path.getmtime(path)):
+        return send_precompressed(directory, f'{VARIANT_DIR}/{filename}', max_age=MAX_AGE)
+    return send_precompressed(directory, filename, max_age=MAX_AGE)
+
+
+def init_app(app):
+    app.jinja_env.globals.update(image_sources=image_sources, image_variants=image_variants)
+
+
+if __name__ == '__main__':
+    written = generate_variants()
+    for variant in written:
+        print(f"✅ Wrote {os.path.relpath(variant)}")
+    if Image is None:
+        print("⚠️  Pillow is not installed - no image variants were written")
+    elif not written:
+        print("⚠️  Image variants are up to date")
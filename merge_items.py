@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Item Alias Merge Tool
+=====================
+Merges spending items that are the same place under different names
+("Tims" into "Tim Hortons"). The merged item's spellings become aliases of
+the target, its spending_log rows and rollups move over, and future entries
+spelled either way get the target's id.
+
+Usage:
+    python merge_items.py                          # list likely duplicates
+    python merge_items.py "Tims" "Tim Hortons"     # merge Tims into Tim Hortons
+    python merge_items.py "Tims" "Tim Hortons" --rename   # ...and show it as "Tims"
+"""
+
+import re
+import sqlite3
+import sys
+from collections import defaultdict
+
+from setup_items import NORMALIZED
+
+DB_PATH = 'finance_tracker.db'
+
+
+def find_item(cursor, name):
+    """(item_id, display name) for any spelling or alias of an item, or None"""
+    cursor.execute(f'''
+        SELECT items.id, items.name
+        FROM item_aliases
+        JOIN items ON items.id = item_aliases.item_id
+        WHERE item_aliases.alias = {NORMALIZED.format('?')}
+    ''', (name,))
+    return cursor.fetchone()
+
+
+def merge_items(conn, source, target, rename=False):
+    """Merge the item spelled source into target; returns the number of spending rows moved"""
+    cursor = conn.cursor()
+    found_source, found_target = find_item(cursor, source), find_item(cursor, target)
+    if found_source is None or found_target is None:
+        raise ValueError(f'Unknown item: {source if found_source is None else target}')
+    source_id, source_name = found_source
+    target_id, _ = found_target
+    if source_id == target_id:
+        raise ValueError(f'{source} and {target} are already the same item')
+
+    cursor.execute('UPDATE item_aliases SET item_id = ? WHERE item_id = ?', (target_id, source_id))
+    cursor.execute('UPDATE spending_log SET item_id = ? WHERE item_id = ?', (target_id, source_id))
+    moved = cursor.rowcount
+
+    # Fold the source's rollup rows into the target's
+    cursor.execute('''
+        INSERT INTO spending_item_rollup (grain, bucket, item_id, total, count)
+        SELECT grain, bucket, ?, total, count
+        FROM spending_item_rollup
+        WHERE item_id = ?
+        ON CONFLICT(grain, bucket, item_id) DO UPDATE SET
+            total = ROUND(total + excluded.total, 2),
+            count = count + excluded.count
+    ''', (target_id, source_id))
+    cursor.execute('DELETE FROM spending_item_rollup WHERE item_id = ?', (source_id,))
+
+    cursor.execute('DELETE FROM items WHERE id = ?', (source_id,))
+    if rename:
+        cursor.execute('UPDATE items SET name = ? WHERE id = ?', (source_name, target_id))
+    conn.commit()
+    return moved
+
+
+def _squashed(name):
+    return re.sub(r'[^a-z0-9]', '', name)
+
+
+def suggest_merges(cursor):
+    """Groups of item names that look like the same place, most used first"""
+    cursor.execute('''
+        SELECT items.name, items.normalized, COUNT(spending_log.id) as uses
+        FROM items
+        LEFT JOIN spending_log ON spending_log.item_id = items.id
+        GROUP BY items.id
+        ORDER BY uses DESC
+    ''')
+    items = cursor.fetchall()
+
+    groups = defaultdict(list)
+    first_words = {}
+    for name, normalized, uses in items:
+        groups[_squashed(normalized)].append((name, uses))
+        first_words.setdefault(normalized.split(' ')[0], []).append((name, uses))
+
+    suggestions = [group for group in groups.values() if len(group) > 1]
+    # "Costco" / "Costco gas" style prefixes
+    for word, group in first_words.items():
+        if len(group) > 1 and len(word) >= 4 and not any(set(group) <= set(s) for s in suggestions):
+            suggestions.append(group)
+    return suggestions
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    if len(args) == 2:
+        try:
+            moved = merge_items(conn, args[0], args[1], rename='--rename' in sys.argv)
+            print(f"✅ Merged {args[0]} into {args[1]} ({moved} spending entries)")
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    elif not args:
+        suggestions = suggest_merges(conn.cursor())
+        if not suggestions:
+            print("✅ No likely duplicate items")
+        for group in suggestions:
+            print("⚠️  " + ", ".join(f"{name} ({uses})" for name, uses in group))
+        print('\nMerge with: python merge_items.py "<from>" "<into>"')
+    else:
+        print(__doc__)
+        sys.exit(1)
+    conn.close()
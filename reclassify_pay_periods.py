@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Pay Period Reclassification
+===========================
+Computes pay_period_type (1st/2nd half) for budget_periods in one
+vectorized pass and writes them back with a single executemany inside one
+transaction.
+
+Usage:
+    python reclassify_pay_periods.py             # only periods with no type yet
+    python reclassify_pay_periods.py --all       # recompute every period (overwrites manual overrides)
+    python reclassify_pay_periods.py --verify    # property-check the closed form against the day-by-day loop
+"""
+
+import random
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from budget_periods import determine_pay_period_type
+
+DB_PATH = 'finance_tracker.db'
+
+
+def classify_pay_periods(start_dates, end_dates):
+    """
+    Vectorized determine_pay_period_type() over parallel arrays of dates
+    (ISO strings or date objects). Uses the same prefix count: days after the
+    15th up to a date = ordinal(first of its month) - 15 * month_index + max(0, day - 15).
+    """
+    starts = np.asarray(start_dates, dtype='datetime64[D]')
+    ends = np.asarray(end_dates, dtype='datetime64[D]')
+
+    def through(days):
+        months = days.astype('datetime64[M]')
+        first_of_month = months.astype('datetime64[D]')
+        day_of_month = (days - first_of_month).astype(np.int64) + 1
+        return (first_of_month.astype(np.int64)
+                - 15 * months.astype(np.int64)
+                + np.maximum(0, day_of_month - 15))
+
+    start_day = (starts - starts.astype('datetime64[M]').astype('datetime64[D]')).astype(np.int64) + 1
+    total_days = (ends - starts).astype(np.int64) + 1
+    days_after_15th = np.maximum(0, through(ends) - through(starts) + (start_day > 15))
+    return np.where(days_after_15th > total_days / 2, 2, 1)
+
+
+def reclassify_pay_periods(conn, recompute_all=False):
+    """Classify budget periods in bulk, returns the number of rows changed"""
+    cursor = conn.cursor()
+    where = '' if recompute_all else 'WHERE pay_period_type IS NULL'
+    cursor.execute(f'SELECT id, start_date, end_date, pay_period_type FROM budget_periods {where}')
+    periods = cursor.fetchall()
+    if not periods:
+        return 0
+
+    types = classify_pay_periods([p[1] for p in periods], [p[2] for p in periods])
+    updates = [(int(new_type), p[0]) for p, new_type in zip(periods, types)
+               if str(p[3]) != str(int(new_type))]
+
+    with conn:
+        cursor.executemany('UPDATE budget_periods SET pay_period_type = ? WHERE id = ?', updates)
+    return len(updates)
+
+
+def determine_pay_period_type_loop(start_date, end_date):
+    """The original day-by-day implementation, kept as the reference for --verify"""
+    if isinstance(start_date, str):
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+    total_days = (end_date - start_date).days + 1
+    days_after_15th = 0
+    current = start_date
+
+    while current <= end_date:
+        if current.day > 15:
+            days_after_15th += 1
+        current += timedelta(days=1)
+
+    return 2 if days_after_15th > (total_days / 2) else 1
+
+
+def verify(samples=20000, seed=None):
+    """Random ranges (month/year ends, leap days, long spans) - returns the mismatches"""
+    rng = random.Random(seed)
+    epoch = date(1996, 1, 1)
+    ranges = []
+    for _ in range(samples):
+        start = epoch + timedelta(days=rng.randint(0, 365 * 40))
+        length = rng.choice([0, 1, 13, 14, 15, 27, 28, 29, 30, 31, rng.randint(0, 800)])
+        ranges.append((start, start + timedelta(days=length)))
+    # Month boundaries around February in leap and non-leap years
+    for year in (2000, 2023, 2024, 2100):
+        for day in range(1, 29):
+            start = date(year, 2, day)
+            for length in range(0, 35):
+                ranges.append((start, start + timedelta(days=length)))
+
+    vectorized = classify_pay_periods([r[0] for r in ranges], [r[1] for r in ranges])
+    mismatches = []
+    for (start, end), bulk in zip(ranges, vectorized):
+        expected = determine_pay_period_type_loop(start, end)
+        scalar = determine_pay_period_type(start, end)
+        if not (expected == scalar == bulk):
+            mismatches.append((start, end, expected, scalar, int(bulk)))
+    return len(ranges), mismatches
+
+
+if __name__ == '__main__':
+    if '--verify' in sys.argv:
+        checked, mismatches = verify()
+        if mismatches:
+            print(f"❌ {len(mismatches)} of {checked} ranges disagree with the loop implementation:")
+            for start, end, expected, scalar, bulk in mismatches[:20]:
+                print(f"   {start} to {end}: loop={expected} closed-form={scalar} vectorized={bulk}")
+            sys.exit(1)
+        print(f"✅ Closed-form and vectorized classification match the loop on {checked} ranges")
+        sys.exit(0)
+
+    conn = sqlite3.connect(DB_PATH)
+    changed = reclassify_pay_periods(conn, recompute_all='--all' in sys.argv)
+    conn.close()
+    print(f"✅ Reclassified {changed} budget periods")
@@ -0,0 +1,181 @@
+"""
+Rollup Queries
+==============
+Answers arbitrary date windows from the day/week/month rollups created by
+setup_rollups.py. A window is split into buckets of the requested grain;
+buckets the window covers completely are read from that grain's rows, and
+the (at most two) partially covered buckets at the edges are summed from
+day rows. Whole-window totals cover the window with full months plus the
+days at either end. Either way the cost grows with the number of buckets,
+not with the number of spending_log/personal_log rows.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from setup_activities import get_activities
+from setup_rollups import GRAINS, TRACKED_BIT
+
+
+def bucket_start(day, grain):
+    """First day of the bucket containing day"""
+    if grain == 'week':
+        return day - timedelta(days=day.weekday())
+    if grain == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def bucket_end(day, grain):
+    """Last day of the bucket containing day"""
+    if grain == 'week':
+        return bucket_start(day, grain) + timedelta(days=6)
+    if grain == 'month':
+        next_month = date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+        return next_month - timedelta(days=1)
+    return day
+
+
+def bucket_key(day, grain):
+    """The bucket column value for the bucket containing day"""
+    if grain == 'month':
+        return day.strftime('%Y-%m')
+    return bucket_start(day, grain).isoformat()
+
+
+def bucket_label(day, grain):
+    """Display label - ISO 'YYYY-Www' for weeks"""
+    if grain == 'week':
+        year, week, _ = day.isocalendar()
+        return f'{year}-W{week:02d}'
+    return bucket_key(day, grain)
+
+
+def window_buckets(start, end, grain):
+    """[(first day, last day, covers the whole bucket)] for every bucket touching [start, end]"""
+    if grain not in GRAINS:
+        raise ValueError(f'Unknown grain: {grain}')
+    buckets = []
+    day = start
+    while day <= end:
+        first, last = bucket_start(day, grain), bucket_end(day, grain)
+        buckets.append((max(first, start), min(last, end), first >= start and last <= end))
+        day = last + timedelta(days=1)
+    return buckets
+
+
+def _read_buckets(cursor, table, group, values, start, end, grain):
+    """
+    {(bucket first day, group value): [summed values]} for a rollup table.
+    group is the per-bucket key column (category/item) or None.
+    """
+    buckets = window_buckets(start, end, grain)
+    group_sql = f'{group}, ' if group else ''
+    sums = ', '.join(f'SUM({value})' for value in values)
+    results = defaultdict(lambda: [0] * len(values))
+
+    full = [(first, last) for first, last, whole in buckets if whole]
+    if full:
+        by_key = {bucket_key(first, grain): first for first, _ in full}
+        cursor.execute(f'''
+            SELECT bucket, {group_sql}{', '.join(values)}
+            FROM {table}
+            WHERE grain = ? AND bucket BETWEEN ? AND ?
+        ''', (grain, bucket_key(full[0][0], grain), bucket_key(full[-1][0], grain)))
+        for row in cursor.fetchall():
+            first = by_key.get(row[0])
+            if first is None:
+                continue
+            key = (first, row[1] if group else None)
+            offset = 2 if group else 1
+            results[key] = [a + (b or 0) for a, b in zip(results[key], row[offset:])]
+
+    for first, last, whole in buckets:
+        if whole:
+            continue
+        cursor.execute(f'''
+            SELECT {group_sql}{sums}
+            FROM {table}
+            WHERE grain = 'day' AND bucket BETWEEN ? AND ?
+            {'GROUP BY ' + group if group else ''}
+        ''', (first.isoformat(), last.isoformat()))
+        for row in cursor.fetchall():
+            key = (first, row[0] if group else None)
+            offset = 1 if group else 0
+            if row[offset] is None:
+                continue
+            results[key] = [a + (b or 0) for a, b in zip(results[key], row[offset:])]
+    return buckets, results
+
+
+def _bucket_fields(first, last, grain):
+    return {'bucket': bucket_label(first, grain), 'start': first.isoformat(), 'end': last.isoformat()}
+
+
+def spending_series(cursor, start, end, grain):
+    """Total spending per bucket, zero for buckets without any"""
+    buckets, results = _read_buckets(cursor, 'spending_rollup', None, ['total', 'count'], start, end, grain)
+    series = []
+    for first, last, _ in buckets:
+        total, count = results.get((first, None), [0, 0])
+        series.append({**_bucket_fields(first, last, grain), 'total': round(total, 2), 'count': count})
+    return series
+
+
+def category_series(cursor, start, end, grain):
+    """Spending per category per bucket (only categories with spending)"""
+    buckets, results = _read_buckets(cursor, 'spending_rollup', 'category', ['total', 'count'], start, end, grain)
+    by_bucket = defaultdict(list)
+    for (first, category), (total, count) in sorted(results.items()):
+        if count:
+            by_bucket[first].append({'category': category, 'total': round(total, 2), 'count': count})
+    return [{**_bucket_fields(first, last, grain), **row}
+            for first, last, _ in buckets for row in by_bucket[first]]
+
+
+def activity_series(cursor, start, end, grain):
+    """Logged days and per-activity counts per bucket, one count per registered activity"""
+    activities = get_activities(cursor)
+    buckets, results = _read_buckets(cursor, 'activity_rollup', 'bit', ['days'], start, end, grain)
+    series = []
+    for first, last, _ in buckets:
+        row = {**_bucket_fields(first, last, grain), 'days': results.get((first, TRACKED_BIT), [0])[0]}
+        row.update((activity['name'], results.get((first, activity['bit']), [0])[0]) for activity in activities)
+        series.append(row)
+    return series
+
+
+def item_totals(cursor, start, end, limit=10):
+    """Top items over the whole window, from full months plus the days at either end"""
+    months = [(first, last) for first, last, whole in window_buckets(start, end, 'month') if whole]
+    ranges = []
+    if months:
+        ranges.append(('month', bucket_key(months[0][0], 'month'), bucket_key(months[-1][0], 'month')))
+        if start < months[0][0]:
+            ranges.append(('day', start.isoformat(), (months[0][0] - timedelta(days=1)).isoformat()))
+        if end > months[-1][1]:
+            ranges.append(('day', (months[-1][1] + timedelta(days=1)).isoformat(), end.isoformat()))
+    else:
+        ranges.append(('day', start.isoformat(), end.isoformat()))
+
+    totals = defaultdict(lambda: [0, 0])
+    for grain, first, last in ranges:
+        cursor.execute('''
+            SELECT item_id, SUM(total), SUM(count)
+            FROM spending_item_rollup
+            WHERE grain = ? AND bucket BETWEEN ? AND ?
+            GROUP BY item_id
+        ''', (grain, first, last))
+        for item_id, total, count in cursor.fetchall():
+            totals[item_id][0] += total
+            totals[item_id][1] += count
+
+    ranked = sorted(totals.items(), key=lambda entry: -entry[1][0])[:limit]
+    if not ranked:
+        return []
+    cursor.execute(f'''
+        SELECT id, name FROM items WHERE id IN ({', '.join('?' for _ in ranked)})
+    ''', [item_id for item_id, _ in ranked])
+    names = dict(cursor.fetchall())
+    return [{'item': names.get(item_id), 'total': round(total, 2), 'frequency': count}
+            for item_id, (total, count) in ranked]
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Activity Registry Setup
+=======================
+Moves the personal_log activity flags into one integer column:
+- activity_types(bit, name, label, emoji, color) - the registry; each
+  activity owns one bit of personal_log.activities
+- personal_log.activities - the day's activities as a bitmask
+  (bit n set = activity_types.bit n done that day)
+
+The nine original flag columns (gym ... drinking) stay readable as VIRTUAL
+generated columns over the mask, so SELECT gym FROM personal_log and
+SELECT * keep working, but writes go to activities.
+
+Adding an activity is one row, no migration:
+
+    python setup_activities.py add meditation "Meditation" 🧘 "#00bcd4"
+
+Bits stop at 30 so a mask is also a safe JavaScript bitwise operand (see
+calendar.html). Bits are never reused - a removed activity's bit would still
+be set on old days.
+
+Safe to run repeatedly.
+"""
+
+import sqlite3
+import sys
+
+from flask import g, has_app_context
+
+DB_PATH = 'finance_tracker.db'
+
+MAX_BIT = 30
+
+# (bit, name, label, emoji, color) - the flags personal_log started with, in column order
+DEFAULT_ACTIVITIES = [
+    (0, 'gym', 'Gym', '💪', '#2196f3'),
+    (1, 'jiu_jitsu', 'Jiu Jitsu', '🥋', '#f44336'),
+    (2, 'skateboarding', 'Skateboarding', '🛹', '#ff9800'),
+    (3, 'work', 'Work', '💼', '#4caf50'),
+    (4, 'coitus', 'Coitus', '❤️', '#e91e63'),
+    (5, 'sauna', 'Sauna', '🧖‍♂️', '#795548'),
+    (6, 'supplements', 'Supplements', '💊', '#9c27b0'),
+    (7, 'smoking', 'Smoking', '🚬', '#607d8b'),
+    (8, 'drinking', 'Drinking', '🍺', '#ff5722'),
+]
+
+# Flag columns kept as generated columns for existing readers
+LEGACY_COLUMNS = [(bit, name) for bit, name, *_ in DEFAULT_ACTIVITIES]
+
+ACTIVITY_TYPES_SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS activity_types (
+        bit INTEGER PRIMARY KEY CHECK (bit BETWEEN 0 AND {MAX_BIT}),
+        name TEXT NOT NULL UNIQUE,
+        label TEXT NOT NULL,
+        emoji TEXT NOT NULL DEFAULT '',
+        color TEXT NOT NULL DEFAULT '#6c757d'
+    )
+'''
+
+PERSONAL_LOG_SCHEMA = f'''
+    CREATE TABLE personal_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date DATE UNIQUE NOT NULL,
+        activities INTEGER NOT NULL DEFAULT 0,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        {', '.join(f'{name} BOOLEAN GENERATED ALWAYS AS ((activities >> {bit}) & 1) VIRTUAL'
+                   for bit, name in LEGACY_COLUMNS)}
+    )
+'''
+
+
+def _migrate_personal_log(cursor):
+    """Rebuild a flag-column personal_log around the activities mask, keeping ids, indexes and triggers"""
+    cursor.execute('PRAGMA table_info(personal_log)')
+    columns = [column[1] for column in cursor.fetchall()]
+    mask = ' | '.join(f'((COALESCE({name}, 0) != 0) << {bit})' for bit, name in LEGACY_COLUMNS if name in columns)
+
+    cursor.execute('''
+        SELECT sql FROM sqlite_master
+        WHERE tbl_name = 'personal_log' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    ''')
+    dependents = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute('ALTER TABLE personal_log RENAME TO personal_log_flags')
+    cursor.execute(PERSONAL_LOG_SCHEMA)
+    cursor.execute(f'''
+        INSERT INTO personal_log (id, date, activities, notes, created_at, updated_at)
+        SELECT id, date, {mask or 0}, notes, created_at, updated_at
+        FROM personal_log_flags
+    ''')
+    cursor.execute('DROP TABLE personal_log_flags')
+    for statement in dependents:
+        cursor.execute(statement)
+
+
+def create_activity_registry(conn):
+    """Create activity_types and move personal_log onto the mask; returns True if personal_log was migrated"""
+    cursor = conn.cursor()
+    cursor.execute(ACTIVITY_TYPES_SCHEMA)
+    cursor.executemany('INSERT OR IGNORE INTO activity_types (bit, name, label, emoji, color) VALUES (?, ?, ?, ?, ?)',
+                       DEFAULT_ACTIVITIES)
+    conn.commit()
+
+    cursor.execute('PRAGMA table_info(personal_log)')
+    columns = [column[1] for column in cursor.fetchall()]
+    if 'activities' in columns:
+        return False
+
+    # One transaction, so a failed rebuild leaves the old table in place
+    cursor.execute('BEGIN')
+    try:
+        if columns:
+            _migrate_personal_log(cursor)
+        else:
+            cursor.execute(PERSONAL_LOG_SCHEMA)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return bool(columns)
+
+
+def add_activity(conn, name, label, emoji='', color='#6c757d'):
+    """Register an activity on the lowest free bit; returns the bit"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT bit FROM activity_types ORDER BY bit')
+    used = {row[0] for row in cursor.fetchall()}
+    free = [bit for bit in range(MAX_BIT + 1) if bit not in used]
+    if not free:
+        raise ValueError(f'All {MAX_BIT + 1} activity bits are in use')
+    cursor.execute('INSERT INTO activity_types (bit, name, label, emoji, color) VALUES (?, ?, ?, ?, ?)',
+                   (free[0], name, label, emoji, color))
+    conn.commit()
+    return free[0]
+
+
+def load_activities(cursor):
+    """[{bit, name, label, emoji, color}] ordered by bit"""
+    cursor.execute('SELECT bit, name, label, emoji, color FROM activity_types ORDER BY bit')
+    return [dict(zip(('bit', 'name', 'label', 'emoji', 'color'), row)) for row in cursor.fetchall()]
+
+
+def get_activities(cursor):
+    """The registry for the current request - read once per request"""
+    if not has_app_context():
+        return load_activities(cursor)
+
+    activities = g.get('_activity_types')
+    if activities is None:
+        activities = load_activities(cursor)
+        g._activity_types = activities
+    return activities
+
+
+def activity_mask(activities, names):
+    """Mask with the bits of the named activities set"""
+    mask = 0
+    for activity in activities:
+        if activity['name'] in names:
+            mask |= 1 << activity['bit']
+    return mask
+
+
+def activity_flags(activities, mask):
+    """{name: 0/1} for every activity in a mask"""
+    return {activity['name']: (mask or 0) >> activity['bit'] & 1 for activity in activities}
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    if create_activity_registry(conn):
+        print("✅ Moved personal_log activity flags into the activities mask")
+    else:
+        print("⚠️  personal_log already uses the activities mask")
+
+    if len(sys.argv) >= 4 and sys.argv[1] == 'add':
+        try:
+            bit = add_activity(conn, *sys.argv[2:6])
+            print(f"✅ Added {sys.argv[2]} on bit {bit}")
+        except (ValueError, sqlite3.IntegrityError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    for activity in load_activities(conn.cursor()):
+        print(f"   {activity['bit']:>2}  {activity['emoji']} {activity['label']} ({activity['name']})")
+    conn.close()
+    print("\n✅ Activity registry is up to date!")
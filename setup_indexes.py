@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Database Index Migration
+========================
+Creates covering indexes for the hot access paths in app.py:
+- spending_log date ranges (period totals, top items, recent purchases)
+- portfolio_log latest-row lookups
+- stock_market_values MAX(date) / per-symbol lookups
+- ai_messages per-conversation history
+- budget_periods current/previous period lookups
+
+Safe to run repeatedly. Run check_query_plans.py afterwards to confirm
+no hot query falls back to a full table scan.
+"""
+
+import sqlite3
+
+DB_PATH = 'finance_tracker.db'
+
+INDEXES = [
+    # SUM(price) over date ranges and GROUP BY item within a window read only the index
+    ('idx_spending_log_date_item_price', 'spending_log(date, item, price)'),
+    # (date, rowid) order - lets "ORDER BY date DESC, id DESC LIMIT n" stop after n rows
+    ('idx_spending_log_date', 'spending_log(date)'),
+    # Category-filtered windows (Other breakdown, LCBO/Dispo totals) stay inside the index
+    ('idx_spending_log_category_date', 'spending_log(category, date, item, price)'),
+    ('idx_portfolio_log_date_value', 'portfolio_log(date, total_portfolio_value)'),
+    ('idx_stock_market_values_date_symbol', 'stock_market_values(date, symbol, market_value)'),
+    ('idx_ai_messages_conversation_created', 'ai_messages(conversation_id, created_at)'),
+    ('idx_ai_conversations_active_updated', 'ai_conversations(is_active, updated_at)'),
+    ('idx_budget_periods_start_end', 'budget_periods(start_date, end_date)'),
+    ('idx_budget_periods_end', 'budget_periods(end_date)'),
+]
+
+
+def create_performance_indexes(conn):
+    """Create any missing indexes on an open connection"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    created = []
+    for name, target in INDEXES:
+        if name not in existing:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+            created.append(name)
+
+    if created:
+        # Refresh planner statistics so the new indexes actually get picked
+        cursor.execute('ANALYZE')
+    conn.commit()
+    return created
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    created = create_performance_indexes(conn)
+    conn.close()
+
+    for name in created:
+        print(f"✅ Created index {name}")
+    if not created:
+        print("⚠️  All indexes already exist")
+    print("\n✅ Index migration completed successfully!")
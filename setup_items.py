@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Item Dictionary Setup
+=====================
+Interns spending_log item names into integer ids:
+- items(id, name, normalized) - one row per distinct item; name is the
+  display spelling, normalized is lower(trim(name))
+- item_aliases(alias, item_id) - every normalized spelling that maps to an
+  item, including the item's own (merge_items.py adds the rest)
+- spending_log.item_id, indexed on (item_id, date) and (date, item_id, price)
+
+"Tims", "TIMS " and "tims" share one id automatically; different names for
+the same place ("Tim Hortons") are merged into it with merge_items.py.
+Grouping and top-N queries then run on item_id instead of the free text.
+
+add_spending/edit_spending set item_id via intern_item(). Rows written by
+anything else (migration scripts, imports) are interned by triggers.
+
+Safe to run repeatedly.
+"""
+
+import sqlite3
+
+DB_PATH = 'finance_tracker.db'
+
+# SQL for the normalized form of an item name expression
+NORMALIZED = 'lower(trim({}))'
+
+ITEMS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        normalized TEXT NOT NULL UNIQUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS item_aliases (
+        alias TEXT PRIMARY KEY,
+        item_id INTEGER NOT NULL REFERENCES items(id)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_item_aliases_item_id ON item_aliases(item_id)',
+]
+
+
+def _intern(name):
+    """Statements making sure the item spelled by the SQL expression name has an id"""
+    normalized = NORMALIZED.format(name)
+    return f'''
+        INSERT INTO items (name, normalized)
+        SELECT trim({name}), {normalized}
+        WHERE NOT EXISTS (SELECT 1 FROM item_aliases WHERE alias = {normalized});
+        INSERT OR IGNORE INTO item_aliases (alias, item_id)
+        SELECT normalized, id FROM items WHERE normalized = {normalized};'''
+
+
+def item_id_sql(name):
+    """SQL for the item id of the SQL expression name (NULL if it isn't interned yet)"""
+    return f'(SELECT item_id FROM item_aliases WHERE alias = {NORMALIZED.format(name)})'
+
+
+ITEM_TRIGGERS = [
+    # BEFORE triggers only touch items/item_aliases, so the rollup triggers
+    # (which look ids up by name) always find one
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_item_intern_insert
+    BEFORE INSERT ON spending_log
+    WHEN NEW.item_id IS NULL
+    BEGIN{_intern('NEW.item')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_item_intern_update
+    BEFORE UPDATE OF item ON spending_log
+    BEGIN{_intern('NEW.item')}
+    END
+    ''',
+    # Rows written without (or with a stale) item_id get theirs afterwards
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_item_id_insert
+    AFTER INSERT ON spending_log
+    WHEN NEW.item_id IS NULL
+    BEGIN
+        UPDATE spending_log SET item_id = {item_id_sql('NEW.item')} WHERE id = NEW.id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_item_id_update
+    AFTER UPDATE OF item ON spending_log
+    WHEN NEW.item_id IS NOT {item_id_sql('NEW.item')}
+    BEGIN
+        UPDATE spending_log SET item_id = {item_id_sql('NEW.item')} WHERE id = NEW.id;
+    END
+    ''',
+]
+
+
+def intern_item(cursor, item):
+    """Return (item_id, display name) for an item name, adding it to the dictionary if new"""
+    cursor.execute(f'''
+        INSERT INTO items (name, normalized)
+        SELECT trim(:item), {NORMALIZED.format(':item')}
+        WHERE NOT EXISTS (SELECT 1 FROM item_aliases WHERE alias = {NORMALIZED.format(':item')})
+    ''', {'item': item})
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO item_aliases (alias, item_id)
+        SELECT normalized, id FROM items WHERE normalized = {NORMALIZED.format(':item')}
+    ''', {'item': item})
+    cursor.execute(f'''
+        SELECT items.id, items.name
+        FROM item_aliases
+        JOIN items ON items.id = item_aliases.item_id
+        WHERE item_aliases.alias = {NORMALIZED.format(':item')}
+    ''', {'item': item})
+    item_id, name = cursor.fetchone()
+    return item_id, name
+
+
+def backfill_items(conn):
+    """Intern every spending_log item without an id; returns how many rows were updated"""
+    cursor = conn.cursor()
+    # The most used spelling becomes the display name
+    cursor.execute(f'''
+        INSERT INTO items (name, normalized)
+        SELECT trim(item), normalized
+        FROM (
+            SELECT item, {NORMALIZED.format('item')} as normalized,
+                   ROW_NUMBER() OVER (PARTITION BY {NORMALIZED.format('item')}
+                                      ORDER BY COUNT(*) DESC, MIN(id)) as rank
+            FROM spending_log
+            WHERE item_id IS NULL
+            GROUP BY item
+        )
+        WHERE rank = 1
+          AND normalized NOT IN (SELECT alias FROM item_aliases)
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO item_aliases (alias, item_id)
+        SELECT normalized, id FROM items
+    ''')
+    cursor.execute(f'''
+        UPDATE spending_log SET item_id = {item_id_sql('spending_log.item')}
+        WHERE item_id IS NULL
+    ''')
+    updated = cursor.rowcount
+    conn.commit()
+    return updated
+
+
+def create_items(conn):
+    """Create the dictionary, the item_id column, its index and triggers, then backfill"""
+    cursor = conn.cursor()
+    for statement in ITEMS_SCHEMA:
+        cursor.execute(statement)
+
+    cursor.execute('PRAGMA table_info(spending_log)')
+    if 'item_id' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE spending_log ADD COLUMN item_id INTEGER REFERENCES items(id)')
+    # Per-item history, and date windows grouped by item read only the index
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_spending_log_item_id_date ON spending_log(item_id, date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_spending_log_date_item_id_price ON spending_log(date, item_id, price)')
+
+    for trigger in ITEM_TRIGGERS:
+        cursor.execute(trigger)
+    conn.commit()
+    return backfill_items(conn)
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    updated = create_items(conn)
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM items')
+    items = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(DISTINCT item) FROM spending_log')
+    spellings = cursor.fetchone()[0]
+    conn.close()
+
+    if updated:
+        print(f"✅ Interned {updated} spending entries")
+    else:
+        print("⚠️  All spending entries already have an item id")
+    print(f"✅ {spellings} spellings map to {items} items")
+    print("\n✅ Item dictionary is up to date! Merge variants with merge_items.py")
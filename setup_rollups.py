@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Analytics Rollup Setup
+======================
+Creates materialized rollups at day, ISO-week and month grain:
+- spending_rollup(grain, bucket, category, total, count)
+- spending_item_rollup(grain, bucket, item_id, total, count)
+- activity_rollup(grain, bucket, bit, days) - days per activity bit (see
+  setup_activities.py), with bit -1 counting every logged day
+
+Buckets are 'YYYY-MM-DD' for days, the Monday of the ISO week
+('YYYY-MM-DD') for weeks and 'YYYY-MM' for months, so any window is a
+primary key range per grain (see rollups.py).
+
+Triggers on spending_log and personal_log keep every grain in step with
+INSERT/UPDATE/DELETE. The implicit delete of INSERT OR REPLACE into
+personal_log doesn't fire delete triggers, so a BEFORE INSERT trigger parks
+the row about to be replaced in activity_rollup_replaced and the AFTER
+INSERT trigger takes it back out. An upsert (ON CONFLICT DO UPDATE) fires
+the same BEFORE INSERT but then only the update triggers, so the parked row
+is never counted twice. Item rollups are keyed by the
+interned item id (see setup_items.py), so create_items() has to run first.
+Activity rollups follow the set bits of personal_log.activities, so a newly
+registered activity is rolled up without any change here.
+
+Safe to run repeatedly.
+"""
+
+import sqlite3
+
+from setup_items import item_id_sql
+
+DB_PATH = 'finance_tracker.db'
+
+# activity_rollup bit whose count is the number of logged days
+TRACKED_BIT = -1
+
+# grain -> SQL for the bucket a date expression falls in
+GRAINS = {
+    'day': "date({d})",
+    'week': "date({d}, 'weekday 0', '-6 days')",
+    'month': "strftime('%Y-%m', {d})",
+}
+
+ROLLUP_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS spending_rollup (
+        grain TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        category TEXT NOT NULL,
+        total DECIMAL(10,2) NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (grain, bucket, category)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS spending_item_rollup (
+        grain TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        total DECIMAL(10,2) NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (grain, bucket, item_id)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS activity_rollup (
+        grain TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        bit INTEGER NOT NULL,
+        days INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (grain, bucket, bit)
+    ) WITHOUT ROWID
+    ''',
+    # At most one row: the personal_log row an INSERT is about to replace
+    '''
+    CREATE TABLE IF NOT EXISTS activity_rollup_replaced (
+        date DATE PRIMARY KEY,
+        activities INTEGER NOT NULL
+    )
+    ''',
+]
+
+
+def _bucket(grain, date_expr):
+    return GRAINS[grain].format(d=date_expr)
+
+
+def _add_spending(row):
+    """Statements adding a spending_log row (NEW/OLD) to every grain"""
+    statements = []
+    for grain in GRAINS:
+        for table, key in (('spending_rollup', f"COALESCE({row}.category, 'Other')"),
+                           ('spending_item_rollup', item_id_sql(f'{row}.item'))):
+            column = 'category' if table == 'spending_rollup' else 'item_id'
+            statements.append(f'''
+        INSERT INTO {table} (grain, bucket, {column}, total, count)
+        VALUES ('{grain}', {_bucket(grain, f'{row}.date')}, {key}, ROUND({row}.price, 2), 1)
+        ON CONFLICT(grain, bucket, {column}) DO UPDATE SET
+            total = ROUND(total + excluded.total, 2),
+            count = count + 1;''')
+    return statements
+
+
+def _remove_spending(row):
+    """Statements taking a spending_log row (OLD) back out of every grain"""
+    statements = []
+    for grain in GRAINS:
+        for table, key in (('spending_rollup', f"COALESCE({row}.category, 'Other')"),
+                           ('spending_item_rollup', item_id_sql(f'{row}.item'))):
+            column = 'category' if table == 'spending_rollup' else 'item_id'
+            where = f"grain = '{grain}' AND bucket = {_bucket(grain, f'{row}.date')} AND {column} = {key}"
+            statements.append(f'''
+        UPDATE {table} SET total = ROUND(total - {row}.price, 2), count = count - 1
+        WHERE {where};
+        DELETE FROM {table} WHERE {where} AND count <= 0;''')
+    return statements
+
+
+def _add_activity(row):
+    """Statements counting a personal_log row's day and each of its activity bits in every grain"""
+    statements = []
+    for grain in GRAINS:
+        statements.append(f'''
+        INSERT INTO activity_rollup (grain, bucket, bit, days)
+        SELECT '{grain}', {_bucket(grain, f'{row}.date')}, bit, 1
+        FROM activity_types
+        WHERE ({row}.activities >> bit) & 1
+        UNION ALL
+        SELECT '{grain}', {_bucket(grain, f'{row}.date')}, {TRACKED_BIT}, 1
+        WHERE true
+        ON CONFLICT(grain, bucket, bit) DO UPDATE SET days = days + 1;''')
+    return statements
+
+
+def _remove_activity(row, replaced=False):
+    """
+    Statements taking a personal_log row back out of every grain. With
+    replaced, the row is the one parked in activity_rollup_replaced for
+    {row}.date (AFTER INSERT of a REPLACE) and a no-op when there is none.
+    """
+    if replaced:
+        mask = f'(SELECT activities FROM activity_rollup_replaced WHERE date = {row}.date)'
+        exists = f' AND EXISTS (SELECT 1 FROM activity_rollup_replaced WHERE date = {row}.date)'
+    else:
+        mask = f'{row}.activities'
+        exists = ''
+
+    statements = []
+    for grain in GRAINS:
+        where = f"grain = '{grain}' AND bucket = {_bucket(grain, f'{row}.date')}"
+        statements.append(f'''
+        UPDATE activity_rollup SET days = days - 1
+        WHERE {where} AND (bit = {TRACKED_BIT} OR ({mask} >> bit) & 1){exists};
+        DELETE FROM activity_rollup WHERE {where} AND days <= 0;''')
+    return statements
+
+
+def _trigger(name, timing, table, body):
+    return f'''
+    CREATE TRIGGER IF NOT EXISTS {name}
+    {timing} ON {table}
+    BEGIN{''.join(body)}
+    END
+    '''
+
+
+ROLLUP_TRIGGERS = [
+    _trigger('trg_spending_rollup_insert', 'AFTER INSERT', 'spending_log', _add_spending('NEW')),
+    _trigger('trg_spending_rollup_delete', 'AFTER DELETE', 'spending_log', _remove_spending('OLD')),
+    _trigger('trg_spending_rollup_update', 'AFTER UPDATE OF date, item, price, category', 'spending_log',
+             _remove_spending('OLD') + _add_spending('NEW')),
+    _trigger('trg_activity_rollup_replace', 'BEFORE INSERT', 'personal_log', ['''
+        DELETE FROM activity_rollup_replaced;
+        INSERT INTO activity_rollup_replaced (date, activities)
+        SELECT date, activities FROM personal_log WHERE date = NEW.date;''']),
+    _trigger('trg_activity_rollup_insert', 'AFTER INSERT', 'personal_log',
+             _remove_activity('NEW', replaced=True) + _add_activity('NEW')),
+    _trigger('trg_activity_rollup_delete', 'AFTER DELETE', 'personal_log', _remove_activity('OLD')),
+    _trigger('trg_activity_rollup_update', 'AFTER UPDATE OF date, activities', 'personal_log',
+             _remove_activity('OLD') + _add_activity('NEW')),
+]
+
+
+def _computed_activity_rollup(bucket):
+    """SELECT of (bucket, bit, days) straight from personal_log, usable as one operand of EXCEPT"""
+    return f'''
+            SELECT * FROM (
+                SELECT {bucket}, bit, COUNT(*)
+                FROM personal_log JOIN activity_types ON (personal_log.activities >> activity_types.bit) & 1
+                GROUP BY 1, 2
+                UNION ALL
+                SELECT {bucket}, {TRACKED_BIT}, COUNT(*)
+                FROM personal_log
+                GROUP BY 1
+            )
+    '''
+
+
+def rebuild_rollups(conn):
+    """Recompute every rollup from spending_log and personal_log"""
+    cursor = conn.cursor()
+    for table in ('spending_rollup', 'spending_item_rollup', 'activity_rollup'):
+        cursor.execute(f'DELETE FROM {table}')
+    for grain in GRAINS:
+        bucket = _bucket(grain, 'date')
+        cursor.execute(f'''
+            INSERT INTO spending_rollup (grain, bucket, category, total, count)
+            SELECT '{grain}', {bucket}, COALESCE(category, 'Other'), ROUND(SUM(price), 2), COUNT(*)
+            FROM spending_log
+            GROUP BY 2, 3
+        ''')
+        cursor.execute(f'''
+            INSERT INTO spending_item_rollup (grain, bucket, item_id, total, count)
+            SELECT '{grain}', {bucket}, item_id, ROUND(SUM(price), 2), COUNT(*)
+            FROM spending_log
+            GROUP BY 2, 3
+        ''')
+        cursor.execute(f'''
+            INSERT INTO activity_rollup (grain, bucket, bit, days)
+            SELECT '{grain}', * FROM ({_computed_activity_rollup(bucket)})
+        ''')
+
+
+def create_rollups(conn):
+    """Create the rollup tables and triggers, backfilling on first run"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activity_rollup'")
+    is_new = cursor.fetchone() is None
+
+    # Activity rollups from before the activity registry had a column per activity
+    cursor.execute('PRAGMA table_info(activity_rollup)')
+    if 'gym' in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('DROP TABLE activity_rollup')
+        for name in ('replace', 'insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS trg_activity_rollup_{name}')
+        is_new = True
+
+    # Insert triggers from before upserts, which took the replaced row out in BEFORE INSERT
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activity_rollup_replaced'")
+    if cursor.fetchone() is None:
+        for name in ('replace', 'insert'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS trg_activity_rollup_{name}')
+
+    # Item rollups from before the item dictionary were keyed by name
+    cursor.execute('PRAGMA table_info(spending_item_rollup)')
+    if 'item' in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('DROP TABLE spending_item_rollup')
+        for name in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS trg_spending_rollup_{name}')
+        is_new = True
+
+    for statement in ROLLUP_SCHEMA:
+        cursor.execute(statement)
+    for trigger in ROLLUP_TRIGGERS:
+        cursor.execute(trigger)
+
+    if is_new:
+        rebuild_rollups(conn)
+    conn.commit()
+    return is_new
+
+
+def verify_rollups(conn):
+    """Return (table, grain, bucket) keys where a rollup disagrees with the raw tables"""
+    cursor = conn.cursor()
+    mismatches = []
+    for grain in GRAINS:
+        bucket = _bucket(grain, 'date')
+        checks = [
+            ('spending_rollup', f'''
+                SELECT bucket, category, total, count FROM spending_rollup WHERE grain = '{grain}'
+            ''', f'''
+                SELECT {bucket}, COALESCE(category, 'Other'), ROUND(SUM(price), 2), COUNT(*)
+                FROM spending_log GROUP BY 1, 2
+            '''),
+            ('spending_item_rollup', f'''
+                SELECT bucket, item_id, total, count FROM spending_item_rollup WHERE grain = '{grain}'
+            ''', f'''
+                SELECT {bucket}, item_id, ROUND(SUM(price), 2), COUNT(*)
+                FROM spending_log GROUP BY 1, 2
+            '''),
+            ('activity_rollup', f'''
+                SELECT bucket, bit, days FROM activity_rollup WHERE grain = '{grain}'
+            ''', _computed_activity_rollup(bucket)),
+        ]
+        for table, stored, computed in checks:
+            cursor.execute(f'''
+                SELECT * FROM ({stored} EXCEPT {computed})
+                UNION
+                SELECT * FROM ({computed} EXCEPT {stored})
+            ''')
+            mismatches.extend((table, grain, row[0]) for row in cursor.fetchall())
+    return sorted(set(mismatches))
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    if create_rollups(conn):
+        print("✅ Created day/week/month rollups and backfilled them")
+    else:
+        print("⚠️  Rollups already exist, triggers checked")
+
+    mismatches = verify_rollups(conn)
+    if mismatches:
+        print(f"⚠️  {len(mismatches)} buckets out of sync - rebuilding")
+        rebuild_rollups(conn)
+        conn.commit()
+    conn.close()
+    print("\n✅ Analytics rollups are up to date!")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Daily Spending Aggregate Setup
+==============================
+Creates spending_daily(date, total, count) and the triggers that keep it in
+step with every INSERT/UPDATE/DELETE on spending_log, then rebuilds it from
+the raw log. Range totals in app.py read this table, so a period sum costs
+one row per day instead of one row per transaction.
+
+Totals are rounded to cents on every change so repeated add/subtract of
+prices can't drift away from SUM(price).
+
+Safe to run repeatedly.
+"""
+
+import sqlite3
+
+DB_PATH = 'finance_tracker.db'
+
+SPENDING_DAILY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS spending_daily (
+        date DATE PRIMARY KEY,
+        total DECIMAL(10,2) NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+'''
+
+SPENDING_DAILY_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_daily_insert
+    AFTER INSERT ON spending_log
+    BEGIN
+        INSERT INTO spending_daily (date, total, count)
+        VALUES (NEW.date, ROUND(NEW.price, 2), 1)
+        ON CONFLICT(date) DO UPDATE SET
+            total = ROUND(total + excluded.total, 2),
+            count = count + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_daily_delete
+    AFTER DELETE ON spending_log
+    BEGIN
+        UPDATE spending_daily
+        SET total = ROUND(total - OLD.price, 2), count = count - 1
+        WHERE date = OLD.date;
+        DELETE FROM spending_daily WHERE date = OLD.date AND count <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_daily_update
+    AFTER UPDATE OF date, price ON spending_log
+    BEGIN
+        UPDATE spending_daily
+        SET total = ROUND(total - OLD.price, 2), count = count - 1
+        WHERE date = OLD.date;
+        DELETE FROM spending_daily WHERE date = OLD.date AND count <= 0;
+        INSERT INTO spending_daily (date, total, count)
+        VALUES (NEW.date, ROUND(NEW.price, 2), 1)
+        ON CONFLICT(date) DO UPDATE SET
+            total = ROUND(total + excluded.total, 2),
+            count = count + 1;
+    END
+    ''',
+]
+
+
+def rebuild_spending_daily(conn):
+    """Recompute spending_daily from spending_log"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM spending_daily')
+    cursor.execute('''
+        INSERT INTO spending_daily (date, total, count)
+        SELECT date, ROUND(SUM(price), 2), COUNT(*)
+        FROM spending_log
+        GROUP BY date
+    ''')
+
+
+def create_spending_daily(conn):
+    """Create the aggregate table and triggers, backfilling on first run"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spending_daily'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute(SPENDING_DAILY_SCHEMA)
+    for trigger in SPENDING_DAILY_TRIGGERS:
+        cursor.execute(trigger)
+
+    if is_new:
+        rebuild_spending_daily(conn)
+    conn.commit()
+    return is_new
+
+
+def verify_spending_daily(conn):
+    """Return the dates where spending_daily disagrees with spending_log"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT date FROM (
+            SELECT date, ROUND(SUM(price), 2), COUNT(*) FROM spending_log GROUP BY date
+            EXCEPT
+            SELECT date, total, count FROM spending_daily
+        )
+        UNION
+        SELECT date FROM (
+            SELECT date, total, count FROM spending_daily
+            EXCEPT
+            SELECT date, ROUND(SUM(price), 2), COUNT(*) FROM spending_log GROUP BY date
+        )
+    ''')
+    return cursor.fetchall()
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    if create_spending_daily(conn):
+        print("✅ Created spending_daily table and backfilled it from spending_log")
+    else:
+        print("⚠️  spending_daily already exists, triggers checked")
+
+    mismatches = verify_spending_daily(conn)
+    if mismatches:
+        print(f"⚠️  {len(mismatches)} days out of sync - rebuilding")
+        rebuild_spending_daily(conn)
+        conn.commit()
+    conn.close()
+    print("\n✅ Daily spending aggregate is up to date!")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Spending Distribution Sketch Setup
+==================================
+Creates spending_sketch(month, category, bucket, count): a mergeable
+quantile sketch of ticket sizes per category per month.
+
+The sketch is log-bucketed (as in DDSketch): bucket k counts the prices in
+(GAMMA^(k-1), GAMMA^k], so any quantile read from it is within
+RELATIVE_ACCURACY of the true value. Unlike t-digest or KLL, sketches are
+plain per-bucket counts, which means:
+- merging the sketches of several months/categories is adding counts
+- an edited or deleted spending entry is taken back out exactly
+
+Triggers on spending_log keep the counts current. The bucket for a price is
+looked up in spending_sketch_bounds (an index seek), so no SQLite math
+functions are needed. spending_distribution.py reads and merges them.
+
+Safe to run repeatedly.
+"""
+
+import math
+import sqlite3
+
+DB_PATH = 'finance_tracker.db'
+
+# Relative error of every quantile, and the bucket growth factor that gives it
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+# Prices outside [MIN_PRICE, MAX_PRICE] land in the first/last bucket
+MIN_PRICE = 0.01
+MAX_PRICE = 1_000_000
+MIN_BUCKET = math.floor(math.log(MIN_PRICE, GAMMA))
+MAX_BUCKET = math.ceil(math.log(MAX_PRICE, GAMMA))
+
+SKETCH_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS spending_sketch_bounds (
+        upper REAL PRIMARY KEY,
+        bucket INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS spending_sketch (
+        month TEXT NOT NULL,
+        category TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, category, bucket)
+    ) WITHOUT ROWID
+    ''',
+]
+
+
+def bucket_sql(price):
+    """SQL for the sketch bucket of a price expression"""
+    return (f'COALESCE((SELECT bucket FROM spending_sketch_bounds WHERE upper >= {price} '
+            f'ORDER BY upper LIMIT 1), {MAX_BUCKET})')
+
+
+def _key(row):
+    return f"strftime('%Y-%m', {row}.date), COALESCE({row}.category, 'Other'), {bucket_sql(f'{row}.price')}"
+
+
+def _add(row):
+    return f'''
+        INSERT INTO spending_sketch (month, category, bucket, count)
+        VALUES ({_key(row)}, 1)
+        ON CONFLICT(month, category, bucket) DO UPDATE SET count = count + 1;'''
+
+
+def _remove(row):
+    where = (f"month = strftime('%Y-%m', {row}.date) AND category = COALESCE({row}.category, 'Other') "
+             f"AND bucket = {bucket_sql(f'{row}.price')}")
+    return f'''
+        UPDATE spending_sketch SET count = count - 1 WHERE {where};
+        DELETE FROM spending_sketch WHERE {where} AND count <= 0;'''
+
+
+SKETCH_TRIGGERS = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_sketch_insert
+    AFTER INSERT ON spending_log
+    BEGIN{_add('NEW')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_sketch_delete
+    AFTER DELETE ON spending_log
+    BEGIN{_remove('OLD')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_sketch_update
+    AFTER UPDATE OF date, price, category ON spending_log
+    BEGIN{_remove('OLD')}{_add('NEW')}
+    END
+    ''',
+]
+
+COMPUTED_SKETCH = f'''
+    SELECT month, category, bucket, COUNT(*)
+    FROM (
+        SELECT strftime('%Y-%m', date) as month, COALESCE(category, 'Other') as category,
+               {bucket_sql('price')} as bucket
+        FROM spending_log
+    )
+    GROUP BY 1, 2, 3
+'''
+
+
+def rebuild_spending_sketches(conn):
+    """Recompute every sketch from spending_log"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM spending_sketch')
+    cursor.execute(f'INSERT INTO spending_sketch (month, category, bucket, count) {COMPUTED_SKETCH}')
+
+
+def create_spending_sketches(conn):
+    """Create the sketch tables and triggers, backfilling on first run"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spending_sketch'")
+    is_new = cursor.fetchone() is None
+
+    for statement in SKETCH_SCHEMA:
+        cursor.execute(statement)
+    cursor.executemany('INSERT OR IGNORE INTO spending_sketch_bounds (upper, bucket) VALUES (?, ?)',
+                       [(GAMMA ** bucket, bucket) for bucket in range(MIN_BUCKET, MAX_BUCKET + 1)])
+    for trigger in SKETCH_TRIGGERS:
+        cursor.execute(trigger)
+
+    if is_new:
+        rebuild_spending_sketches(conn)
+    conn.commit()
+    return is_new
+
+
+def verify_spending_sketches(conn):
+    """Return the (month, category) sketches that disagree with spending_log"""
+    cursor = conn.cursor()
+    stored = 'SELECT month, category, bucket, count FROM spending_sketch'
+    cursor.execute(f'''
+        SELECT * FROM ({COMPUTED_SKETCH} EXCEPT {stored})
+        UNION
+        SELECT * FROM ({stored} EXCEPT {COMPUTED_SKETCH})
+    ''')
+    return sorted({(row[0], row[1]) for row in cursor.fetchall()})
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    if create_spending_sketches(conn):
+        print("✅ Created spending_sketch and backfilled it from spending_log")
+    else:
+        print("⚠️  spending_sketch already exists, triggers checked")
+
+    mismatches = verify_spending_sketches(conn)
+    if mismatches:
+        print(f"⚠️  {len(mismatches)} sketches out of sync - rebuilding")
+        rebuild_spending_sketches(conn)
+        conn.commit()
+    conn.close()
+    print(f"\n✅ Spending sketches are up to date! (quantiles within {RELATIVE_ACCURACY:.0%})")
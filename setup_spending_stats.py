@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Lifetime Spending Statistics Setup
+==================================
+Creates two summary tables:
+- spending_stats - a single row (id = 1) with the lifetime total, entry
+  count and number of days with spending
+- spending_stats_monthly(month, total, entry_count, spending_days), one row
+  per 'YYYY-MM'
+
+They're maintained by triggers on spending_daily (see
+setup_spending_daily.py), which already changes in the same transaction as
+every spending_log write. A new spending_daily row is a new spending day, a
+deleted one is a day gone, and an update is a change of that day's total.
+Lifetime and per-month daily averages are then a single-row read.
+
+Needs spending_daily, so run setup_spending_daily.py first. Safe to run
+repeatedly.
+"""
+
+import sqlite3
+
+DB_PATH = 'finance_tracker.db'
+
+SPENDING_STATS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS spending_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total DECIMAL(10,2) NOT NULL DEFAULT 0,
+        entry_count INTEGER NOT NULL DEFAULT 0,
+        spending_days INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS spending_stats_monthly (
+        month TEXT PRIMARY KEY,
+        total DECIMAL(10,2) NOT NULL DEFAULT 0,
+        entry_count INTEGER NOT NULL DEFAULT 0,
+        spending_days INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    ''',
+]
+
+
+def _apply(row, sign, days):
+    """Statements adding (sign 1) or removing (sign -1) a spending_daily row's change to both tables"""
+    total = f"{'' if sign > 0 else '-'}{row}.total"
+    count = f"{'' if sign > 0 else '-'}{row}.count"
+    return f'''
+        UPDATE spending_stats SET
+            total = ROUND(total + {total}, 2),
+            entry_count = entry_count + {count},
+            spending_days = spending_days + {days}
+        WHERE id = 1;
+        INSERT INTO spending_stats_monthly (month, total, entry_count, spending_days)
+        VALUES (strftime('%Y-%m', {row}.date), ROUND({total}, 2), {count}, {days})
+        ON CONFLICT(month) DO UPDATE SET
+            total = ROUND(total + excluded.total, 2),
+            entry_count = entry_count + excluded.entry_count,
+            spending_days = spending_days + excluded.spending_days;'''
+
+
+SPENDING_STATS_TRIGGERS = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_stats_insert
+    AFTER INSERT ON spending_daily
+    BEGIN{_apply('NEW', 1, 1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_stats_update
+    AFTER UPDATE ON spending_daily
+    BEGIN{_apply('OLD', -1, 0)}{_apply('NEW', 1, 0)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_spending_stats_delete
+    AFTER DELETE ON spending_daily
+    BEGIN{_apply('OLD', -1, -1)}
+        DELETE FROM spending_stats_monthly
+        WHERE month = strftime('%Y-%m', OLD.date) AND spending_days <= 0;
+    END
+    ''',
+]
+
+
+def rebuild_spending_stats(conn):
+    """Recompute both tables from spending_daily"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM spending_stats_monthly')
+    cursor.execute('''
+        INSERT OR REPLACE INTO spending_stats (id, total, entry_count, spending_days)
+        SELECT 1, ROUND(COALESCE(SUM(total), 0), 2), COALESCE(SUM(count), 0), COUNT(*)
+        FROM spending_daily
+    ''')
+    cursor.execute('''
+        INSERT INTO spending_stats_monthly (month, total, entry_count, spending_days)
+        SELECT strftime('%Y-%m', date), ROUND(SUM(total), 2), SUM(count), COUNT(*)
+        FROM spending_daily
+        GROUP BY 1
+    ''')
+
+
+def create_spending_stats(conn):
+    """Create the summary tables and triggers, backfilling on first run"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spending_stats'")
+    is_new = cursor.fetchone() is None
+
+    for statement in SPENDING_STATS_SCHEMA:
+        cursor.execute(statement)
+    for trigger in SPENDING_STATS_TRIGGERS:
+        cursor.execute(trigger)
+
+    if is_new:
+        rebuild_spending_stats(conn)
+    conn.commit()
+    return is_new
+
+
+def verify_spending_stats(conn):
+    """Return the keys ('lifetime' or 'YYYY-MM') where the summaries disagree with spending_daily"""
+    cursor = conn.cursor()
+    mismatches = []
+    cursor.execute('''
+        SELECT 1 FROM (
+            SELECT ROUND(COALESCE(SUM(total), 0), 2), COALESCE(SUM(count), 0), COUNT(*) FROM spending_daily
+            EXCEPT
+            SELECT total, entry_count, spending_days FROM spending_stats WHERE id = 1
+        )
+    ''')
+    if cursor.fetchone():
+        mismatches.append('lifetime')
+
+    computed = '''
+        SELECT strftime('%Y-%m', date), ROUND(SUM(total), 2), SUM(count), COUNT(*)
+        FROM spending_daily GROUP BY 1
+    '''
+    stored = 'SELECT month, total, entry_count, spending_days FROM spending_stats_monthly'
+    cursor.execute(f'''
+        SELECT * FROM ({computed} EXCEPT {stored})
+        UNION
+        SELECT * FROM ({stored} EXCEPT {computed})
+    ''')
+    mismatches.extend(sorted({row[0] for row in cursor.fetchall()}))
+    return mismatches
+
+
+def get_spending_stats(cursor, since_month=None):
+    """
+    Lifetime stats plus per-month rows from since_month ('YYYY-MM') on, in the
+    shape of SpendingColumns.daily_average_stats()
+    """
+    cursor.execute('SELECT total, entry_count, spending_days FROM spending_stats WHERE id = 1')
+    row = cursor.fetchone()
+    total, days = (row[0], row[2]) if row else (0, 0)
+    overall = {
+        'total_days': days,
+        'total_spent': round(total, 2) if days else None,
+        'overall_daily_avg': round(total / days, 2) if days else None,
+    }
+
+    cursor.execute('''
+        SELECT month, spending_days, total
+        FROM spending_stats_monthly
+        WHERE month >= ?
+        ORDER BY month
+    ''', (since_month or '',))
+    monthly = [
+        {
+            'month': month,
+            'days_in_month': month_days,
+            'monthly_total': round(month_total, 2),
+            'avg_daily_for_month': round(month_total / month_days, 2),
+        }
+        for month, month_days, month_total in cursor.fetchall()
+    ]
+    return overall, monthly
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    if create_spending_stats(conn):
+        print("✅ Created spending_stats tables and backfilled them from spending_daily")
+    else:
+        print("⚠️  spending_stats already exists, triggers checked")
+
+    mismatches = verify_spending_stats(conn)
+    if mismatches:
+        print(f"⚠️  {len(mismatches)} summaries out of sync - rebuilding")
+        rebuild_spending_stats(conn)
+        conn.commit()
+    conn.close()
+    print("\n✅ Spending statistics are up to date!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Table Version Counters
+======================
+Creates table_versions(name, version, updated_at) and triggers that bump a
+table's counter (and stamp the time) on every INSERT/UPDATE/DELETE.
+In-process caches compare the counter with the one they were built from to
+know when to reload, no matter which process or script made the change, and
+the HTTP layer derives ETag/Last-Modified from them.
+
+Safe to run repeatedly.
+"""
+
+import sqlite3
+
+DB_PATH = 'finance_tracker.db'
+
+TRACKED_TABLES = ['budget_periods', 'spending_log', 'personal_log', 'portfolio_log', 'etf_holdings', 'activity_types']
+
+
+def create_table_versions(conn, tables=TRACKED_TABLES):
+    """Create the counter table and the bump triggers for each tracked table"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP
+        )
+    ''')
+
+    # Tables created before updated_at existed: add it and rebuild the triggers
+    cursor.execute('PRAGMA table_info(table_versions)')
+    if 'updated_at' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE table_versions ADD COLUMN updated_at TIMESTAMP')
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_%_version_%'")
+        for (trigger,) in cursor.fetchall():
+            cursor.execute(f'DROP TRIGGER {trigger}')
+
+    for table in tables:
+        cursor.execute('INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)', (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions
+                    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE name = '{table}';
+                END
+            ''')
+    conn.commit()
+
+
+def get_table_version(cursor, table):
+    """Current change counter for a tracked table (0 if it isn't tracked)"""
+    cursor.execute('SELECT version FROM table_versions WHERE name = ?', (table,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def get_table_versions(cursor, tables):
+    """{table: (version, updated_at)} for several tracked tables in one query"""
+    placeholders = ', '.join('?' for _ in tables)
+    cursor.execute(f'SELECT name, version, updated_at FROM table_versions WHERE name IN ({placeholders})', tuple(tables))
+    found = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+    return {table: found.get(table, (0, None)) for table in tables}
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_PATH)
+    create_table_versions(conn)
+    cursor = conn.cursor()
+    for table in TRACKED_TABLES:
+        print(f"✅ Tracking changes to {table} (version {get_table_version(cursor, table)})")
+    conn.close()
@@ -0,0 +1,146 @@
+"""
+Spending Distribution
+=====================
+Reads the per-category, per-month quantile sketches kept by
+setup_spending_sketches.py and merges them for any range of months, so
+median/p90/p99 ticket sizes and histograms cost O(months x buckets) and
+never touch spending_log. Exact counts and means come from the month
+rollups (see setup_rollups.py).
+"""
+
+import math
+from collections import Counter, defaultdict
+
+from setup_spending_sketches import GAMMA, RELATIVE_ACCURACY
+
+QUANTILES = {'median': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+
+def bucket_value(bucket):
+    """Estimate for a price in bucket (within RELATIVE_ACCURACY of any price in it)"""
+    return 2 * GAMMA ** bucket / (GAMMA + 1)
+
+
+class QuantileSketch:
+    """Log-bucketed counts: {bucket: count}"""
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        return self
+
+    def quantile(self, q):
+        """Value at quantile q (0-1), or None for an empty sketch"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen > rank:
+                return round(bucket_value(bucket), 2)
+        return round(bucket_value(max(self.counts)), 2)
+
+    def histogram(self, bins=20):
+        """[{min, max, count}] over bins equal-width (in log scale) ranges covering the sketch"""
+        if not self.counts:
+            return []
+        first, last = min(self.counts), max(self.counts)
+        width = max(1, math.ceil((last - first + 1) / bins))
+        grouped = Counter()
+        for bucket, count in self.counts.items():
+            grouped[(bucket - first) // width] += count
+        return [
+            {
+                'min': round(GAMMA ** (first + index * width - 1), 2),
+                'max': round(GAMMA ** (first + (index + 1) * width - 1), 2),
+                'count': grouped[index],
+            }
+            for index in range((last - first) // width + 1)
+        ]
+
+    def summary(self, histogram_bins=None):
+        """{count, median, p90, p99} plus a histogram when histogram_bins is given"""
+        summary = {'count': self.count}
+        summary.update({name: self.quantile(q) for name, q in QUANTILES.items()})
+        if histogram_bins:
+            summary['histogram'] = self.histogram(histogram_bins)
+        return summary
+
+
+def load_sketches(cursor, start_month, end_month, categories=None):
+    """{(month, category): QuantileSketch} for months in [start_month, end_month] ('YYYY-MM')"""
+    params = [start_month, end_month]
+    category_sql = ''
+    if categories:
+        category_sql = f"AND category IN ({', '.join('?' for _ in categories)})"
+        params += list(categories)
+    cursor.execute(f'''
+        SELECT month, category, bucket, count
+        FROM spending_sketch
+        WHERE month BETWEEN ? AND ? {category_sql}
+    ''', params)
+    sketches = defaultdict(QuantileSketch)
+    for month, category, bucket, count in cursor.fetchall():
+        sketches[(month, category)].counts[bucket] += count
+    return sketches
+
+
+def _monthly_totals(cursor, start_month, end_month):
+    """{(month, category): (total, count)} from the month rollups"""
+    cursor.execute('''
+        SELECT bucket, category, total, count
+        FROM spending_rollup
+        WHERE grain = 'month' AND bucket BETWEEN ? AND ?
+    ''', (start_month, end_month))
+    return {(month, category): (total, count) for month, category, total, count in cursor.fetchall()}
+
+
+def _with_mean(summary, total, count):
+    summary['total'] = round(total, 2)
+    summary['mean'] = round(total / count, 2) if count else None
+    return summary
+
+
+def distribution(cursor, start_month, end_month, categories=None, bins=20):
+    """
+    Ticket size distribution for [start_month, end_month]: overall and per
+    category (with histograms), and per month
+    """
+    sketches = load_sketches(cursor, start_month, end_month, categories)
+    totals = _monthly_totals(cursor, start_month, end_month)
+
+    # name -> [sketch, total, count] for the overall, per-category and per-month merges
+    def merged():
+        return [QuantileSketch(), 0, 0]
+    overall = merged()
+    by_category = defaultdict(merged)
+    by_month = defaultdict(merged)
+    for (month, category), sketch in sketches.items():
+        total, count = totals.get((month, category), (0, 0))
+        for target in (overall, by_category[category], by_month[month]):
+            target[0].merge(sketch)
+            target[1] += total
+            target[2] += count
+
+    return {
+        'start': start_month,
+        'end': end_month,
+        'relative_accuracy': RELATIVE_ACCURACY,
+        'overall': _with_mean(overall[0].summary(bins), overall[1], overall[2]),
+        'categories': {
+            category: _with_mean(sketch.summary(bins), total, count)
+            for category, (sketch, total, count) in sorted(by_category.items(), key=lambda entry: -entry[1][2])
+        },
+        'months': [
+            {'month': month, **_with_mean(sketch.summary(), total, count)}
+            for month, (sketch, total, count) in sorted(by_month.items())
+        ],
+    }
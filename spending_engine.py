@@ -0,0 +1,366 @@
+"""
+Spending Analytics Engine
+=========================
+Keeps spending_log in memory as NumPy columns so the analytics pages answer
+with vectorized masks and np.bincount/np.add.reduceat instead of SQL
+round trips:
+
+    days        int32    date ordinal (date.toordinal())
+    prices      float64
+    item_ids    uint16   index into items (display names from the items
+                         dictionary, so spelling variants share an index)
+    categories  uint8    index into category_names
+
+Like the budget period index, the columns are shared across requests and
+reloaded when the spending_log change counter moves. Writes made through the
+app are applied incrementally (record_insert/record_update/record_delete):
+the counter is expected to move by exactly the number of rows written, and
+if it moved further (another process wrote too) the columns are dropped and
+reloaded on the next read instead.
+
+Appends write into spare capacity past the live rows, edits and deletes
+swap in fresh arrays, so columns a reader already holds never change under it.
+"""
+
+import threading
+from datetime import date
+
+import numpy as np
+from flask import g, has_app_context
+
+from categorizer import CATEGORIES, categorize
+from setup_table_versions import get_table_version
+
+# julianday() of 0001-01-01 is 1721425.5 and date(1, 1, 1).toordinal() is 1
+JULIAN_TO_ORDINAL = 1721424.5
+
+# date.toordinal() of the numpy datetime64 epoch (1970-01-01)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+MIN_CAPACITY = 1024
+
+
+def _ordinal(value):
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _month_keys(days):
+    """YYYY-MM month index (year * 12 + month - 1) for an array of ordinals"""
+    months = (days.astype(np.int64) - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return months + 1970 * 12
+
+
+def _month_label(key):
+    return f'{key // 12:04d}-{key % 12 + 1:02d}'
+
+
+class SpendingColumns:
+    """Columnar copy of spending_log"""
+
+    def __init__(self, rows, version):
+        """rows are (id, day ordinal, item, price, category), ordered by id"""
+        self.version = version
+        self._lock = threading.Lock()
+        self.items = []
+        self._item_index = {}
+        self.category_names = list(CATEGORIES)
+        self._category_index = {name: i for i, name in enumerate(self.category_names)}
+
+        n = len(rows)
+        capacity = max(MIN_CAPACITY, n * 2)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._days = np.zeros(capacity, dtype=np.int32)
+        self._prices = np.zeros(capacity, dtype=np.float64)
+        self._item_ids = np.zeros(capacity, dtype=np.uint16 if n < 65536 else np.uint32)
+        self._categories = np.zeros(capacity, dtype=np.uint8)
+        self.n = n
+        if n:
+            ids, ordinals, items, prices, categories = zip(*rows)
+            self._ids[:n] = ids
+            self._days[:n] = ordinals
+            self._prices[:n] = np.asarray(prices, dtype=np.float64)
+            self._item_ids[:n] = [self._item_id(item) for item in items]
+            self._categories[:n] = [self._category_code(category or categorize(item))
+                                    for item, category in zip(items, categories)]
+
+    # Interning
+
+    def _item_id(self, item):
+        item_id = self._item_index.get(item)
+        if item_id is None:
+            item_id = len(self.items)
+            if item_id > np.iinfo(self._item_ids.dtype).max:
+                self._item_ids = self._item_ids.astype(np.uint32)
+            self.items.append(item)
+            self._item_index[item] = item_id
+        return item_id
+
+    def _category_code(self, category):
+        code = self._category_index.get(category)
+        if code is None:
+            # Category strings written before the current rule table
+            code = len(self.category_names)
+            self.category_names.append(category)
+            self._category_index[category] = code
+        return code
+
+    # Writes (callers hold the lock)
+
+    def _grow(self, needed):
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_ids', '_days', '_prices', '_item_ids', '_categories'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def _write(self, rows):
+        """Append (id, date, item, price, category) rows after the live ones"""
+        start = self.n
+        self._grow(start + len(rows))
+        for offset, (row_id, day, item, price, category) in enumerate(rows):
+            i = start + offset
+            self._ids[i] = row_id
+            self._days[i] = _ordinal(day)
+            self._prices[i] = float(price)
+            self._item_ids[i] = self._item_id(item)
+            self._categories[i] = self._category_code(category or categorize(item))
+        self.n = start + len(rows)
+
+    def _position(self, row_id):
+        ids = self._ids[:self.n]
+        i = int(np.searchsorted(ids, row_id))
+        return i if i < self.n and ids[i] == row_id else None
+
+    def append(self, rows):
+        with self._lock:
+            self._write(rows)
+
+    def update(self, row_id, day, item, price, category):
+        with self._lock:
+            i = self._position(row_id)
+            if i is None:
+                return
+            item_id = self._item_id(item)
+            days = self._days.copy()
+            prices = self._prices.copy()
+            item_ids = self._item_ids.copy()
+            categories = self._categories.copy()
+            days[i] = _ordinal(day)
+            prices[i] = float(price)
+            item_ids[i] = item_id
+            categories[i] = self._category_code(category or categorize(item))
+            self._days, self._prices, self._item_ids, self._categories = days, prices, item_ids, categories
+
+    def delete(self, row_id):
+        with self._lock:
+            i = self._position(row_id)
+            if i is None:
+                return
+            keep = np.ones(len(self._ids), dtype=bool)
+            keep[i] = False
+            self._ids = self._ids[keep]
+            self._days = self._days[keep]
+            self._prices = self._prices[keep]
+            self._item_ids = self._item_ids[keep]
+            self._categories = self._categories[keep]
+            self.n -= 1
+
+    # Reads
+
+    def columns(self):
+        """Consistent views of the live rows: (days, prices, item_ids, categories)"""
+        with self._lock:
+            n = self.n
+            return self._days[:n], self._prices[:n], self._item_ids[:n], self._categories[:n]
+
+    def _select(self, start=None, end=None):
+        days, prices, item_ids, categories = self.columns()
+        mask = np.ones(len(days), dtype=bool)
+        if start is not None:
+            mask &= days >= _ordinal(start)
+        if end is not None:
+            mask &= days <= _ordinal(end)
+        return days[mask], prices[mask], item_ids[mask], categories[mask]
+
+    def total(self, start=None, end=None):
+        _, prices, _, _ = self._select(start, end)
+        return round(float(prices.sum()), 2)
+
+    def category_totals(self, start=None, end=None, categories=None):
+        """[{category, total, count}] ordered by total, largest first"""
+        _, prices, _, codes = self._select(start, end)
+        size = len(self.category_names)
+        totals = np.bincount(codes, weights=prices, minlength=size)
+        counts = np.bincount(codes, minlength=size)
+        result = [
+            {'category': self.category_names[code], 'total': round(float(totals[code]), 2), 'count': int(counts[code])}
+            for code in np.argsort(-totals, kind='stable') if counts[code]
+        ]
+        if categories is not None:
+            result = [row for row in result if row['category'] in categories]
+        return result
+
+    def item_totals(self, start=None, end=None, category=None, limit=None):
+        """[{item, total, frequency}] ordered by total, largest first"""
+        _, prices, item_ids, codes = self._select(start, end)
+        if category is not None:
+            code = self._category_index.get(category)
+            if code is None:
+                return []
+            mask = codes == code
+            prices, item_ids = prices[mask], item_ids[mask]
+        size = len(self.items)
+        totals = np.bincount(item_ids, weights=prices, minlength=size)
+        counts = np.bincount(item_ids, minlength=size)
+        order = [i for i in np.argsort(-totals, kind='stable') if counts[i]]
+        if limit is not None:
+            order = order[:limit]
+        return [{'item': self.items[i], 'total': round(float(totals[i]), 2), 'frequency': int(counts[i])}
+                for i in order]
+
+    def daily_totals(self, start, end):
+        """Spending per calendar day from start to end inclusive, zeros for days without any"""
+        first, last = _ordinal(start), _ordinal(end)
+        days, prices, _, _ = self._select(start, end)
+        return np.bincount(days - first, weights=prices, minlength=last - first + 1)
+
+    def weekly_totals(self, start, end=None):
+        """[{week: 'YYYY-WW' (Monday-based, like strftime %W), total}] for weeks with spending"""
+        days, prices, _, _ = self._select(start, end)
+        if not len(days):
+            return []
+        first = _ordinal(start)
+        last = _ordinal(end) if end is not None else int(days.max())
+        daily = np.bincount(days - first, weights=prices, minlength=last - first + 1)
+        counts = np.bincount(days - first, minlength=last - first + 1)
+
+        # Contiguous runs of days with the same week label, summed with reduceat
+        labels = [date.fromordinal(day).strftime('%Y-%W') for day in range(first, last + 1)]
+        boundaries = [0] + [i for i in range(1, len(labels)) if labels[i] != labels[i - 1]]
+        totals = np.add.reduceat(daily, boundaries)
+        spent_days = np.add.reduceat(counts, boundaries)
+        return [{'week': labels[b], 'total': round(float(total), 2)}
+                for b, total, spent in zip(boundaries, totals, spent_days) if spent]
+
+    def monthly_category_totals(self, start=None, end=None):
+        """[{category, month, total}] ordered by month then category"""
+        days, prices, _, codes = self._select(start, end)
+        if not len(days):
+            return []
+        months = _month_keys(days)
+        first_month = int(months.min())
+        size = len(self.category_names)
+        keys = (months - first_month) * size + codes
+        totals = np.bincount(keys, weights=prices)
+        counts = np.bincount(keys)
+        rows = []
+        for key in np.nonzero(counts)[0]:
+            month, code = divmod(int(key), size)
+            rows.append({'category': self.category_names[code],
+                         'month': _month_label(first_month + month),
+                         'total': round(float(totals[key]), 2)})
+        rows.sort(key=lambda row: (row['month'], row['category']))
+        return rows
+
+    def daily_average_stats(self, start=None, end=None):
+        """Days with spending, total and average per spending day - overall and per month"""
+        days, prices, _, _ = self._select(start, end)
+        if not len(days):
+            return {'total_days': 0, 'total_spent': None, 'overall_daily_avg': None}, []
+
+        spending_days, day_index = np.unique(days, return_inverse=True)
+        day_totals = np.round(np.bincount(day_index, weights=prices), 2)
+        total_spent = round(float(day_totals.sum()), 2)
+        overall = {
+            'total_days': len(spending_days),
+            'total_spent': total_spent,
+            'overall_daily_avg': round(total_spent / len(spending_days), 2),
+        }
+
+        # spending_days is sorted, so each month is a contiguous run
+        months = _month_keys(spending_days)
+        boundaries = np.concatenate(([0], np.nonzero(np.diff(months))[0] + 1))
+        monthly_totals = np.add.reduceat(day_totals, boundaries)
+        days_in_month = np.diff(np.append(boundaries, len(spending_days)))
+        monthly = [
+            {
+                'month': _month_label(int(months[b])),
+                'days_in_month': int(count),
+                'monthly_total': round(float(total), 2),
+                'avg_daily_for_month': round(float(total) / int(count), 2),
+            }
+            for b, total, count in zip(boundaries, monthly_totals, days_in_month)
+        ]
+        return overall, monthly
+
+
+_cache = {'columns': None}
+_cache_lock = threading.Lock()
+
+
+def load_columns(cursor):
+    """Return the shared columns, reloading them if spending_log changed since they were built"""
+    version = get_table_version(cursor, 'spending_log')
+    columns = _cache['columns']
+    if columns is not None and columns.version == version:
+        return columns
+
+    cursor.execute(f'''
+        SELECT spending_log.id, CAST(julianday(date) - {JULIAN_TO_ORDINAL} AS INTEGER),
+               COALESCE(items.name, item), price, category
+        FROM spending_log
+        LEFT JOIN items ON items.id = spending_log.item_id
+        ORDER BY spending_log.id
+    ''')
+    columns = SpendingColumns(cursor.fetchall(), version)
+    with _cache_lock:
+        _cache['columns'] = columns
+    return columns
+
+
+def get_columns(cursor):
+    """Columns for the current request - the version is only checked once per request"""
+    if not has_app_context():
+        return load_columns(cursor)
+
+    columns = g.get('_spending_columns')
+    if columns is None:
+        columns = load_columns(cursor)
+        g._spending_columns = columns
+    return columns
+
+
+def _apply(cursor, changed_rows, change):
+    """Apply a committed write made by this process, or drop the columns if someone else wrote too"""
+    version = get_table_version(cursor, 'spending_log')
+    with _cache_lock:
+        columns = _cache['columns']
+        if columns is None:
+            return
+        if version != columns.version + changed_rows:
+            _cache['columns'] = None
+            return
+        change(columns)
+        columns.version = version
+
+
+def record_insert(cursor, rows):
+    """After committing INSERTs of (id, date, item display name, price, category) rows"""
+    _apply(cursor, len(rows), lambda columns: columns.append(rows))
+
+
+def record_update(cursor, row_id, day, item, price, category):
+    """After committing an UPDATE of one row"""
+    _apply(cursor, 1, lambda columns: columns.update(row_id, day, item, price, category))
+
+
+def record_delete(cursor, row_id):
+    """After committing a DELETE of one row"""
+    _apply(cursor, 1, lambda columns: columns.delete(row_id))
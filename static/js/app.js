@@ -0,0 +1,282 @@
+// Dark Mode Toggle Functionality
+let darkMode = localStorage.getItem('darkMode') === 'true';
+
+function toggleDarkMode() {
+    darkMode = !darkMode;
+    localStorage.setItem('darkMode', darkMode);
+    applyDarkMode();
+}
+
+function applyDarkMode() {
+    const html = document.documentElement;
+    const darkModeText = document.getElementById('darkModeText');
+
+    if (darkMode) {
+        html.setAttribute('data-theme', 'dark');
+        if (darkModeText) darkModeText.textContent = 'Light Mode';
+    } else {
+        html.removeAttribute('data-theme');
+        if (darkModeText) darkModeText.textContent = 'Dark Mode';
+    }
+}
+
+// Initialize dark mode on page load
+document.addEventListener('DOMContentLoaded', function() {
+    applyDarkMode();
+});
+
+function updateCoitusVisibility() {
+    const heartIcon = document.getElementById('heartIcon');
+
+    // Define sensitive activity keywords
+    const sensitiveActivities = {
+        coitus: ['❤️', 'Coitus'],
+        smoking: ['🚬', 'Smoking'],
+        drinking: ['🍺', 'Drinking']
+    };
+
+    // Find all privacy-sensitive elements with targeted approach
+    const sensitiveElements = new Set();
+
+    // 1. Find elements with explicit privacy-sensitive class
+    document.querySelectorAll('.privacy-sensitive').forEach(el => sensitiveElements.add(el));
+
+    // 2. Find elements with coitus-element class (for dashboard stats)
+    document.querySelectorAll('.coitus-element').forEach(el => sensitiveElements.add(el));
+
+    // 3. Find specific activity dots (in calendar)
+    document.querySelectorAll('.activity-dot.coitus, .activity-dot.smoking, .activity-dot.drinking').forEach(el => {
+        sensitiveElements.add(el);
+    });
+
+    // 4. Find specific badges containing only sensitive activities
+    document.querySelectorAll('.badge').forEach(badge => {
+        const text = badge.textContent || badge.innerText || '';
+        // Only hide if badge contains ONLY one of the sensitive activities
+        if ((text.includes('❤️') && text.includes('Coitus')) ||
+            (text.includes('🚬') && text.includes('Smoking')) ||
+            (text.includes('🍺') && text.includes('Drinking'))) {
+            sensitiveElements.add(badge);
+        }
+    });
+
+    // 5. Find activity toggles for sensitive activities (in personal page)
+    document.querySelectorAll('.activity-toggle').forEach(toggle => {
+        // Check if this toggle is for a sensitive activity by looking at input name
+        const input = toggle.querySelector('input[type="checkbox"]');
+        if (input && (input.name === 'coitus' || input.name === 'smoking' || input.name === 'drinking')) {
+            // Hide the parent col div that contains this toggle
+            const parentCol = toggle.closest('.col-md-6');
+            if (parentCol) {
+                sensitiveElements.add(parentCol);
+            }
+        }
+    });
+
+    // 6. Find stat cards for sensitive activities (on dashboard)
+    document.querySelectorAll('.stat-card').forEach(statCard => {
+        const text = statCard.textContent || statCard.innerText || '';
+        if ((text.includes('❤️') && text.includes('Coitus')) ||
+            (text.includes('🚬') && text.includes('Smoking')) ||
+            (text.includes('🍺') && text.includes('Drinking'))) {
+            // Hide the parent column containing the stat card
+            const parentCol = statCard.closest('.col-lg-2, .col-md-3, .col-6, .col-md-6');
+            if (parentCol) {
+                sensitiveElements.add(parentCol);
+            }
+        }
+    });
+
+    // Apply visibility changes
+    sensitiveElements.forEach(el => {
+        if (coitusVisible) {
+            el.classList.remove('coitus-hidden');
+        } else {
+            el.classList.add('coitus-hidden');
+        }
+    });
+
+    // Update heart icon appearance
+    if (heartIcon) {
+        if (coitusVisible) {
+            heartIcon.classList.remove('dimmed');
+        } else {
+            heartIcon.classList.add('dimmed');
+        }
+    }
+
+    // Trigger chart updates if available (for dashboard activity chart)
+    if (typeof updateActivityChart === 'function') {
+        updateActivityChart();
+    }
+
+    // Trigger analytics chart updates if available
+    if (typeof updateWeeklyActivityChart === 'function') {
+        updateWeeklyActivityChart();
+    }
+    if (typeof loadActivityAnalytics === 'function') {
+        loadActivityAnalytics();
+    }
+}
+// Coitus visibility toggle functionality - reset to visible by default for safety
+let coitusVisible = localStorage.getItem('coitusVisible') !== 'false';
+// Emergency reset if page seems broken
+if (localStorage.getItem('coitusVisible') === null) {
+    localStorage.setItem('coitusVisible', 'true');
+    coitusVisible = true;
+}
+
+function toggleCoitusVisibility() {
+    coitusVisible = !coitusVisible;
+    localStorage.setItem('coitusVisible', coitusVisible);
+    updateCoitusVisibility();
+}
+
+// Initialize on page load
+document.addEventListener('DOMContentLoaded', function() {
+    updateCoitusVisibility();
+    // Initialize scroll handler
+    handleScroll();
+});
+
+// Wallpaper functionality
+let currentWallpaper = localStorage.getItem('selectedWallpaper') || 'greekWallpaper.jpg';
+
+function toggleWallpaper() {
+    const modal = new bootstrap.Modal(document.getElementById('wallpaperModal'));
+    modal.show();
+}
+
+function setWallpaper(wallpaperName) {
+    currentWallpaper = wallpaperName;
+    localStorage.setItem('selectedWallpaper', wallpaperName);
+    applyWallpaper();
+
+    // Close modal
+    const modal = bootstrap.Modal.getInstance(document.getElementById('wallpaperModal'));
+    if (modal) {
+        modal.hide();
+    }
+}
+
+function applyWallpaper() {
+    const body = document.body;
+
+    if (currentWallpaper === 'none') {
+        body.style.backgroundImage = 'none';
+        body.style.backgroundColor = '#f8f9fa';
+    } else if (currentWallpaper.startsWith('data:')) {
+        // Custom uploaded image
+        body.style.backgroundImage = `url('${currentWallpaper}')`;
+    } else {
+        // Pre-defined wallpapers
+        body.style.backgroundImage = `url('${wallpaperUrl(currentWallpaper, 'jpg')}')`;
+        // Browsers that understand image-set() type() get AVIF/WebP instead
+        const sources = (WALLPAPER_VARIANTS[currentWallpaper] || {f: []}).f
+            .map(ext => `url('${wallpaperUrl(currentWallpaper, ext)}') type('image/${ext === 'jpg' ? 'jpeg' : ext}')`);
+        if (sources.length) {
+            body.style.backgroundImage = `image-set(${sources.join(', ')})`;
+        }
+    }
+}
+
+// Smallest resized variant that still covers the viewport (see image_variants.py)
+function wallpaperUrl(name, ext) {
+    const variants = WALLPAPER_VARIANTS[name];
+    if (!variants || !variants.f.includes(ext)) {
+        return `/img/${name}`;
+    }
+    const needed = Math.max(window.innerWidth, window.innerHeight * variants.a) * (window.devicePixelRatio || 1);
+    const width = variants.w.find(w => w >= needed) || variants.w[variants.w.length - 1];
+    const stem = name.replace(/\.[^.]+$/, '');
+    return `/img/variants/${stem}-${width}.${variants.v}.${ext}`;
+}
+
+function uploadWallpaper(input) {
+    const file = input.files[0];
+    if (file) {
+        const reader = new FileReader();
+        reader.onload = function(e) {
+            const imageData = e.target.result;
+            setWallpaper(imageData);
+
+            // Show preview in a toast notification
+            showToast('Custom wallpaper uploaded successfully!', 'success');
+        };
+        reader.readAsDataURL(file);
+    }
+}
+
+function initializeWallpaper() {
+    applyWallpaper();
+}
+
+// Before first paint, so the stylesheet has no default wallpaper to fetch
+initializeWallpaper();
+
+function showToast(message, type = 'info') {
+    // Create toast element
+    const toast = document.createElement('div');
+    toast.className = `alert alert-${type} alert-dismissible fade show position-fixed`;
+    toast.style.cssText = `
+        top: 20px;
+        right: 20px;
+        z-index: 9999;
+        min-width: 250px;
+        backdrop-filter: blur(10px);
+        background: rgba(255, 255, 255, 0.95) !important;
+    `;
+    toast.innerHTML = `
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+
+    document.body.appendChild(toast);
+
+    // Auto-remove after 3 seconds
+    setTimeout(() => {
+        if (toast.parentNode) {
+            toast.remove();
+        }
+    }, 3000);
+}
+
+// Scroll to top functionality
+function scrollToTop() {
+    window.scrollTo({
+        top: 0,
+        behavior: 'smooth'
+    });
+}
+
+function handleScroll() {
+    const scrollToTopBtn = document.getElementById('scrollToTopBtn');
+    if (!scrollToTopBtn) return;
+
+    // Use window.pageYOffset for better mobile compatibility
+    const scrollTop = window.pageYOffset || document.documentElement.scrollTop || document.body.scrollTop || 0;
+    const scrollHeight = Math.max(
+        document.body.scrollHeight, document.documentElement.scrollHeight,
+        document.body.offsetHeight, document.documentElement.offsetHeight,
+        document.body.clientHeight, document.documentElement.clientHeight
+    );
+    const clientHeight = window.innerHeight || document.documentElement.clientHeight || document.body.clientHeight;
+
+    // Calculate scroll percentage
+    const scrollPercentage = (scrollTop / (scrollHeight - clientHeight)) * 100;
+
+    // Show button when user has scrolled 20% of the page or 200px (more sensitive for mobile)
+    if (scrollPercentage >= 20 || scrollTop > 200) {
+        scrollToTopBtn.classList.add('show');
+    } else {
+        scrollToTopBtn.classList.remove('show');
+    }
+}
+
+// Add scroll event listener with passive option for better mobile performance
+window.addEventListener('scroll', handleScroll, { passive: true });
+
+// Add touch support for mobile
+document.addEventListener('touchstart', function() {
+    // This helps with mobile scroll detection
+}, { passive: true });
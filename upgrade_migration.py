@@ -4,33 +4,13 @@ import sqlite3
 import sys
 from datetime import datetime, timedelta
 
+from reclassify_pay_periods import reclassify_pay_periods
+
 def get_db_connection():
     conn = sqlite3.connect('finance_tracker.db', detect_types=sqlite3.PARSE_DECLTYPES)
     conn.row_factory = sqlite3.Row
     return conn
 
-def determine_pay_period_type(start_date, end_date):
-    """
-    Determine if a budget period is first or second half based on the logic:
-    - If most days in budget period fall after the 15th → second period (2)
-    - If most days fall before 15th → first period (1)
-    """
-    if isinstance(start_date, str):
-        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-    if isinstance(end_date, str):
-        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-    total_days = (end_date - start_date).days + 1
-    days_after_15th = 0
-    current = start_date
-
-    while current <= end_date:
-        if current.day > 15:
-            days_after_15th += 1
-        current += timedelta(days=1)
-
-    return 2 if days_after_15th > (total_days / 2) else 1
-
 def run_migration():
     """Run the database migration for the upgrades"""
     print("Starting database migration for upgrades...")
@@ -52,17 +32,8 @@ def run_migration():
 
             # Update existing budget periods with calculated pay period types
             print("Updating existing budget periods with pay period types...")
-            cursor.execute('SELECT id, start_date, end_date FROM budget_periods')
-            periods = cursor.fetchall()
-
-            for period in periods:
-                pay_period_type = determine_pay_period_type(period['start_date'], period['end_date'])
-                cursor.execute('''
-                    UPDATE budget_periods
-                    SET pay_period_type = ?
-                    WHERE id = ?
-                ''', (pay_period_type, period['id']))
-                print(f"Updated period {period['id']}: {period['start_date']} to {period['end_date']} → Type {pay_period_type}")
+            updated = reclassify_pay_periods(conn, recompute_all=True)
+            print(f"Updated {updated} budget periods")
 
         else:
             print("pay_period_type column already exists, skipping...")